@@ -0,0 +1,130 @@
+"""
+本地版面解析 与 大模型 的准确率/延迟对比
+
+在合成论文语料上运行 LocalExtractor；指定 --provider/--model（且已配置API密钥）时，
+同时对相同文本调用 ModelManager.extract_info 进行对比。
+
+LocalExtractor 是按 classic 版式（大号标题、"Published 年份"）设计的，只用该版式评估会高估准确率；
+语料中的其他版式（期刊页眉、标题字号接近正文、折行标题、正文中的四位数字等，见 fixtures.LAYOUTS）
+未参与调参，结果按版式分别报告。
+
+用法: python benchmarks/bench_local_extractor.py [--count 50] [--layouts banner,flat] [--provider zhipu --model glm-4.5-flash]
+"""
+import argparse
+import io
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import build_pdf_bytes, LAYOUTS, _WORDS
+from utlies.config import FRONT_MATTER_MAX_PAGES, FRONT_MATTER_MAX_CHARS
+from utlies.local_extractor import LocalExtractor
+from utlies.pdf_to_text import open_pdf, extract_text
+from utlies.snippet_selector import select_front_matter
+
+_FIRST = ["Alice", "Bob", "Carlos", "Diana", "Wei", "Yuki", "Olga", "Pierre", "Amara", "Lars"]
+_LAST = ["Zhang", "Li", "Garcia", "Smith", "Tanaka", "Ivanova", "Dubois", "Okafor", "Nielsen", "Wang"]
+
+
+def make_corpus(count: int, seed: int = 0, layouts=LAYOUTS):
+    """生成带标注的语料，各版式轮流出现：[(pdf 字节, 标题, 作者列表, 年份, 版式)]"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        layout = layouts[i % len(layouts)]
+        title = " ".join(rng.choice(_WORDS).capitalize() for _ in range(rng.randint(4, 10)))
+        authors = [f"{rng.choice(_FIRST)} {rng.choice(_LAST)}" for _ in range(rng.randint(1, 5))]
+        year = rng.choice([None, str(rng.randint(1995, 2025))])
+        data = build_pdf_bytes(pages=rng.randint(1, 12), title=title, authors=authors,
+                               year=year, seed=i, layout=layout)
+        corpus.append((data, title, authors, year, layout))
+    return corpus
+
+
+def _norm(text) -> str:
+    return re.sub(r'\W+', ' ', str(text or "")).strip().lower()
+
+
+def _score(results, corpus):
+    """标题、第一作者、年份（包括正确地给出“无年份”）的准确率"""
+    title_ok = author_ok = year_ok = 0
+    for (title, authors, year, *_), (_, true_title, true_authors, true_year, _) in zip(results, corpus):
+        title_ok += _norm(title) == _norm(true_title)
+        author_ok += bool(authors) and _norm(authors[0]) == _norm(true_authors[0])
+        year_ok += str(year or "") == (true_year or "")
+    n = len(corpus) or 1
+    return title_ok / n, author_ok / n, year_ok / n
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def run_local(corpus):
+    extractor = LocalExtractor()
+    results, latencies, confident = [], [], 0
+    for data, *_ in corpus:
+        start = time.perf_counter()
+        result = extractor.extract(open_pdf(io.BytesIO(data)))
+        latencies.append(time.perf_counter() - start)
+        results.append(result)
+        confident += extractor.is_confident(result[3])
+    return results, latencies, confident
+
+
+def run_llm(corpus, provider, model):
+    from utlies.model_manager import ModelManager
+    manager = ModelManager(provider=provider, model_name=model)
+    results, latencies = [], []
+    for data, *_ in corpus:
+        text = extract_text(open_pdf(io.BytesIO(data)), FRONT_MATTER_MAX_PAGES, FRONT_MATTER_MAX_CHARS)
+        text = select_front_matter(text, manager.prompt_token_budget())
+        start = time.perf_counter()
+        try:
+            results.append(manager.extract_info(text))
+        except Exception as e:
+            results.append(("", [], None))
+            print(f"LLM 请求失败: {e}", file=sys.stderr)
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def _report(name, results, latencies, corpus):
+    """按版式分别输出准确率，最后一行为全部语料"""
+    layouts = sorted({item[4] for item in corpus}, key=LAYOUTS.index)
+    for layout in layouts + ["all"]:
+        picked = [i for i, item in enumerate(corpus) if layout in ("all", item[4])]
+        title_acc, author_acc, year_acc = _score([results[i] for i in picked], [corpus[i] for i in picked])
+        ms = [latencies[i] * 1000 for i in picked]
+        label = f"{name}/{layout}" + ("*" if layout == "classic" and name == "local" else "")
+        print(f"{label:<16} {title_acc:>10.1%} {author_acc:>11.1%} {year_acc:>9.1%} "
+              f"{_percentile(ms, 0.5):>10.1f} {_percentile(ms, 0.95):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=80)
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help=f"逗号分隔，可选 {', '.join(LAYOUTS)}")
+    parser.add_argument("--provider")
+    parser.add_argument("--model")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.count, layouts=args.layouts.split(","))
+    print(f"{'path':<16} {'title acc':>10} {'author acc':>11} {'year acc':>9} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+
+    results, latencies, confident = run_local(corpus)
+    _report("local", results, latencies, corpus)
+    print(f"  * LocalExtractor 按该版式设计；高置信度（无需大模型）: {confident}/{len(corpus)}")
+
+    if args.provider and args.model:
+        results, latencies = run_llm(corpus, args.provider, args.model)
+        _report("llm", results, latencies, corpus)
+
+
+if __name__ == "__main__":
+    main()
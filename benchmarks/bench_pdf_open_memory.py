@@ -0,0 +1,73 @@
+"""
+大文件打开方式的峰值内存基准：比较普通读取（pypdf 把整个文件读入内存）与内存映射打开
+
+为每个大小生成一份每页带大图像的合成 PDF（模拟扫描版会议论文集），
+在独立子进程中分别用两种方式执行与批处理相同的前置信息解析（parse_pdf），报告峰值 RSS 与耗时
+
+用法: python benchmarks/bench_pdf_open_memory.py [--sizes-mb 100 300] [--page-kb 1024]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _peak_rss_mb() -> float:
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(mode: str, path: str):
+    """子进程：按指定方式解析一个文件，输出峰值内存与耗时"""
+    from utlies import batch_processor, pdf_to_text
+    # parse_pdf 使用默认参数打开文件，这里替换为指定的打开方式
+    batch_processor.open_pdf = lambda p: pdf_to_text.open_pdf(p, use_mmap=mode == "mmap")
+    import pypdf  # noqa: F401  预先导入，基线内存中包含 pypdf 本身
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    parsed = batch_processor.parse_pdf(path, use_local_extractor=True)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"baseline_mb": baseline, "peak_mb": _peak_rss_mb(), "seconds": elapsed,
+                      "resolved": parsed["local"] is not None}))
+
+
+def measure(mode: str, path: str) -> dict:
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[100, 300], help="合成文件大小（MB）")
+    parser.add_argument("--page-kb", type=int, default=1024, help="每页图像大小（KB）")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+
+    from benchmarks.fixtures import make_pdf
+
+    print(f"{'大小':>8} {'方式':>8} {'峰值RSS':>10} {'增量':>10} {'耗时':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_mb in args.sizes_mb:
+            pages = max(1, size_mb * 1024 // args.page_kb)
+            path = make_pdf(os.path.join(workdir, f"large_{size_mb}mb.pdf"), pages=pages, image_kb=args.page_kb)
+            actual_mb = os.path.getsize(path) / (1024 * 1024)
+            for mode in ("buffered", "mmap"):
+                row = measure(mode, path)
+                print(f"{actual_mb:7.0f}M {mode:>8} {row['peak_mb']:9.1f}M "
+                      f"{row['peak_mb'] - row['baseline_mb']:9.1f}M {row['seconds'] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+pdf_to_text 基准：比较全文解析与前置信息限定解析在不同页数下的单文件耗时
+
+用法: python benchmarks/bench_pdf_to_text.py [--pages 1 10 50 300] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_pdf
+from utlies.config import FRONT_MATTER_MAX_PAGES, FRONT_MATTER_MAX_CHARS
+from utlies.pdf_to_text import pdf_to_text
+
+
+def _best_of(repeat, func, *args, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 300])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'full (ms)':>12} {'bounded (ms)':>14} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = make_pdf(os.path.join(tmp, f"paper_{pages}.pdf"), pages=pages)
+            full = _best_of(args.repeat, pdf_to_text, path)
+            bounded = _best_of(args.repeat, pdf_to_text, path,
+                               max_pages=FRONT_MATTER_MAX_PAGES,
+                               max_chars=FRONT_MATTER_MAX_CHARS)
+            print(f"{pages:>6} {full * 1000:>12.1f} {bounded * 1000:>14.1f} {full / bounded:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
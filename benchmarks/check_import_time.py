@@ -0,0 +1,63 @@
+"""
+启动耗时回归检查：用 python -X importtime 测量各入口模块的导入耗时
+
+检查两项：
+- 导入耗时（累计，取多次运行的最小值）不超过预算
+- 入口模块导入后没有加载 pypdf、大模型 SDK、tkinter 等重量级依赖（这些应在真正使用时再导入）
+
+超出预算或加载了禁止的模块时以非零状态码退出，可直接放进 CI 或发布前检查
+第二项（与耗时无关、结果稳定）同时由 tests/test_import_time.py 在 pytest 中检查
+
+用法: python benchmarks/check_import_time.py [--budget-ms 60] [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口模块 -> 导入后不应出现的模块
+ENTRY_POINTS = {
+    "utlies.cli": ["pypdf", "openai", "httpx", "zai", "tkinter", "sqlite3", "asyncio", "urllib.request"],
+    "utlies.LLM": ["pypdf", "openai", "httpx", "zai", "tkinter"],
+    "utlies.batch_processor": ["pypdf", "openai", "httpx", "zai", "tkinter", "asyncio"],
+}
+
+
+def measure(module: str) -> dict:
+    """在新解释器中导入 module，返回 {模块名: 累计导入耗时(微秒)}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if not parts[1].strip().isdigit():
+            continue  # 表头
+        timings[parts[2].strip()] = int(parts[1])
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=60.0, help="每个入口模块的导入耗时预算（毫秒）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module, forbidden in ENTRY_POINTS.items():
+        runs = [measure(module) for _ in range(args.repeat)]
+        cost = min(run.get(module, 0) for run in runs) / 1000
+        loaded = sorted(name for name in forbidden if name in runs[0])
+        ok = cost <= args.budget_ms and not loaded
+        failed = failed or not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {module:<26} {cost:8.1f} ms  (预算 {args.budget_ms:.0f} ms)")
+        if loaded:
+            print(f"     导入时加载了重量级模块: {', '.join(loaded)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+基准测试用的合成 PDF 生成器（不依赖 reportlab 等第三方库）
+
+生成的 PDF 第一页有大号标题、作者行和单位行，其余页为正文填充，
+可以控制页数，用来衡量解析耗时随页数的变化。
+layout 控制首页版式（见 LAYOUTS），用于评估本地版面解析在不同排版上的准确率。
+"""
+import io
+import os
+import random
+from typing import Dict, List, Optional
+
+_WORDS = ("learning model data network method result analysis system "
+          "training feature signal detection image graph sparse robust "
+          "optimization inference adaptive estimation framework").split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text_line(x: int, y: int, size: int, text: str) -> str:
+    return f"BT /F1 {size} Tf {x} {y} Td ({_escape(text)}) Tj ET\n"
+
+
+def _filler(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+# 首页版式：
+# classic  大号标题（18pt）、作者、单位、"Published 年份"（LocalExtractor 按此版式设计）
+# banner   期刊页眉（含年份）在标题上方，标题只比正文大 30%，正文中有四位数字
+# flat     标题与正文字号接近，日期在页脚的投稿信息中，正文中有四位数字
+# wrapped  长标题折成两行，作者行带上标编号，日期为 “月份 年份” 形式
+LAYOUTS = ("classic", "banner", "flat", "wrapped")
+
+_MONTHS = ("January", "March", "June", "September", "November")
+
+
+def _numeric_filler(rng: random.Random) -> str:
+    """含有类似年份的四位数字的正文（样本数、迭代次数等）"""
+    return (f"We train on {rng.randint(1950, 2099)} samples for {rng.randint(1950, 2099)} "
+            f"iterations and report {rng.choice(_WORDS)} accuracy.")
+
+
+def _first_page(rng: random.Random, title: str, authors: List[str], affiliation: str,
+                year: Optional[str], layout: str) -> list:
+    """首页上方的 (字号, 文本) 行；None 表示空行"""
+    if layout == "banner":
+        banner = f"Journal of Synthetic Studies {rng.randint(1, 60)} ({year}) {rng.randint(1, 900)}-{rng.randint(901, 999)}" \
+            if year else f"Journal of Synthetic Studies {rng.randint(1, 60)}"
+        return [(9, banner), None, (13, title), (11, ", ".join(authors)), (10, affiliation), None,
+                (11, "Abstract"), (10, _numeric_filler(rng))]
+    if layout == "flat":
+        return [(11, title), (10, ", ".join(authors)), (10, affiliation), None,
+                (10, "Abstract"), (10, _numeric_filler(rng))]
+    if layout == "wrapped":
+        words = title.split()
+        half = max(1, len(words) // 2)
+        marked = ", ".join(f"{author}{i + 1}" for i, author in enumerate(authors))
+        dated = f"{rng.choice(_MONTHS)} {year}" if year else None
+        return [(16, " ".join(words[:half])), (16, " ".join(words[half:]) or words[-1]), None,
+                (11, marked), (9, affiliation)] + ([(9, dated)] if dated else []) + [None, (11, "Abstract")]
+    rows = [(18, title), None, (12, ", ".join(authors)), (10, affiliation)]
+    if year:
+        rows.append((10, f"Published {year}"))
+    return rows + [None, (11, "Abstract")]
+
+
+def _page_stream(page_no: int, rng: random.Random, title: str, authors: List[str],
+                 affiliation: str, year: Optional[str], layout: str = "classic") -> str:
+    lines = []
+    y = 760
+    if page_no == 0:
+        for row in _first_page(rng, title, authors, affiliation, year, layout):
+            if row is None:
+                y -= 12
+                continue
+            size, text = row
+            lines.append(_text_line(72, y, size, text))
+            y -= size + 6
+        y -= 4
+    footer = page_no == 0 and layout == "flat" and year
+    while y > (80 if footer else 60):
+        lines.append(_text_line(72, y, 10, _filler(rng)))
+        y -= 14
+    if footer:
+        lines.append(_text_line(72, 50, 8, f"Received 12 May {year}; accepted 3 August {year}"))
+    return "".join(lines)
+
+
+def write_pdf(fp,
+              pages: int = 1,
+              title: str = "A Synthetic Study of Sparse Robust Learning",
+              authors: Optional[List[str]] = None,
+              affiliation: str = "Department of Computer Science, Example University",
+              year: Optional[str] = "2024",
+              info: Optional[Dict[str, str]] = None,
+              seed: int = 0,
+              image_kb: int = 0,
+              text_layer: bool = True,
+              layout: str = "classic"):
+    """
+    将一份合成论文 PDF 逐个对象写入二进制文件对象 fp（不在内存中拼接整个文件）
+    image_kb > 0 时每页附带一张该大小的灰度图像（随机像素，不可压缩），模拟扫描版的大文件
+    text_layer 为 False 时页面只绘制图像，没有文本和字体（模拟未经 OCR 的扫描件）
+    layout 为首页版式，见 LAYOUTS
+    """
+    authors = authors or ["Alice Zhang", "Bob Li"]
+    rng = random.Random(seed)
+    # 1: Catalog, 2: Pages, 3: Font，之后每页占两个对象（Page + Contents），带图像时再加一个 XObject
+    per_page = 3 if image_kb else 2
+    page_ids = [4 + per_page * i for i in range(pages)]
+    offsets = []
+    position = 0
+
+    def emit(data: bytes):
+        nonlocal position
+        fp.write(data)
+        position += len(data)
+
+    def emit_object(body: bytes):
+        offsets.append(position)
+        emit(f"{len(offsets)} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    emit_object(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    emit_object(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    emit_object(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, pid in enumerate(page_ids):
+        stream = _page_stream(i, rng, title, authors, affiliation, year, layout) if text_layer else ""
+        resources = "/Font << /F1 3 0 R >>" if text_layer else ""
+        if image_kb:
+            stream = "q 612 0 0 792 0 0 cm /Im1 Do Q\n" + stream
+            resources += f" /XObject << /Im1 {pid + 2} 0 R >>"
+        stream = stream.encode("latin-1")
+        emit_object(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                    f"/Resources << {resources} >> /Contents {pid + 1} 0 R >>".encode())
+        emit_object(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        if image_kb:
+            width = 1024
+            height = image_kb
+            pixels = rng.randbytes(width * height)
+            emit_object(f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                        f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Length {len(pixels)} >>\nstream\n".encode()
+                        + pixels + b"\nendstream")
+
+    info_id = None
+    if info:
+        entries = " ".join(f"/{k} ({_escape(v)})" for k, v in info.items())
+        emit_object(f"<< {entries} >>".encode("latin-1"))
+        info_id = len(offsets)
+
+    xref_pos = position
+    emit(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        emit(f"{off:010d} 00000 n \n".encode())
+    trailer = f"<< /Size {len(offsets) + 1} /Root 1 0 R"
+    if info_id:
+        trailer += f" /Info {info_id} 0 R"
+    emit(f"trailer\n{trailer} >>\nstartxref\n{xref_pos}\n%%EOF\n".encode())
+
+
+def build_pdf_bytes(**kwargs) -> bytes:
+    """生成一份合成论文 PDF 的字节内容，参数同 write_pdf"""
+    buffer = io.BytesIO()
+    write_pdf(buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def make_pdf(path: str, **kwargs) -> str:
+    """将合成 PDF 写入 path，参数同 write_pdf"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        write_pdf(f, **kwargs)
+    return path
+
+
+def make_corpus(directory: str, count: int, min_pages: int = 1, max_pages: int = 30, seed: int = 0) -> list:
+    """在目录中生成 count 份页数不同的合成论文，返回文件路径列表"""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        title = " ".join(rng.choice(_WORDS).capitalize() for _ in range(rng.randint(4, 10)))
+        paths.append(make_pdf(os.path.join(directory, f"{i:05d}_{rng.getrandbits(32):08x}.pdf"),
+                              pages=rng.randint(min_pages, max_pages), title=title, seed=i))
+    return paths
@@ -0,0 +1,149 @@
+"""
+本地 OpenAI 兼容桩服务器，用于在无网络、无API密钥的情况下测试性能
+
+支持 /chat/completions（任意前缀），可配置延迟、错误率和返回内容：
+- 单篇提取：取用户文本第一行作为标题、第二行拆分为作者
+- 批量提取：按 "### 文档 <id>" 分段，返回 JSON 数组
+
+用法: python benchmarks/mock_llm_server.py --port 8000 --latency 0.5 --jitter 0.2 --error-rate 0.05
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _guess(text: str) -> dict:
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    title = lines[0] if lines else "Untitled"
+    authors = [a.strip() for a in re.split(r',|\band\b', lines[1])] if len(lines) > 1 else []
+    year = re.search(r'\b(19|20)\d\d\b', text)
+    return {"title": title, "authors": [a for a in authors if a], "year": year.group(0) if year else None}
+
+
+def build_reply(messages: list, response_format: dict = None) -> str:
+    """根据请求内容生成回复；请求 JSON 模式时批量结果包在 {"results": [...]} 中"""
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    blocks = re.split(r'^### 文档 (\S+)\s*$', user, flags=re.MULTILINE)
+    if len(blocks) > 1:
+        items = []
+        for doc_id, body in zip(blocks[1::2], blocks[2::2]):
+            items.append(dict(_guess(body), id=doc_id))
+        if response_format:
+            return json.dumps({"results": items}, ensure_ascii=False)
+        return json.dumps(items, ensure_ascii=False)
+    return json.dumps(_guess(user), ensure_ascii=False)
+
+
+class MockLLMServer:
+    """在后台线程中运行的桩服务器"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 payload: str = None, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.payload = payload
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                with server._lock:
+                    server.requests += 1
+                    roll = server._rng.random()
+                    delay = max(0.0, server.latency + server._rng.uniform(-server.jitter, server.jitter))
+                time.sleep(delay)
+                if roll < server.rate_limit_rate:
+                    self._send(429, {"error": {"message": "rate limited"}}, {"retry-after": "0.1"})
+                    return
+                if roll < server.rate_limit_rate + server.error_rate:
+                    self._send(500, {"error": {"message": "mock failure"}})
+                    return
+                content = server.payload or build_reply(request.get("messages", []), request.get("response_format"))
+                prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 3
+                completion_tokens = len(content) // 3
+                self._send(200, {
+                    "id": f"mock-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                }, {"x-ratelimit-remaining-requests": "1000", "x-ratelimit-remaining-tokens": "1000000"})
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="平均响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回 429 的概率")
+    parser.add_argument("--payload", help="固定返回内容（默认根据输入生成）")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.jitter,
+                           args.error_rate, args.rate_limit_rate, args.payload)
+    print(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
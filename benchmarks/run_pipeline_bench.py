@@ -0,0 +1,175 @@
+"""
+离线端到端基准：合成PDF语料 + 本地桩大模型服务器
+
+驱动 pdf_to_text → ModelManager.extract_info → NamingManager.generate_filename → 重命名 的完整路径，
+报告吞吐量（文件/秒）、各阶段 p50/p95/p99 延迟以及峰值内存（RSS），无需网络和API密钥。
+
+用法:
+    python benchmarks/run_pipeline_bench.py --files 100 --latency 0.3
+    python benchmarks/run_pipeline_bench.py --files 200 --mode batch --max-in-flight 16
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import make_corpus
+from benchmarks.mock_llm_server import MockLLMServer
+from utlies.config import MODEL_CONFIGS, FRONT_MATTER_MAX_PAGES, FRONT_MATTER_MAX_CHARS
+
+PROVIDER = "openai"
+MODEL = "gpt-4o-mini"
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def peak_rss_mb() -> dict:
+    """当前进程与子进程的峰值 RSS（MB）"""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def run_sequential(paths, manager_cls):
+    """逐个文件运行原始流水线，记录每个阶段耗时"""
+    from utlies.naming_manager import NamingManager
+    from utlies.pdf_to_text import pdf_to_text
+    from utlies.snippet_selector import select_front_matter
+
+    manager = manager_cls(provider=PROVIDER, model_name=MODEL)
+    naming = NamingManager()
+    stages = {"parse": [], "llm": [], "naming": [], "rename": []}
+    failures = 0
+    for path in paths:
+        try:
+            start = time.perf_counter()
+            text = pdf_to_text(path, max_pages=FRONT_MATTER_MAX_PAGES, max_chars=FRONT_MATTER_MAX_CHARS)
+            text = select_front_matter(text, manager.prompt_token_budget())
+            t1 = time.perf_counter()
+            title, authors, year = manager.extract_info(text)
+            t2 = time.perf_counter()
+            new_name = naming.generate_filename(path, title, authors, year)
+            t3 = time.perf_counter()
+            os.rename(path, os.path.join(os.path.dirname(path), f"{os.path.basename(path)[:6]}{new_name}"))
+            t4 = time.perf_counter()
+        except Exception as e:
+            failures += 1
+            print(f"失败 {os.path.basename(path)}: {e}", file=sys.stderr)
+            continue
+        stages["parse"].append(t1 - start)
+        stages["llm"].append(t2 - t1)
+        stages["naming"].append(t3 - t2)
+        stages["rename"].append(t4 - t3)
+    return stages, failures
+
+
+def run_batch(paths, manager_cls, args):
+    """
+    使用 BatchProcessor 的并发流水线（强制走大模型路径，便于比较）
+    各阶段耗时取自 BatchProcessor 记录的运行指标（阶段名与 --metrics 输出一致）
+    """
+    from utlies.batch_processor import BatchProcessor
+    from utlies.metadata_resolver import MetadataResolver
+    from utlies.metrics import RunMetrics, set_metrics
+    from utlies.naming_manager import NamingManager
+
+    manager = manager_cls(provider=PROVIDER, model_name=MODEL)
+    processor = BatchProcessor(manager, NamingManager(),
+                               resolver=MetadataResolver(remote_lookup=False),
+                               parse_workers=args.workers, max_in_flight=args.max_in_flight,
+                               batched_prompts=args.batch_prompts,
+                               use_local_extractor=args.fast_paths)
+    metrics = RunMetrics()
+    previous = set_metrics(metrics)
+    try:
+        records = processor.run(paths)
+    finally:
+        processor.close()
+        set_metrics(previous)
+    stages = {}
+    for event in metrics.events:
+        stages.setdefault(event["stage"], []).append(event["seconds"])
+    failures = sum(1 for r in records if r["status"] != "renamed")
+    return stages, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.2, help="桩服务器平均延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mode", choices=["sequential", "batch"], default="sequential")
+    parser.add_argument("--client", choices=["sync", "async"], default="sync", help="同步 ModelManager 或异步客户端层")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--batch-prompts", action="store_true")
+    parser.add_argument("--fast-paths", action="store_true", help="批处理模式下启用本地版面解析")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            MockLLMServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate) as server:
+        # 指向本地桩服务器，并在临时目录中写入假密钥（APIKeyManager 从当前目录读取）
+        MODEL_CONFIGS[PROVIDER]["base_url"] = server.base_url
+        os.chdir(workdir)
+        with open("api_keys.json", "w", encoding="utf-8") as f:
+            json.dump({PROVIDER: "sk-mock"}, f)
+        paths = make_corpus(os.path.join(workdir, "corpus"), args.files, args.min_pages, args.max_pages)
+
+        if args.client == "async":
+            from utlies.async_client import AsyncModelManager as manager_cls
+        else:
+            from utlies.model_manager import ModelManager as manager_cls
+
+        start = time.perf_counter()
+        if args.mode == "sequential":
+            stages, failures = run_sequential(paths, manager_cls)
+        else:
+            stages, failures = run_batch(paths, manager_cls, args)
+        elapsed = time.perf_counter() - start
+        os.chdir(ROOT)
+
+        result = {
+            "mode": args.mode,
+            "client": args.client,
+            "files": args.files,
+            "failures": failures,
+            "elapsed_s": round(elapsed, 3),
+            "files_per_s": round(args.files / elapsed, 2),
+            "llm_requests": server.requests,
+            "stages_ms": {
+                name: {p: round(percentile(values, q) * 1000, 2)
+                       for p, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+                for name, values in stages.items()
+            },
+            "peak_rss_mb": {k: round(v, 1) for k, v in peak_rss_mb().items()},
+        }
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"模式: {result['mode']} ({result['client']})  文件: {result['files']}  失败: {result['failures']}")
+    print(f"耗时: {result['elapsed_s']} s  吞吐: {result['files_per_s']} 文件/秒  大模型请求: {result['llm_requests']}")
+    for name, row in result["stages_ms"].items():
+        print(f"  {name:<16} p50 {row['p50']:>8.2f} ms  p95 {row['p95']:>8.2f} ms  p99 {row['p99']:>8.2f} ms")
+    print(f"峰值 RSS: 本进程 {result['peak_rss_mb']['self']} MB，子进程 {result['peak_rss_mb']['children']} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
-from utlies.pdf_to_text import pdf_to_text
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from utlies.model_manager import ModelManager
+from utlies.async_client import AsyncModelManager
 from utlies.naming_manager import NamingManager
 from utlies.api_key_manager import APIKeyManager
+from utlies.result_cache import ResultCache
+from utlies.batch_processor import BatchProcessor
+from utlies.cascade import ModelCascade
+from utlies.config import CASCADE_MODELS
 
 
 class PDFUploaderApp:
@@ -21,6 +29,13 @@ class PDFUploaderApp:
         self.api_key_manager = APIKeyManager()
         self.model_manager = None  # 不在初始化时创建模型管理器
         self.naming_manager = NamingManager()
+        self.result_cache = ResultCache()
+
+        # 后台批处理：单线程执行器 + 事件队列（由 root.after 轮询）
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.events = queue.Queue()
+        self.batch_future = None
+        self.cancel_event = None
 
         # 创建界面组件
         self.create_widgets()
@@ -58,6 +73,11 @@ class PDFUploaderApp:
                                        command=self.set_api_key, 
                                        font=("Arial", 9))
         self.api_key_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        # 模型级联：先用快速模型，结果未通过校验时再交给更强的模型
+        self.cascade_var = tk.BooleanVar(value=False)
+        cascade_check = tk.Checkbutton(model_frame, text="级联（快速模型优先）", variable=self.cascade_var)
+        cascade_check.pack(side=tk.LEFT, padx=(10, 0))
         
         # 命名格式选择
         naming_frame = tk.Frame(config_frame)
@@ -116,7 +136,7 @@ class PDFUploaderApp:
         )
         clear_button.pack(side=tk.LEFT, padx=5)
 
-        process_button = tk.Button(
+        self.process_button = tk.Button(
             button_frame,
             text="⚙️ 处理文件",
             command=self.process_files,
@@ -125,7 +145,17 @@ class PDFUploaderApp:
             fg="white",
             padx=10
         )
-        process_button.pack(side=tk.LEFT, padx=5)
+        self.process_button.pack(side=tk.LEFT, padx=5)
+
+        self.cancel_button = tk.Button(
+            button_frame,
+            text="⏹ 取消",
+            command=self.cancel_processing,
+            font=("Arial", 10),
+            state=tk.DISABLED,
+            padx=10
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
 
         # 状态栏
         self.status_var = tk.StringVar()
@@ -252,79 +282,183 @@ class PDFUploaderApp:
         if not self.selected_files:
             messagebox.showwarning("警告", "请先选择 PDF 文件！")
             return
+        if self.batch_future is not None:
+            messagebox.showwarning("警告", "已有任务正在处理中")
+            return
 
+        # 更新模型管理器
+        if self.cascade_var.get() and self.provider_var.get() not in CASCADE_MODELS:
+            messagebox.showwarning("警告", f"{self.provider_var.get()} 没有配置级联模型，请取消勾选“级联”")
+            return
         try:
-            # 更新模型管理器
-            try:
-                self.model_manager = ModelManager(
+            if self.cascade_var.get():
+                self.model_manager = ModelCascade.for_provider(self.provider_var.get())
+            else:
+                self.model_manager = AsyncModelManager(
                     provider=self.provider_var.get(),
                     model_name=self.model_var.get()
                 )
-            except ValueError as e:
-                messagebox.showerror("API密钥错误", str(e))
-                self.set_api_key()
-                return
-            
-            # 更新命名管理器
-            self.naming_manager = NamingManager(
-                format_type=self.naming_var.get()
-            )
-            
-            total = len(self.selected_files)
-            success_count = 0
-
-            # 可选：禁用按钮防止重复点击
-            self.root.config(cursor="wait")  # 显示等待光标
-            self.root.update()  # 强制刷新界面
-
-            for i, pdf_path in enumerate(self.selected_files):
-                try:
-                    # 假设这些函数你已实现
-                    print(f"正在处理文件: {os.path.basename(pdf_path)}")
-                    text = pdf_to_text(pdf_path)
-                    print("前五百字符：{}".format(text[:500]))
-                    print()
-                    title, authors, year = self.model_manager.extract_info(text[:500])
-                    print(f"Title: {title}")
-                    print(f"Authors: {authors}")
-                    print(f"Year: {year}")
-
-                    if not authors:
-                        raise ValueError("未能提取作者信息")
-
-                    new_name = self.naming_manager.generate_filename(
-                        pdf_path, title, authors, year
-                    )
-                    new_path = os.path.join(os.path.dirname(pdf_path), new_name)
-
-                    # 重命名文件
-                    os.rename(pdf_path, new_path)
-                    print(new_name)
-                    success_count += 1
-
-                    # 可选：实时更新状态栏显示进度
-                    self.status_var.set(f"处理中... ({i+1}/{total})")
-                    self.root.update()  # 刷新界面
-
-                except Exception as e:
-                    messagebox.showerror("处理错误", f"文件 {os.path.basename(pdf_path)} 处理失败:\n{str(e)}")
-                    continue
-
-            # ✅✅✅ 处理结束：更新界面提示
-            self.status_var.set(f"🎉 处理完成！成功 {success_count}/{total} 个文件")
-            messagebox.showinfo("完成", f"文件处理完成！\n成功重命名 {success_count} 个文件")
-
-            # 可选：清空当前列表（因为文件已重命名，旧路径失效）
-            self.clear_list()
+        except ValueError as e:
+            messagebox.showerror("API密钥错误", str(e))
+            self.set_api_key()
+            return
+
+        # 更新命名管理器
+        self.naming_manager = NamingManager(
+            format_type=self.naming_var.get()
+        )
 
+        # 批处理：缓存 → 进程池解析 → 元数据/大模型并发提取 → 统一重命名
+        processor = BatchProcessor(self.model_manager, self.naming_manager,
+                                   result_cache=self.result_cache)
+
+        self.batch_total = len(self.selected_files)
+        self.batch_extracted = 0
+        self.batch_renamed = 0
+        self.batch_seen = set()
+        self.cancel_event = threading.Event()
+
+        # 禁用处理按钮，启用取消按钮
+        self.process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.root.config(cursor="watch")
+        self.status_var.set(f"处理中... (共 {self.batch_total} 个文件)")
+
+        # 在后台线程中运行批处理，进度通过队列回传，由 root.after 轮询
+        self.batch_future = self.executor.submit(
+            self._run_batch, processor, list(self.selected_files), self.cancel_event
+        )
+        self.root.after(100, self._poll_events)
+
+    def _run_batch(self, processor, pdf_paths, cancel_event):
+        """后台线程：执行批处理，不直接操作任何 Tk 组件"""
+        # 进度事件带上文件在列表中的位置，界面线程不必逐个查找
+        positions = {path: i for i, path in enumerate(pdf_paths)}
+        try:
+            records = processor.run(
+                pdf_paths,
+                progress_callback=lambda record: self.events.put(
+                    ("progress", (positions.get(record["path"]), dict(record)))),
+                cancel_event=cancel_event
+            )
+            self.events.put(("done", records))
+        except ValueError as e:
+            self.events.put(("key_error", str(e)))
         except Exception as e:
-            messagebox.showerror("严重错误", f"程序运行出错:\n{str(e)}")
-            self.status_var.set("❌ 处理失败，请查看错误信息")
+            self.events.put(("error", str(e)))
         finally:
-            self.root.config(cursor="")  # 恢复正常光标
+            processor.close()
+
+    def _poll_events(self):
+        """主线程：取出后台线程产生的事件并更新界面"""
+        finished = False
+        try:
+            while True:
+                kind, payload = self.events.get_nowait()
+                if kind == "progress":
+                    self._on_progress(*payload)
+                elif kind == "done":
+                    self._on_batch_done(payload)
+                    finished = True
+                elif kind == "key_error":
+                    messagebox.showerror("API密钥错误", payload)
+                    self.status_var.set("❌ 缺少API密钥")
+                    finished = True
+                    self.set_api_key()
+                elif kind == "error":
+                    messagebox.showerror("严重错误", f"程序运行出错:\n{payload}")
+                    self.status_var.set("❌ 处理失败，请查看错误信息")
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if finished:
+            self.batch_future = None
+            self.process_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            self.root.config(cursor="")
+        else:
+            self.root.after(100, self._poll_events)
+
+    def _on_progress(self, index, record):
+        """单个文件状态变化：更新进度和列表颜色（index 为文件在列表中的位置）"""
+        status = record["status"]
+        # 提取阶段和重命名阶段都会上报同一个文件，已提取数按文件计一次
+        if record["path"] not in self.batch_seen:
+            self.batch_seen.add(record["path"])
+            self.batch_extracted += 1
+        if status == "renamed":
+            self.batch_renamed += 1
+        colors = {"renamed": "#2e7d32", "extracted": "#1565c0", "failed": "#c62828", "skipped": "#757575"}
+        # 处理期间列表可能已被清空或修改，位置对应的仍是该文件时才更新颜色
+        if (status in colors and index is not None and index < len(self.selected_files)
+                and self.selected_files[index] == record["path"]):
+            self.file_listbox.itemconfig(index, fg=colors[status])
+        self.status_var.set(
+            f"处理中... 已提取 {self.batch_extracted}/{self.batch_total}，已重命名 {self.batch_renamed}"
+        )
+
+    def cancel_processing(self):
+        """取消当前批处理：正在进行的请求完成后停止，不再重命名"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("正在取消...")
+
+    def _on_batch_done(self, records):
+        """批处理结束：汇总结果，一次性展示所有错误"""
+        success_count = 0
+        tier_counts = {}
+        errors = []
+        skipped = []
+        cancelled = 0
+        for record in records:
+            if record["status"] == "renamed":
+                success_count += 1
+                tier_counts[record["tier"]] = tier_counts.get(record["tier"], 0) + 1
+            elif record["status"] == "cancelled":
+                cancelled += 1
+            elif record["status"] == "skipped":
+                skipped.append(f"{os.path.basename(record['path'])}: {record['error']}")
+            else:
+                errors.append(f"{os.path.basename(record['path'])}: {record['error']}")
+
+        # ✅✅✅ 处理结束：更新界面提示
+        total = len(records)
+        tier_summary = "，".join(f"{k}: {v}" for k, v in tier_counts.items())
+        cache_stats = self.result_cache.stats()
+        message = (f"文件处理完成！\n成功重命名 {success_count} 个文件\n解析来源：{tier_summary}"
+                   f"\n缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次")
+        if isinstance(self.model_manager, ModelCascade):
+            for tier in self.model_manager.report():
+                if tier["files"]:
+                    message += (f"\n{tier['model']}：处理 {tier['files']} 个，通过校验 {tier['accepted']} 个，"
+                                f"升级 {tier['escalated']} 个")
+        if cancelled:
+            message += f"\n已取消 {cancelled} 个文件"
+        if skipped:
+            message += f"\n\n以下 {len(skipped)} 个文件不是可提取的论文，已跳过:\n" + "\n".join(skipped[:10])
+            if len(skipped) > 10:
+                message += f"\n... 另有 {len(skipped) - 10} 个"
+        if errors:
+            message += f"\n\n以下 {len(errors)} 个文件处理失败:\n" + "\n".join(errors[:20])
+            if len(errors) > 20:
+                message += f"\n... 另有 {len(errors) - 20} 个"
+            messagebox.showwarning("完成", message)
+        else:
+            messagebox.showinfo("完成", message)
+
+        # 从列表中移除已重命名的文件（旧路径失效），保留失败和取消的文件以便重试
+        remaining = [r["path"] for r in records if r["status"] != "renamed"]
+        self.clear_list()
+        self.selected_files.extend(remaining)
+        for f in remaining:
+            self.file_listbox.insert(tk.END, os.path.basename(f))
+        self.status_var.set(f"🎉 处理完成！成功 {success_count}/{total} 个文件")
 
 # 启动程序
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     root = tk.Tk()
     app = PDFUploaderApp(root)
     root.mainloop()
\ No newline at end of file
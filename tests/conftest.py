@@ -0,0 +1,5 @@
+import os
+import sys
+
+# utlies 是命名空间包，直接运行 pytest 时把仓库根目录加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
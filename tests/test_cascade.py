@@ -0,0 +1,58 @@
+import pytest
+
+from utlies.cascade import ModelCascade, score_result
+from utlies.cli import build_parser
+
+CONTEXT = "Deep Residual Learning for Image Recognition\nKaiming He, Xiangyu Zhang\n2016"
+
+
+class FakeManager:
+    """按模型名返回预设结果或抛出预设异常"""
+
+    outcomes = {}
+
+    def __init__(self, provider, model_name):
+        self.model_name = model_name
+
+    def extract_info(self, context):
+        outcome = self.outcomes[self.model_name]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_cascade(outcomes):
+    FakeManager.outcomes = outcomes
+    return ModelCascade([{"provider": "p", "model": name} for name in outcomes], manager_factory=FakeManager)
+
+
+GOOD = ("Deep Residual Learning for Image Recognition", ["Kaiming He"], "2016")
+
+
+def test_score_result():
+    assert score_result(GOOD, CONTEXT) == (1.0, [])
+    assert score_result(None, CONTEXT) == (0.0, ["well_formed"])
+    assert score_result(("A Made Up Title", [], "3000"), CONTEXT)[1] == ["authors", "year", "title_overlap"]
+
+
+def test_escalates_when_cheap_model_fails_validation():
+    cascade = make_cascade({"cheap": ("Something Else Entirely", ["X"], None), "strong": GOOD})
+    assert cascade.extract_info(CONTEXT) == GOOD
+    assert [tier["escalated"] for tier in cascade.report()] == [1, 0]
+
+
+def test_escalates_on_unparseable_reply():
+    cascade = make_cascade({"cheap": ValueError("无法解析模型响应内容"), "strong": GOOD})
+    assert cascade.extract_info(CONTEXT) == GOOD
+
+
+def test_request_errors_are_not_hidden():
+    cascade = make_cascade({"cheap": PermissionError("invalid api key"), "strong": GOOD})
+    with pytest.raises(PermissionError):
+        cascade.extract_info(CONTEXT)
+
+
+def test_cascade_and_route_are_mutually_exclusive(capsys):
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["rename", ".", "--cascade", "--route", "openai:gpt-4o"])
+    assert "not allowed with" in capsys.readouterr().err
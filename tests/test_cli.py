@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from utlies.cli import iter_pdfs, chunked, main
+
+
+def test_iter_pdfs_skips_files_renamed_during_iteration(tmp_path):
+    names = {f"paper-with-a-fairly-long-file-name-{i:05d}.pdf" for i in range(3000)}
+    for name in names:
+        (tmp_path / name).write_bytes(b"%PDF")
+    (tmp_path / "notes.txt").write_text("x")
+    seen = []
+    for path in iter_pdfs(str(tmp_path)):
+        seen.append(os.path.basename(path))
+        os.rename(path, os.path.join(str(tmp_path), "Renamed " + os.path.basename(path)))
+    assert sorted(seen) == sorted(names)
+
+
+def test_iter_pdfs_recursive(tmp_path):
+    (tmp_path / "sub" / "deeper").mkdir(parents=True)
+    for path in ("a.pdf", "sub/b.PDF", "sub/deeper/c.pdf"):
+        (tmp_path / path).write_bytes(b"%PDF")
+    assert sorted(os.path.basename(p) for p in iter_pdfs(str(tmp_path))) == ["a.pdf"]
+    assert sorted(os.path.basename(p) for p in iter_pdfs(str(tmp_path), recursive=True)) == \
+        ["a.pdf", "b.PDF", "c.pdf"]
+
+
+def test_chunked():
+    assert list(chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_hedge_requires_route(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["rename", str(tmp_path), "--hedge"])
+    assert exit_info.value.code == 2
+    assert "--hedge" in capsys.readouterr().err
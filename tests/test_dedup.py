@@ -0,0 +1,34 @@
+from utlies.dedup import DuplicateIndex, minhash_signature, estimate_similarity
+
+ABSTRACT = ("We study sparse robust learning under adversarial corruption and show that a simple "
+            "iterative thresholding method recovers the support with high probability. Experiments on "
+            "synthetic and real benchmarks confirm that the method is both faster and more accurate than "
+            "existing convex relaxations across a wide range of noise levels and sample sizes.")
+HEAD = "A Synthetic Study of Sparse Robust Learning\nAlice Zhang, Bob Li\n"
+PREPRINT = HEAD + ABSTRACT + "\nPreprint submitted to Elsevier"
+PUBLISHED = ("Contents lists available at ScienceDirect\nvol. 12 (2021) 1-14\n" + HEAD
+             + "© 2021 Elsevier B.V. All rights reserved.\n" + ABSTRACT.replace("We study", "We investigate"))
+OTHER = ("Deep Residual Learning for Image Recognition\nKaiming He, Xiangyu Zhang\n"
+         "Deeper neural networks are more difficult to train. We present a residual learning framework "
+         "to ease the training of networks that are substantially deeper than those used previously.")
+
+
+def test_signature_ignores_boilerplate_and_rejects_short_text():
+    assert estimate_similarity(minhash_signature(PREPRINT), minhash_signature(PUBLISHED)) > 0.8
+    assert estimate_similarity(minhash_signature(PREPRINT), minhash_signature(OTHER)) < 0.2
+    assert minhash_signature("Untitled") is None
+
+
+def test_index_groups_exact_and_near_duplicates():
+    index = DuplicateIndex()
+    assert index.match_bytes("a.pdf", "hash-a") is None
+    assert index.match_bytes("a copy.pdf", "hash-a") == "a.pdf"
+    assert index.match_text("a.pdf", minhash_signature(PREPRINT)) is None
+    assert index.match_text("b.pdf", minhash_signature(OTHER)) is None
+    assert index.match_text("a published.pdf", minhash_signature(PUBLISHED)) == "a.pdf"
+    assert index.match_text("c.pdf", None) is None
+
+    clusters = list(index.clusters())
+    assert [c["representative"] for c in clusters] == ["a.pdf"]
+    assert [(m["path"], m["kind"]) for m in clusters[0]["members"]] == [
+        ("a copy.pdf", "exact"), ("a published.pdf", "near")]
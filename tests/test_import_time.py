@@ -0,0 +1,16 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.check_import_time import ENTRY_POINTS, ROOT
+
+
+@pytest.mark.parametrize("module", sorted(ENTRY_POINTS))
+def test_entry_points_do_not_import_heavy_dependencies(module):
+    # 在新解释器中导入，避免受本进程中其他测试已加载模块的影响
+    code = (f"import json, sys, {module}; "
+            f"print(json.dumps([name for name in {ENTRY_POINTS[module]!r} if name in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == []
@@ -0,0 +1,38 @@
+import json
+
+from utlies.journal import WorkJournal
+
+
+def test_resume_skips_renamed_and_produced_files(tmp_path):
+    log = tmp_path / "run.jsonl"
+    a, b, c = (str(tmp_path / name) for name in ("a.pdf", "b.pdf", "c.pdf"))
+    with WorkJournal(str(log)) as journal:
+        assert list(journal.filter_pending([a, b, c])) == [a, b, c]
+        journal.record(a, "renamed", new_path=str(tmp_path / "Paper A.pdf"))
+        journal.record(b, "failed", error="timeout")
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"path": "' + c)  # 崩溃时写了一半的最后一行
+
+    with WorkJournal(str(log)) as journal:
+        pending = list(journal.filter_pending([a, b, c, str(tmp_path / "Paper A.pdf")]))
+        assert pending == [b, c]
+        assert journal.summary() == {"renamed": 1, "failed": 1, "discovered": 1}
+    with WorkJournal(str(log), retry_failed=False) as journal:
+        assert list(journal.filter_pending([b])) == []
+
+
+def test_undo_restores_names_in_reverse_order(tmp_path):
+    first, second = tmp_path / "x.pdf", tmp_path / "y.pdf"
+    renamed = tmp_path / "Paper.pdf"
+    renamed.write_bytes(b"%PDF")
+    (tmp_path / "Other.pdf").write_bytes(b"%PDF")
+    with WorkJournal(str(tmp_path / "run.jsonl")) as journal:
+        journal.record(str(first), "renamed", new_path=str(renamed))
+        journal.record(str(second), "renamed", new_path=str(tmp_path / "Other.pdf"))
+        journal.record(str(tmp_path / "gone.pdf"), "renamed", new_path=str(tmp_path / "missing.pdf"))
+        assert journal.undo(dry_run=True) == {"undone": 2, "skipped": 1}
+        assert renamed.exists()
+        assert journal.undo() == {"undone": 2, "skipped": 1}
+    assert first.exists() and second.exists() and not renamed.exists()
+    states = [json.loads(line)["state"] for line in open(tmp_path / "run.jsonl", encoding="utf-8")]
+    assert states[-2:] == ["undone", "undone"]
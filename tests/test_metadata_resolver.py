@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from benchmarks.fixtures import build_pdf_bytes
+from utlies.metadata_resolver import MetadataResolver
+from utlies.pdf_to_text import open_pdf, extract_text
+
+TITLE = "A Synthetic Study of Sparse Robust Learning"
+INFO = {"Title": TITLE, "Author": "Alice Zhang; Bob Li", "CreationDate": "D:20230105120000"}
+
+
+def resolve(**kwargs):
+    reader = open_pdf(io.BytesIO(build_pdf_bytes(title=TITLE, info=INFO, **kwargs)))
+    return MetadataResolver(remote_lookup=False).resolve_local(reader, extract_text(reader, 1, 4000))
+
+
+def test_info_year_comes_from_first_page_not_creation_date():
+    assert resolve(year="2019") == (TITLE, ["Alice Zhang", "Bob Li"], "2019", MetadataResolver.TIER_INFO)
+
+
+def test_creation_date_is_not_used_as_year():
+    assert resolve(year=None)[2] is None
+
+
+@pytest.mark.parametrize("field, authors", [
+    ("Zhang, Alice; Li, Bob", ["Alice Zhang", "Bob Li"]),
+    ("Zhang, Alice", ["Alice Zhang"]),
+    ("van der Berg, J. A. and Li, B.", ["J. A. van der Berg", "B. Li"]),
+    ("Alice Zhang; Bob Li", ["Alice Zhang", "Bob Li"]),
+    ("Alice Zhang, Bob Li and Carol Wu", ["Alice Zhang", "Bob Li", "Carol Wu"]),
+    ("", []),
+])
+def test_split_authors(field, authors):
+    assert MetadataResolver.split_authors(field) == authors
+
+
+@pytest.mark.parametrize("title, plausible", [
+    ("Main Results on Sparse Recovery", True),
+    ("Title IX and Gender Equity in Engineering", True),
+    ("Paper Folding Algorithms for Origami Robots", True),
+    ("main.pdf", False),
+    ("Paper1", False),
+    ("Untitled", False),
+    ("Microsoft Word - draft_v3", False),
+])
+def test_placeholder_titles(title, plausible):
+    assert MetadataResolver().is_plausible(title, ["Alice Zhang"]) is plausible
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from utlies.model_manager import ModelManager
+
+
+class ScriptedManager(ModelManager):
+    """按顺序返回预设回复（或抛出预设异常），不发送网络请求"""
+
+    def __init__(self, replies, model_name="gpt-4o"):
+        super().__init__(provider="openai", model_name=model_name)
+        self.replies = list(replies)
+        self.client = object()
+        self.max_tokens = []
+
+    def _create_completion(self, messages, max_tokens, response_format=None):
+        self.max_tokens.append(max_tokens)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def batch_reply(*ids):
+    return json.dumps({"results": [{"id": i, "title": f"Title {i}", "authors": ["A"], "year": "2020"}
+                                   for i in ids]})
+
+
+def test_extract_batch_retries_missing_and_malformed_entries():
+    manager = ScriptedManager([batch_reply("0"), "not json at all", batch_reply("1", "2")])
+    results = manager.extract_batch({"0": "a", "1": "b", "2": "c"}, max_retries=2)
+    assert sorted(results) == ["0", "1", "2"]
+
+
+def test_extract_batch_gives_up_after_max_retries():
+    manager = ScriptedManager(["[]", "[]"])
+    assert manager.extract_batch({"0": "a", "1": "b"}, max_retries=1) == {}
+
+
+@pytest.mark.parametrize("contexts", [{"0": "a"}, {"0": "a", "1": "b"}])
+@pytest.mark.parametrize("error", [PermissionError("invalid api key"), ValueError("请先设置 OpenAI 的API密钥")])
+def test_extract_batch_propagates_request_and_configuration_errors(contexts, error):
+    manager = ScriptedManager([error, error])
+    with pytest.raises(type(error)):
+        manager.extract_batch(contexts)
+    assert len(manager.replies) == 1  # 没有重试
+
+
+def test_batches_fit_the_output_token_limit():
+    manager = ScriptedManager([batch_reply(*map(str, range(6))), batch_reply("6", "7")], model_name="gpt-3.5-turbo")
+    assert manager.batch_size() == 1024 // 160
+    results = manager.extract_batch({str(i): "text" for i in range(8)})
+    assert len(results) == 8
+    assert manager.max_tokens == [960, 320]
@@ -0,0 +1,123 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from utlies.rename_planner import RenamePlanner
+
+
+@pytest.fixture
+def papers(tmp_path):
+    directory = tmp_path / "papers"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def planner(tmp_path):
+    return RenamePlanner(undo_log_path=str(tmp_path / "rename_undo.jsonl"))
+
+
+def touch(directory, name):
+    path = os.path.join(str(directory), name)
+    with open(path, "wb") as f:
+        f.write(name.encode())
+    return path
+
+
+def rename_all(planner, items):
+    mapping = planner.plan(items)
+    assert all(error is None for error in planner.apply(mapping).values())
+    return mapping
+
+
+def test_plan_disambiguates_within_batch_and_directory(papers, planner):
+    touch(papers, "A.pdf")
+    x, y = touch(papers, "x.pdf"), touch(papers, "y.pdf")
+    mapping = planner.plan([(y, "A.pdf"), (x, "A.pdf")])
+    assert mapping == {x: os.path.join(str(papers), "A_2.pdf"), y: os.path.join(str(papers), "A_3.pdf")}
+
+
+def test_plan_is_idempotent(papers, planner):
+    x, y = touch(papers, "x.pdf"), touch(papers, "y.pdf")
+    rename_all(planner, [(x, "A.pdf"), (y, "A.pdf")])
+    names = sorted(os.listdir(papers))
+    assert names == ["A.pdf", "A_2.pdf"]
+
+    for _ in range(3):
+        paths = [os.path.join(str(papers), name) for name in names]
+        mapping = rename_all(planner, [(path, "A.pdf") for path in paths])
+        assert all(old == new for old, new in mapping.items())
+        assert sorted(os.listdir(papers)) == names
+
+
+def test_plan_reuses_name_freed_earlier_in_batch(papers, planner):
+    a, b = touch(papers, "a.pdf"), touch(papers, "b.pdf")
+    mapping = rename_all(planner, [(a, "c.pdf"), (b, "a.pdf")])
+    assert mapping[b] == a
+    assert sorted(os.listdir(papers)) == ["a.pdf", "c.pdf"]
+
+
+def write_batch_log(planner, batch, pid, ops):
+    root, ext = os.path.splitext(planner.undo_log_path)
+    with open(f"{root}.{batch}{ext}", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "owner", "host": socket.gethostname(), "pid": pid}) + "\n")
+        for old, new in ops:
+            f.write(json.dumps({"op": "plan", "old": old, "new": new}) + "\n")
+    return f"{root}.{batch}{ext}"
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_recover_rolls_back_batches_of_dead_processes_only(papers, planner):
+    a_new, b_new = touch(papers, "A.pdf"), touch(papers, "B.pdf")
+    a_old, b_old = os.path.join(str(papers), "a.pdf"), os.path.join(str(papers), "b.pdf")
+    dead_log = write_batch_log(planner, "dead", dead_pid(), [(a_old, a_new)])
+    live_log = write_batch_log(planner, "live", os.getppid(), [(b_old, b_new)])
+
+    assert planner.recover() == 1
+    assert sorted(os.listdir(papers)) == ["B.pdf", "a.pdf"]
+    assert not os.path.exists(dead_log)
+    # 仍在运行的进程的批次既不回滚也不删除日志
+    assert os.path.exists(live_log)
+
+
+def test_apply_leaves_no_log_and_keeps_other_processes_batches(papers, planner):
+    live_log = write_batch_log(planner, "live", os.getppid(), [])
+    x = touch(papers, "x.pdf")
+    rename_all(planner, [(x, "X.pdf")])
+    logs = sorted(os.listdir(os.path.dirname(planner.undo_log_path)))
+    assert logs == ["papers", os.path.basename(live_log)]
+
+
+
+def test_apply_reports_failures_per_file(papers, planner):
+    x, y = touch(papers, "x.pdf"), touch(papers, "y.pdf")
+    mapping = planner.plan([(x, "X.pdf"), (y, "Y.pdf")])
+    touch(papers, "Y.pdf")  # 计划生成后目标被其他程序占用
+    errors = planner.apply(mapping, atomic=False)
+    assert errors[x] is None and isinstance(errors[y], FileExistsError)
+    assert sorted(os.listdir(papers)) == ["X.pdf", "Y.pdf", "y.pdf"]
+
+
+def test_default_undo_log_lives_next_to_the_renamed_files(papers, tmp_path, monkeypatch):
+    planner = RenamePlanner()
+    a_new = touch(papers, "A.pdf")
+    a_old = os.path.join(str(papers), "a.pdf")
+    write_batch_log(RenamePlanner(undo_log_path=str(papers / "rename_undo.jsonl")), "dead", dead_pid(),
+                    [(a_old, a_new)])
+    # 从其他工作目录启动时仍能找到并回滚该目录中的未完成批次
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    x = touch(papers, "x.pdf")
+    rename_all(planner, [(x, "X.pdf")])
+    assert sorted(os.listdir(papers)) == ["X.pdf", "a.pdf"]
+    assert os.listdir(elsewhere) == []
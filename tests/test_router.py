@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from utlies.router import ProviderRouter
+
+
+class FakeManager:
+    """按提供商名返回预设的批量结果；delay 模拟慢请求"""
+
+    behaviours = {}
+
+    def __init__(self, provider, model_name):
+        self.provider = provider
+        self.calls = []
+
+    def extract_batch(self, contexts, max_retries=1):
+        self.calls.append(sorted(contexts))
+        known, delay = self.behaviours[self.provider]
+        time.sleep(delay)
+        return {doc_id: (f"{self.provider} {doc_id}", ["A"], None) for doc_id in contexts if doc_id in known}
+
+    def extract_info(self, context):
+        return self.extract_batch({"0": context})["0"]
+
+
+def make_router(behaviours, **kwargs):
+    FakeManager.behaviours = behaviours
+    routes = [{"provider": name, "model": "m"} for name in behaviours]
+    return ProviderRouter(routes, manager_factory=FakeManager, **kwargs)
+
+
+def test_partial_batch_fails_over_missing_documents():
+    router = make_router({"first": ({"0"}, 0), "second": ({"0", "1", "2"}, 0)})
+    results = router.extract_batch({"0": "a", "1": "b", "2": "c"})
+    assert {k: v[0] for k, v in results.items()} == {"0": "first 0", "1": "second 1", "2": "second 2"}
+    assert router.routes[1]["manager"].calls == [["1", "2"]]
+
+
+def test_empty_batch_counts_as_failure():
+    router = make_router({"first": (set(), 0), "second": ({"0", "1"}, 0)})
+    for _ in range(3):
+        assert sorted(router.extract_batch({"0": "a", "1": "b"})) == ["0", "1"]
+    first = router.routes[0]["stats"]
+    assert first.consecutive_failures == 3 and not first.healthy()
+
+
+def test_partial_results_returned_when_no_route_left():
+    router = make_router({"only": ({"0"}, 0)})
+    assert sorted(router.extract_batch({"0": "a", "1": "b"})) == ["0"]
+    with pytest.raises(ValueError):
+        router.extract_batch({"1": "b", "2": "c"})
+
+
+def test_abandoned_request_does_not_record_stats():
+    router = make_router({"slow": ({"0"}, 0.3), "fast": ({"0"}, 0)}, timeout=0.1)
+    assert router.extract_info("a")[0] == "fast 0"
+    time.sleep(0.4)  # 慢请求在后台结束
+    slow = router.routes[0]["stats"]
+    assert list(slow.outcomes) == [False] and not slow.latencies
@@ -0,0 +1,113 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from utlies.service import ExtractionService, make_server
+
+PDF = b"%PDF-1.4\n%test\n"
+
+
+class BlockingProcessor:
+    """extract 在 release 被设置前阻塞，用于让请求停留在队列中"""
+
+    result_cache = None
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+        self.model_manager = self
+        self.naming_manager = self
+
+    def check_ready(self):
+        pass
+
+    def generate_filename(self, name, title, authors, year):
+        return f"{title}.pdf"
+
+    def extract(self, paths):
+        self.calls.append(list(paths))
+        self.release.wait(10)
+        return [{"path": path, "status": "extracted", "title": "Paper", "authors": ["A"], "year": "2020"}
+                for path in paths]
+
+    def close(self):
+        pass
+
+
+class RecordingService(ExtractionService):
+    """记录每次提交是否被合并，测试据此等待请求到达"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = []
+
+    def submit(self, digest, path, temporary=False):
+        future, coalesced = super().submit(digest, path, temporary)
+        self.submitted.append(coalesced)
+        return future, coalesced
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    processor = BlockingProcessor()
+    service = RecordingService(processor, queue_size=1, batch_wait=0.01).start()
+    httpd = make_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield service, httpd.server_address[1]
+    service.processor.release.set()
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def post(port, body, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.putrequest("POST", "/extract")
+    if headers is None:
+        headers = {"Content-Length": str(len(body))}
+    for key, value in headers.items():
+        connection.putheader(key, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read() or b"{}"), response.getheader("Retry-After")
+
+
+def test_identical_uploads_coalesce_and_full_queue_returns_503(server):
+    service, port = server
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(post(port, PDF))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: len(service.submitted) == 3)
+    # 队列上限为 1：同一内容的请求合并，不同内容的请求立即被拒绝
+    status, body, retry_after = post(port, PDF + b"other")
+    assert (status, retry_after) == (503, "1")
+
+    processor = service.processor
+    processor.release.set()
+    for thread in threads:
+        thread.join()
+    assert [status for status, _, _ in results] == [200, 200, 200]
+    assert sorted(body["coalesced"] for _, body, _ in results) == [False, True, True]
+    assert sum(len(call) for call in processor.calls) == 1
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({}, 411),
+    ({"Content-Length": "abc"}, 400),
+    ({"Content-Length": "-5"}, 400),
+])
+def test_invalid_content_length_is_rejected(server, headers, status):
+    _, port = server
+    assert post(port, b"", headers)[0] == status
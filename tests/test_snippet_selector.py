@@ -0,0 +1,75 @@
+import pytest
+
+from utlies.snippet_selector import is_boilerplate, select_front_matter
+
+
+@pytest.mark.parametrize("line", [
+    "Learning Licence Plate Recognition from Synthetic Data",
+    "Copyright Protection for Deep Neural Networks via Watermarking",
+    "License-Aware Code Generation with Large Language Models",
+    "WWW-Scale Entity Linking",
+    "Alice Smith (alice@mit.edu), Bob Jones (bob@mit.edu)",
+    "Alice Smith alice@mit.edu",
+    "深度学习在车牌识别中的应用",
+])
+def test_titles_and_author_lines_survive(line):
+    assert not is_boilerplate(line)
+
+
+@pytest.mark.parametrize("line", [
+    "© 2021 Elsevier B.V. All rights reserved.",
+    "Copyright 2019 by the authors.",
+    "Copyright (c) 2020 IEEE",
+    "This article is licensed under a Creative Commons Attribution 4.0 International License.",
+    "Contents lists available at ScienceDirect",
+    "journal homepage: www.elsevier.com/locate/patrec",
+    "www.nature.com/scientificreports",
+    "ISSN 0031-3203",
+    "doi:10.1016/j.patrec.2020.01.001",
+    "Received 3 March 2020; accepted 5 May 2020",
+    "E-mail: alice@mit.edu",
+    "{alice,bob}@cs.mit.edu",
+    "alice@mit.edu, bob@mit.edu",
+    "收稿日期：2020-01-01",
+    "12",
+])
+def test_boilerplate_is_dropped(line):
+    assert is_boilerplate(line)
+
+
+def test_select_front_matter_keeps_title_and_stops_at_introduction():
+    text = "\n".join([
+        "Contents lists available at ScienceDirect",
+        "Copyright Protection for Deep Neural Networks",
+        "Alice Smith, Bob Jones",
+        "alice@mit.edu",
+        "Abstract",
+        "We study watermarking.",
+        "1. Introduction",
+        "Deep networks are valuable.",
+    ])
+    assert select_front_matter(text).splitlines() == [
+        "Copyright Protection for Deep Neural Networks", "Alice Smith, Bob Jones", "Abstract", "We study watermarking."]
+
+
+def test_select_front_matter_keeps_one_dated_line():
+    text = "\n".join([
+        "Contents lists available at ScienceDirect",
+        "Received 3 March 2020; accepted 5 May 2020",
+        "Robust Watermarking for Deep Neural Networks",
+        "Alice Smith, Bob Jones",
+        "© 2021 Elsevier B.V. All rights reserved.",
+        "Abstract",
+    ])
+    assert select_front_matter(text).splitlines() == [
+        "Received 3 March 2020; accepted 5 May 2020", "Robust Watermarking for Deep Neural Networks",
+        "Alice Smith, Bob Jones", "Abstract"]
+
+
+def test_year_on_benchmark_fixture_reaches_the_snippet():
+    import io
+    from benchmarks.fixtures import build_pdf_bytes
+    from utlies.pdf_to_text import open_pdf, extract_text
+
+    reader = open_pdf(io.BytesIO(build_pdf_bytes(year="2024")))
+    assert "2024" in select_front_matter(extract_text(reader, 1, 4000))
@@ -0,0 +1,33 @@
+import io
+
+from benchmarks.fixtures import build_pdf_bytes
+from utlies.pdf_to_text import open_pdf, extract_text
+from utlies.triage import PAPER, SCANNED, NON_PAPER, classify, triage
+
+
+def run_triage(**kwargs):
+    reader = open_pdf(io.BytesIO(build_pdf_bytes(**kwargs)))
+    return triage(reader, extract_text(reader, 1, 4000))
+
+
+def test_text_paper_and_scan():
+    assert run_triage()[0] == PAPER
+    label, features = run_triage(text_layer=False, image_kb=4)
+    assert label == SCANNED
+    assert features == {"text_ops": 0, "images": 1, "fonts": False}
+
+
+def test_classify_non_papers():
+    text_page = {"text_ops": 20, "images": 0, "fonts": True}
+    invoice = "ACME Corp\nInvoice number 2024-117\nBill to: Example Ltd\nSubtotal 120.00\nAmount due 144.00"
+    assert classify(text_page, invoice) == NON_PAPER
+    assert classify({"text_ops": 0, "images": 0, "fonts": False}, "") == NON_PAPER
+    # 乱码文本层（缺少编码映射的字体）不算可读文本
+    assert classify({"text_ops": 50, "images": 1, "fonts": True}, "�" * 100) == SCANNED
+
+
+def test_image_only_first_page_is_scanned_even_with_text_later():
+    # 扫描的首页没有文本操作符；后续页面的文本不影响判断
+    text = "Abstract. " + "We study sparse robust learning under corruption. " * 10
+    assert classify({"text_ops": 0, "images": 1, "fonts": False}, text) == SCANNED
+    assert classify({"text_ops": 40, "images": 1, "fonts": True}, text) == PAPER
@@ -0,0 +1,25 @@
+import os
+
+from utlies.watcher import WatchDaemon
+
+
+class RenamingProcessor:
+    """把每个文件记为已重命名为 Renamed <原文件名>，不读取文件"""
+
+    def extract(self, paths, progress_callback=None):
+        return [{"path": path, "status": "extracted", "new_path": None} for path in paths]
+
+    def commit(self, records, progress_callback=None):
+        for record in records:
+            directory, name = os.path.split(record["path"])
+            record.update(status="renamed", new_path=os.path.join(directory, "Renamed " + name))
+        return records
+
+
+def test_produced_files_are_ignored_and_bounded(tmp_path):
+    daemon = WatchDaemon(str(tmp_path), RenamingProcessor(), produced_max=3)
+    paths = [str(tmp_path / f"{i}.pdf") for i in range(5)]
+    daemon.process(paths)
+    assert len(daemon.produced) == 3
+    daemon.notice([str(tmp_path / "Renamed 4.pdf"), str(tmp_path / "new.pdf")])
+    assert list(daemon.pending) == [str(tmp_path / "new.pdf")]
@@ -0,0 +1,154 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from utlies.work_queue import WorkQueue, QueueRenamePlanner, LeaseKeeper
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def papers(tmp_path):
+    directory = tmp_path / "papers"
+    directory.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (directory / name).write_bytes(name.encode())
+    return directory
+
+
+def listing(directory):
+    return [os.path.join(str(directory), name) for name in sorted(os.listdir(directory))]
+
+
+def test_enqueue_ignores_known_paths(tmp_path, papers):
+    with WorkQueue(str(tmp_path / "queue.db")) as queue:
+        assert queue.enqueue(listing(papers)) == 3
+        assert queue.enqueue(listing(papers)) == 0
+        assert queue.pending() == listing(papers)
+        assert queue.counts() == {"pending": 3}
+
+
+def test_workers_claim_disjoint_files(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    with WorkQueue(db, worker_id="a") as a, WorkQueue(db, worker_id="b") as b:
+        a.enqueue(listing(papers))
+        first, second = a.claim(2), b.claim(2)
+        assert len(first) == 2 and len(second) == 1
+        assert not set(first) & set(second)
+        assert a.heartbeat(first + second) == set(first)
+
+
+def test_failed_files_are_retried_until_max_attempts(tmp_path, papers):
+    with WorkQueue(str(tmp_path / "queue.db"), max_attempts=2) as queue:
+        path = listing(papers)[0]
+        queue.enqueue([path])
+        for state in ("pending", "failed"):
+            assert queue.claim(1) == [path]
+            assert queue.complete({"path": path, "status": "failed", "error": "boom"})
+            assert queue.counts() == {state: 1}
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_cannot_complete(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    with WorkQueue(db, worker_id="a", lease_seconds=0) as a, WorkQueue(db, worker_id="b") as b:
+        path = listing(papers)[0]
+        a.enqueue([path])
+        assert a.claim(1) == [path]
+        time.sleep(0.01)
+        assert b.claim(1) == [path]
+        assert not a.complete({"path": path, "status": "extracted"})
+        assert b.complete({"path": path, "status": "extracted"})
+        assert b.counts() == {"extracted": 1}
+
+
+def test_worker_killed_between_rename_and_complete(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    with WorkQueue(db) as queue:
+        queue.enqueue(listing(papers))
+    crash = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {ROOT!r})
+        from utlies.work_queue import WorkQueue, QueueRenamePlanner
+        queue = WorkQueue({db!r}, worker_id="crashed", lease_seconds=0.2)
+        paths = queue.claim(10)
+        planner = QueueRenamePlanner(queue)
+        errors = planner.apply(planner.plan((path, "Paper " + os.path.basename(path)) for path in paths))
+        assert not any(errors.values())
+        os._exit(1)
+    """)
+    assert subprocess.run([sys.executable, "-c", crash]).returncode == 1
+    assert os.listdir(papers) and all(name.startswith("Paper ") for name in os.listdir(papers))
+
+    time.sleep(0.3)
+    with WorkQueue(db, worker_id="survivor") as queue:
+        assert queue.claim(10) == []
+        assert queue.counts() == {"renamed": 3}
+        # 重新扫描目录时不会把重命名产生的文件当作新文件登记
+        assert queue.enqueue(listing(papers)) == 0
+
+
+def test_rename_interrupted_after_hard_link(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    path = listing(papers)[0]
+    new_path = os.path.join(str(papers), "Paper a.pdf")
+    with WorkQueue(db, worker_id="crashed", lease_seconds=0) as queue:
+        queue.enqueue([path])
+        queue.claim(1)
+        assert queue.record_plan({path: new_path}) == {path}
+        os.link(path, new_path)  # move_no_clobber 在删除原路径之前中断
+    time.sleep(0.01)
+    with WorkQueue(db, worker_id="survivor") as queue:
+        assert queue.claim(1) == []
+        assert queue.counts() == {"renamed": 1}
+    assert not os.path.exists(path) and os.path.exists(new_path)
+
+
+def test_interrupted_before_rename_is_processed_again(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    path = listing(papers)[0]
+    with WorkQueue(db, worker_id="crashed", lease_seconds=0) as queue:
+        queue.enqueue([path])
+        queue.claim(1)
+        queue.record_plan({path: os.path.join(str(papers), "Paper a.pdf")})
+    time.sleep(0.01)
+    with WorkQueue(db, worker_id="survivor") as queue:
+        assert queue.claim(1) == [path]
+        planner = QueueRenamePlanner(queue)
+        mapping = planner.plan([(path, "Paper a.pdf")])
+        assert planner.apply(mapping) == {path: None}
+        assert queue.complete({"path": path, "status": "renamed", "new_path": mapping[path]})
+        assert queue.counts() == {"renamed": 1}
+
+
+def test_lease_keeper_gives_up_when_renewal_keeps_failing(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    with WorkQueue(db, worker_id="a", lease_seconds=0.3) as a, WorkQueue(db, worker_id="b") as b:
+        a.enqueue(listing(papers))
+        paths = a.claim(2)
+
+        def unavailable(paths):
+            raise OSError("database is locked")
+
+        a.heartbeat = unavailable
+        with LeaseKeeper(a, paths) as keeper:
+            time.sleep(0.5)
+        assert keeper.held == set()
+        # 交还后立即重新排队，且不计为一次中断
+        a.release(paths)
+        assert sorted(b.claim(3)) == listing(papers)
+        assert b._conn.execute("SELECT MAX(attempts) FROM items").fetchone()[0] == 1
+
+
+def test_lease_keeper_drops_files_taken_by_another_worker(tmp_path, papers):
+    db = str(tmp_path / "queue.db")
+    with WorkQueue(db, worker_id="a", lease_seconds=0.15) as a, WorkQueue(db, worker_id="b") as b:
+        a.enqueue(listing(papers))
+        paths = a.claim(3)
+        b._conn.execute("UPDATE items SET worker = 'b' WHERE path = ?", (paths[0],))
+        with LeaseKeeper(a, paths) as keeper:
+            time.sleep(0.1)
+        assert keeper.held == set(paths[1:])
@@ -0,0 +1,236 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .config import (MODEL_CONFIGS, DEFAULT_RATE_LIMITS,
+                     LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX)
+from .metrics import get_metrics
+from .model_manager import ModelManager
+
+
+class TokenBucket:
+    """令牌桶限流器：按每分钟速率补充令牌，容量为一分钟的额度"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """取出 amount 个令牌，不足时等待；超过容量的请求按容量计"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def drain(self, remaining: Optional[float]):
+        """服务端报告的剩余额度少于本地估计时，以服务端为准"""
+        if remaining is not None:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class AdaptiveConcurrency:
+    """
+    自适应并发上限（AIMD）：
+    请求成功且服务端剩余额度充足时逐步加一，遇到 429 时减半
+    """
+
+    def __init__(self, initial: int, maximum: int):
+        self.limit = max(1, initial)
+        self.maximum = max(self.limit, maximum)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def on_success(self, remaining_requests: Optional[float]):
+        async with self._condition:
+            if remaining_requests is None or remaining_requests > self.limit * 2:
+                self.limit = min(self.maximum, self.limit + 1)
+                self._condition.notify_all()
+
+    async def on_throttled(self):
+        async with self._condition:
+            self.limit = max(1, self.limit // 2)
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ProviderClient:
+    """
+    单个提供商的异步客户端：共享 HTTP 连接池、RPM/TPM 令牌桶、自适应并发，
+    以及 429/5xx 的指数退避重试（带随机抖动）
+    """
+
+    def __init__(self, provider: str, api_key: str):
+        import httpx
+        from openai import AsyncOpenAI
+
+        self.provider = provider
+        config = MODEL_CONFIGS[provider]
+        limits = dict(DEFAULT_RATE_LIMITS, **config.get("rate_limits", {}))
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=limits["max_concurrency"],
+                                max_keepalive_connections=limits["max_concurrency"]),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        # 由本层负责重试，关闭 SDK 自带的重试
+        self.client = AsyncOpenAI(api_key=api_key, base_url=config["base_url"],
+                                  http_client=self.http_client, max_retries=0)
+        self.request_bucket = TokenBucket(limits["rpm"])
+        self.token_bucket = TokenBucket(limits["tpm"])
+        self.concurrency = AdaptiveConcurrency(limits["initial_concurrency"], limits["max_concurrency"])
+
+    async def complete(self, estimated_tokens: int, **kwargs):
+        """发送一次对话请求，返回 (响应对象, 响应头)"""
+        import openai
+
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated_tokens)
+            delay = None
+            async with self.concurrency:
+                try:
+                    raw = await self.client.chat.completions.with_raw_response.create(**kwargs)
+                except (openai.RateLimitError, openai.InternalServerError,
+                        openai.APIConnectionError, openai.APITimeoutError) as e:
+                    if attempt >= LLM_MAX_RETRIES:
+                        raise
+                    response = getattr(e, "response", None)
+                    headers = response.headers if response is not None else None
+                    get_metrics().incr("llm_retries")
+                    if isinstance(e, openai.RateLimitError):
+                        get_metrics().incr("llm_rate_limited")
+                        await self.concurrency.on_throttled()
+                    retry_after = _header_number(headers, "retry-after")
+                    delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt))
+                    delay = max(retry_after or 0.0, random.uniform(0, delay))
+            if delay is not None:
+                # 退避等待期间不占用并发名额
+                await asyncio.sleep(delay)
+                continue
+            headers = raw.headers
+            self.request_bucket.drain(_header_number(headers, "x-ratelimit-remaining-requests"))
+            self.token_bucket.drain(_header_number(headers, "x-ratelimit-remaining-tokens"))
+            await self.concurrency.on_success(_header_number(headers, "x-ratelimit-remaining-requests"))
+            return raw.parse(), headers
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class _EventLoopThread:
+    """在后台线程中运行的常驻事件循环，使异步客户端可在多个批次间复用连接"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-event-loop", daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+_loop_thread: Optional[_EventLoopThread] = None
+_provider_clients: Dict[Tuple[str, str], ProviderClient] = {}
+_registry_lock = threading.Lock()
+
+
+def get_event_loop_thread() -> _EventLoopThread:
+    global _loop_thread
+    with _registry_lock:
+        if _loop_thread is None:
+            _loop_thread = _EventLoopThread()
+        return _loop_thread
+
+
+def get_provider_client(provider: str, api_key: str) -> ProviderClient:
+    """按 (提供商, 密钥) 复用同一个客户端及其连接池"""
+    key = (provider, api_key)
+    with _registry_lock:
+        client = _provider_clients.get(key)
+        if client is None:
+            client = _provider_clients[key] = ProviderClient(provider, api_key)
+        return client
+
+
+class AsyncModelManager(ModelManager):
+    """
+    使用异步客户端层的模型管理器，接口与 ModelManager 相同：
+    同步调用会提交到常驻事件循环执行，也可以在协程中直接调用 acreate_completion
+    所有提供商均通过 OpenAI 兼容接口访问
+    """
+
+    def _initialize_client(self):
+        api_key = self.api_key_manager.get_key(self.provider)
+        if not api_key:
+            raise ValueError(f"请先设置 {self.config['name']} 的API密钥")
+        if self.provider not in MODEL_CONFIGS:
+            raise ValueError(f"不支持的模型提供商: {self.provider}")
+        try:
+            return get_provider_client(self.provider, api_key)
+        except ImportError:
+            raise ImportError("请安装 openai 包以使用异步客户端")
+
+    async def acreate_completion(self, messages: list, max_tokens: int,
+                                 response_format: Optional[dict] = None) -> str:
+        """异步发送一次对话请求，返回模型回复内容"""
+        provider_client = self._get_client()
+        model_config = self.config["models"][self.model_name]
+        kwargs = {}
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        if self.provider == "zhipu":
+            kwargs["extra_body"] = {"thinking": {"type": "disabled"}}
+        estimated = sum(self.estimate_tokens(m["content"]) for m in messages) + max_tokens
+        metrics = get_metrics()
+        with metrics.stage("llm_request"):
+            response, _ = await provider_client.complete(
+                estimated,
+                model=self.model_name,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=model_config["temperature"],
+                **kwargs
+            )
+        metrics.record_usage(getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    def max_concurrency(self) -> Optional[int]:
+        """自适应并发（AIMD）能增长到的上限"""
+        return dict(DEFAULT_RATE_LIMITS, **self.config.get("rate_limits", {}))["max_concurrency"]
+
+    def _create_completion(self, messages: list, max_tokens: int,
+                           response_format: Optional[dict] = None) -> str:
+        # 先在调用线程中初始化客户端，再提交到事件循环
+        self._get_client()
+        return get_event_loop_thread().run(self.acreate_completion(messages, max_tokens, response_format))
@@ -0,0 +1,404 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .config import (FRONT_MATTER_MAX_PAGES, FRONT_MATTER_MAX_CHARS, FRONT_MATTER_TOKEN_BUDGET,
+                     PARSE_WORKERS, LLM_MAX_IN_FLIGHT, LOCAL_EXTRACTOR_ENABLED, DEDUP_ENABLED, TRIAGE_ENABLED)
+from .dedup import DuplicateIndex, minhash_signature
+from .local_extractor import LocalExtractor
+from .metrics import get_metrics
+from .metadata_resolver import MetadataResolver
+from .pdf_to_text import open_pdf, close_pdf, extract_text
+from .rename_planner import RenamePlanner
+from .result_cache import ResultCache, file_sha256
+from .snippet_selector import select_front_matter
+from .triage import PAPER, TriageSkip, triage
+
+logger = logging.getLogger(__name__)
+
+
+def parse_pdf(pdf_path: str,
+              max_pages: int = FRONT_MATTER_MAX_PAGES,
+              max_chars: int = FRONT_MATTER_MAX_CHARS,
+              use_local_extractor: bool = LOCAL_EXTRACTOR_ENABLED,
+              token_budget: int = FRONT_MATTER_TOKEN_BUDGET,
+              fingerprint: bool = False,
+              run_triage: bool = TRIAGE_ENABLED) -> dict:
+    """
+    解析单个PDF（在子进程中运行）：提取前置文本，尝试本地元数据与本地版面解析，并查找 DOI/arXiv 编号；
+    发送给大模型的片段按 token_budget 精选（去掉页眉、版权等无关行）
+    版面解析的推测结果只在没有 DOI/arXiv 编号时直接采用；有编号时记在 "guess" 中，编号查询失败后才使用
+    fingerprint 为 True 时同时计算前置文本的 MinHash 签名，用于查找重复论文
+    run_triage 为 True 时，本地无法得到结果且没有 DOI/arXiv 编号的文件根据首页结构分拣（见 triage），
+    结果记在 "triage" 中
+    返回可序列化的字典（含各阶段耗时），便于跨进程传递
+    """
+    start = time.perf_counter()
+    reader = open_pdf(pdf_path)
+    try:
+        opened = time.perf_counter()
+        guess = None
+        if use_local_extractor and len(reader.pages) > 0:
+            # 首页只解析一次：同时得到带字号的文本行和纯文本
+            extractor = LocalExtractor()
+            lines, page_text = extractor.collect_lines(reader.pages[0])
+            text = page_text + "\n"
+            if len(text) < max_chars:
+                text += extract_text(reader, max_pages=max_pages, max_chars=max_chars - len(text),
+                                     start_page=1)
+            text = text[:max_chars]
+            title, authors, year, confidence = extractor.extract_lines(lines)
+            if extractor.is_confident(confidence):
+                guess = (title, authors, year, "local")
+        else:
+            text = extract_text(reader, max_pages=max_pages, max_chars=max_chars)
+
+        extracted = time.perf_counter()
+
+        resolver = MetadataResolver(remote_lookup=False)
+        local = resolver.resolve_local(reader, text)
+        doi, arxiv_id = (None, None) if local else resolver.find_identifiers(reader, text)
+        if local is None and not (doi or arxiv_id):
+            # 版面推测的可靠性低于 DOI/arXiv 查询：有编号时先查询，查询失败才使用推测结果（见 _resolve_remote）
+            local, guess = guess, None
+        resolved = time.perf_counter()
+        label = None
+        if run_triage and local is None and not (doi or arxiv_id):
+            label, _ = triage(reader, text)
+    finally:
+        close_pdf(reader)
+    snippet = select_front_matter(text, token_budget) if local is None and label in (None, PAPER) else ""
+    timings = {"pdf_open": opened - start, "text_extraction": extracted - opened,
+               "metadata": resolved - extracted}
+    parsed = {"text": snippet, "local": local, "doi": doi, "arxiv_id": arxiv_id, "timings": timings}
+    if guess is not None and local is None:
+        parsed["guess"] = guess
+    if label is not None:
+        parsed["triage"] = label
+        timings["triage"] = time.perf_counter() - resolved
+    if fingerprint:
+        fingerprinted = time.perf_counter()
+        parsed["signature"] = minhash_signature(text)
+        timings["fingerprint"] = time.perf_counter() - fingerprinted
+    return parsed
+
+
+class BatchProcessor:
+    """
+    流水线式批处理：
+    1. 查询结果缓存（命中则跳过后续步骤）
+    2. 在进程池中解析PDF（pypdf 为纯 Python 实现，受 GIL 限制；超时、内存超限或崩溃的文件单独记为失败），
+       元数据或本地版面解析置信度足够时不再调用大模型
+    3. 在线程池中并发请求大模型：异步客户端由其自适应并发控制在途请求数，线程池按其并发上限创建，
+       否则同时在途请求数受 max_in_flight 限制；
+       batched_prompts 为 True 时，多篇文档打包进一次请求（每组大小见 MODEL_CONFIGS 的 batch_size）
+    重复检测开启时，字节相同或前置文本近似相同的文件只处理其中一个（代表），其余沿用代表的结果（tier 为 "dedup"）
+    分拣开启时，扫描件和非论文文件不调用大模型，状态记为 skipped（"triage" 中为分拣类别）
+    4. 所有结果就绪后，在单一提交阶段按重命名计划统一重命名（见 RenamePlanner）
+    每个文件的结果和错误单独记录，不会中断整个批次
+    """
+
+    def __init__(self, model_manager, naming_manager,
+                 result_cache: Optional[ResultCache] = None,
+                 resolver: Optional[MetadataResolver] = None,
+                 parse_workers: Optional[int] = PARSE_WORKERS,
+                 max_in_flight: int = LLM_MAX_IN_FLIGHT,
+                 batched_prompts: bool = False,
+                 use_local_extractor: bool = LOCAL_EXTRACTOR_ENABLED,
+                 rename_planner: Optional[RenamePlanner] = None,
+                 dedup: bool = DEDUP_ENABLED,
+                 run_triage: bool = TRIAGE_ENABLED):
+        self.model_manager = model_manager
+        self.naming_manager = naming_manager
+        self.result_cache = result_cache
+        self.resolver = resolver or MetadataResolver()
+        self.parse_workers = parse_workers
+        self._parse_pool = None
+        self.max_in_flight = max_in_flight
+        self.batched_prompts = batched_prompts
+        self.use_local_extractor = use_local_extractor
+        self.rename_planner = rename_planner or RenamePlanner()
+        self.run_triage = run_triage
+        # 重复检测状态在多次 extract 调用之间保留，命令行分块处理时也能跨块识别重复文件
+        self.duplicate_index = DuplicateIndex() if dedup else None
+        self._dedup_outcomes: Dict[str, object] = {}  # 代表路径 -> 结果元组或异常
+        self._followers: Dict[str, List[dict]] = {}   # 代表路径 -> 等待其结果的重复文件记录
+
+    def _get_parse_pool(self):
+        """解析进程池按需创建，在多次 extract 调用之间复用，由 close 关闭"""
+        if self._parse_pool is None:
+            from .parse_pool import ParsePool
+            self._parse_pool = ParsePool(max_workers=self.parse_workers)
+        return self._parse_pool
+
+    def close(self):
+        """关闭解析进程池"""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=True, cancel_futures=True)
+            self._parse_pool = None
+
+    def _llm_workers(self) -> int:
+        """
+        大模型线程池大小：每个线程同步等待一个请求，线程数即在途请求数的上限，
+        因此不能小于客户端自适应并发的上限，否则并发数无法增长到该上限
+        """
+        return max(self.max_in_flight, self.model_manager.max_concurrency() or 0)
+
+    def _cache_key(self, pdf_path: str, digest: Optional[str] = None) -> str:
+        return ResultCache.make_key(digest or file_sha256(pdf_path),
+                                    self.model_manager.provider,
+                                    self.model_manager.model_name)
+
+    def _resolve_remote(self, parsed_list: List[dict]) -> list:
+        """
+        DOI/arXiv 查询失败后调用大模型（在线程池中运行）
+        启用批量提示词时，同组文档打包进一次请求
+        返回与输入对应的结果元组或异常
+        """
+        outcomes = [None] * len(parsed_list)
+        to_llm = {}
+        for i, parsed in enumerate(parsed_list):
+            if self.resolver.remote_lookup:
+                try:
+                    outcomes[i] = self.resolver.resolve_identifiers(parsed["doi"], parsed["arxiv_id"])
+                except Exception:
+                    pass
+            if outcomes[i] is None and parsed.get("guess"):
+                outcomes[i] = tuple(parsed["guess"])
+            if outcomes[i] is None:
+                to_llm[str(i)] = parsed["text"]
+
+        if self.batched_prompts and len(to_llm) > 1:
+            results = self.model_manager.extract_batch(to_llm)
+            for doc_id in to_llm:
+                if doc_id in results:
+                    outcomes[int(doc_id)] = results[doc_id] + (MetadataResolver.TIER_LLM,)
+                else:
+                    outcomes[int(doc_id)] = ValueError("批量提取未返回有效结果")
+        else:
+            for doc_id, text in to_llm.items():
+                try:
+                    title, authors, year = self.model_manager.extract_info(text)
+                    outcomes[int(doc_id)] = (title, authors, year, MetadataResolver.TIER_LLM)
+                except Exception as e:
+                    outcomes[int(doc_id)] = e
+        return outcomes
+
+    def extract(self, pdf_paths: Iterable[str],
+                progress_callback: Optional[Callable[[dict], None]] = None,
+                cancel_event: Optional[threading.Event] = None) -> List[dict]:
+        """
+        提取阶段：返回每个文件的记录（尚未重命名）
+        progress_callback 在每个文件提取完成（成功或失败）时调用；
+        cancel_event 被设置后不再提交新任务，未完成的文件标记为 cancelled
+        """
+        notify = progress_callback or (lambda record: None)
+        cancelled = lambda: cancel_event is not None and cancel_event.is_set()
+        records: Dict[str, dict] = {}
+        pending = []
+        for pdf_path in pdf_paths:
+            record = {"path": pdf_path, "status": "pending", "new_path": None,
+                      "title": None, "authors": None, "year": None, "tier": None, "error": None}
+            records[pdf_path] = record
+            if cancelled():
+                continue
+            try:
+                digest = None
+                if self.duplicate_index is not None:
+                    digest = file_sha256(pdf_path)
+                    representative = self.duplicate_index.match_bytes(pdf_path, digest)
+                    if representative is not None:
+                        self._follow(record, representative, notify)
+                        continue
+                if self.result_cache is not None:
+                    record["cache_key"] = self._cache_key(pdf_path, digest)
+                    cached = self.result_cache.get(record["cache_key"])
+                    get_metrics().incr("cache_hits" if cached is not None else "cache_misses")
+                    if cached is not None:
+                        self._finish(record, cached + ("cache",), notify)
+                        continue
+                pending.append(pdf_path)
+            except Exception as e:
+                self._finish(record, e, notify)
+
+        if pending and not cancelled():
+            # 提前初始化客户端，API密钥缺失时在批处理开始前报错
+            self.model_manager.check_ready()
+            parse_pool = self._get_parse_pool()
+            llm_pool = ThreadPoolExecutor(max_workers=self._llm_workers())
+            try:
+                token_budget = self.model_manager.prompt_token_budget()
+                fingerprint = self.duplicate_index is not None
+                parse_futures = {parse_pool.submit(parse_pdf, p, FRONT_MATTER_MAX_PAGES, FRONT_MATTER_MAX_CHARS,
+                                                   self.use_local_extractor, token_budget, fingerprint,
+                                                   self.run_triage): p
+                                 for p in pending}
+                llm_futures = {}
+                group_size = self.model_manager.batch_size() if self.batched_prompts else 1
+                group = []
+                for future in as_completed(parse_futures):
+                    if cancelled():
+                        break
+                    record = records[parse_futures[future]]
+                    try:
+                        parsed = future.result()
+                    except Exception as e:
+                        self._finish(record, e, notify)
+                        continue
+                    for stage, seconds in parsed["timings"].items():
+                        get_metrics().record(stage, seconds, record["path"])
+                    logger.debug("前置文本 %s: %s", record["path"], parsed["text"])
+                    if parsed["local"] is not None:
+                        if fingerprint:
+                            self.duplicate_index.add(record["path"], parsed["signature"])
+                        self._finish(record, parsed["local"], notify)
+                        continue
+                    label = parsed.get("triage")
+                    if label is not None:
+                        record["triage"] = label
+                        get_metrics().incr(f"triage_{label}")
+                        if label != PAPER:
+                            self._finish(record, TriageSkip(label), notify)
+                            continue
+                    representative = None
+                    if fingerprint:
+                        representative = self.duplicate_index.match_text(record["path"], parsed["signature"])
+                    if representative is not None:
+                        self._follow(record, representative, notify)
+                    else:
+                        group.append((record, parsed))
+                        if len(group) >= group_size:
+                            llm_futures[llm_pool.submit(self._resolve_remote, [p for _, p in group])] = group
+                            group = []
+                if group and not cancelled():
+                    llm_futures[llm_pool.submit(self._resolve_remote, [p for _, p in group])] = group
+                for future in as_completed(llm_futures):
+                    if cancelled():
+                        break
+                    group_records = [record for record, _ in llm_futures[future]]
+                    try:
+                        outcomes = future.result()
+                    except Exception as e:
+                        outcomes = [e] * len(group_records)
+                    for record, outcome in zip(group_records, outcomes):
+                        self._finish(record, outcome, notify)
+            finally:
+                # 正常结束时没有未完成的解析任务；取消或出错时结束正在解析的进程
+                parse_pool.cancel_pending()
+                llm_pool.shutdown(wait=True, cancel_futures=True)
+
+        for record in records.values():
+            if record["status"] == "pending":
+                record["status"] = "cancelled"
+        return list(records.values())
+
+    def _finish(self, record: dict, outcome, notify: Callable[[dict], None]):
+        """记录单个文件的结果（结果元组或异常），并传给等待该文件结果的重复文件"""
+        if isinstance(outcome, TriageSkip):
+            self._set_skipped(record, outcome)
+        elif isinstance(outcome, Exception):
+            self._set_error(record, outcome)
+        else:
+            self._set_result(record, outcome)
+        notify(record)
+        if self.duplicate_index is None or record.get("duplicate_of"):
+            return
+        path = record["path"]
+        if record["status"] == "extracted":
+            self._dedup_outcomes[path] = (record["title"], record["authors"], record["year"], "dedup")
+        elif record["status"] == "skipped":
+            self._dedup_outcomes[path] = outcome
+        else:
+            self._dedup_outcomes[path] = ValueError(f"重复文件的代表文件提取失败: {record['error']}")
+        for follower in self._followers.pop(path, []):
+            self._finish(follower, self._dedup_outcomes[path], notify)
+
+    def _follow(self, record: dict, representative: str, notify: Callable[[dict], None]):
+        """重复文件沿用代表文件的结果；代表尚未完成时登记等待"""
+        record["duplicate_of"] = representative
+        get_metrics().incr("dedup_hits")
+        outcome = self._dedup_outcomes.get(representative)
+        if outcome is not None:
+            self._finish(record, outcome, notify)
+        else:
+            self._followers.setdefault(representative, []).append(record)
+
+    def _set_result(self, record: dict, result: tuple):
+        title, authors, year, tier = result
+        record.update(title=title, authors=authors, year=year, tier=tier)
+        get_metrics().incr(f"resolved_{tier}")
+        if not authors:
+            self._set_error(record, ValueError("未能提取作者信息"))
+            return
+        record["status"] = "extracted"
+        if self.result_cache is not None and tier != "cache" and record.get("cache_key"):
+            self.result_cache.put(record["cache_key"], title, authors, year)
+
+    @staticmethod
+    def _set_skipped(record: dict, skip: TriageSkip):
+        record["status"] = "skipped"
+        record["triage"] = skip.label
+        record["error"] = str(skip)
+        logger.info("跳过 %s: %s", record["path"], record["error"])
+
+    @staticmethod
+    def _set_error(record: dict, error: Exception):
+        record["status"] = "failed"
+        record["error"] = str(error) or error.__class__.__name__
+        get_metrics().incr("failures")
+        logger.warning("处理失败 %s: %s", record["path"], record["error"])
+
+    def commit(self, records: List[dict],
+               progress_callback: Optional[Callable[[dict], None]] = None,
+               cancel_event: Optional[threading.Event] = None) -> List[dict]:
+        """
+        提交阶段：先为整批已提取成功的文件生成重命名计划（处理重名），再一次性执行
+        每个文件单独报告成败（一个文件重命名失败不影响同批次的其他文件），失败的文件重新运行即可重试
+        取消后不再重命名（提取结果已写入缓存，重新运行时代价很小）
+        """
+        items = []
+        for record in records:
+            if record["status"] != "extracted":
+                continue
+            if cancel_event is not None and cancel_event.is_set():
+                record["status"] = "cancelled"
+                continue
+            try:
+                new_name = self.naming_manager.generate_filename(
+                    record["path"], record["title"], record["authors"], record["year"]
+                )
+                items.append((record, new_name))
+            except Exception as e:
+                self._set_error(record, e)
+                if progress_callback is not None:
+                    progress_callback(record)
+
+        if items:
+            with get_metrics().stage("rename"):
+                try:
+                    mapping = self.rename_planner.plan((r["path"], name) for r, name in items)
+                    errors = self.rename_planner.apply(mapping, atomic=False)
+                except Exception as e:
+                    mapping, errors = {}, {r["path"]: e for r, _ in items}
+            for record, _ in items:
+                error = errors.get(record["path"])
+                if error is not None:
+                    self._set_error(record, error)
+                else:
+                    record["new_path"] = mapping[record["path"]]
+                    record["status"] = "renamed"
+                    logger.info("%s -> %s (%s)", record["path"],
+                                os.path.basename(record["new_path"]), record["tier"])
+                if progress_callback is not None:
+                    progress_callback(record)
+        return records
+
+    def run(self, pdf_paths: Iterable[str],
+            progress_callback: Optional[Callable[[dict], None]] = None,
+            cancel_event: Optional[threading.Event] = None) -> List[dict]:
+        """完整处理一批文件，返回每个文件的处理记录"""
+        records = self.extract(pdf_paths, progress_callback, cancel_event)
+        return self.commit(records, progress_callback, cancel_event)
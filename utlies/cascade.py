@@ -0,0 +1,160 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import CASCADE_MODELS, CASCADE_MIN_TITLE_OVERLAP, CASCADE_MIN_YEAR
+from .metrics import get_metrics
+
+# 英文按单词、中文按单字切分
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]')
+
+CHECKS = ("well_formed", "authors", "year", "title_overlap")
+
+
+def title_overlap(title: str, context: str) -> float:
+    """标题中的词出现在原文中的比例（模型编造或改写标题时比例很低）"""
+    words = _TOKEN_PATTERN.findall(title.lower())
+    if not words:
+        return 0.0
+    source = set(_TOKEN_PATTERN.findall(context.lower()))
+    return sum(1 for word in words if word in source) / len(words)
+
+
+def score_result(result: Optional[tuple], context: str) -> Tuple[float, List[str]]:
+    """
+    校验一次提取结果，返回 (得分, 未通过的检查项)，得分为通过的检查项比例（格式错误时为 0）：
+    - well_formed: 回复能解析为 JSON，标题为非空字符串、作者为字符串列表
+    - authors: 作者非空
+    - year: 年份缺失，或是 CASCADE_MIN_YEAR 到明年之间的四位数字
+    - title_overlap: 标题与原文的词重合比例不低于 CASCADE_MIN_TITLE_OVERLAP
+    result 为 None 表示请求失败或回复无法解析
+    """
+    if result is None:
+        return 0.0, ["well_formed"]
+    title, authors, year = result
+    failed = []
+    if not isinstance(title, str) or not title.strip() or not isinstance(authors, list) \
+            or not all(isinstance(a, str) for a in authors):
+        return 0.0, ["well_formed"]
+    if not [a for a in authors if a.strip()]:
+        failed.append("authors")
+    if year is not None:
+        year = str(year).strip()
+        if not (year.isdigit() and CASCADE_MIN_YEAR <= int(year) <= time.localtime().tm_year + 1):
+            failed.append("year")
+    if title_overlap(title, context) < CASCADE_MIN_TITLE_OVERLAP:
+        failed.append("title_overlap")
+    return (len(CHECKS) - len(failed)) / len(CHECKS), failed
+
+
+class ModelCascade:
+    """
+    模型级联：每个文件先交给最快、最便宜的模型，结果未通过校验（见 score_result）时才交给下一个更强的模型
+    最后一级仍未通过时，取各级中得分最高的结果（同分取较强模型的结果）
+    对外接口与 ModelManager 相同（extract_info / extract_batch），可直接交给 BatchProcessor 使用
+
+    tiers: [{"provider": "zhipu", "model": "glm-4.5-flash"}, {"provider": "zhipu", "model": "glm-4"}]
+    """
+
+    def __init__(self, tiers: List[dict], manager_factory: Optional[Callable] = None):
+        if not tiers:
+            raise ValueError("至少需要配置一个模型")
+        if manager_factory is None:
+            from .async_client import AsyncModelManager
+            manager_factory = AsyncModelManager
+        self.tiers = []
+        for tier in tiers:
+            tier = dict(tier)
+            tier["manager"] = manager_factory(provider=tier["provider"], model_name=tier["model"])
+            tier.update(files=0, accepted=0, escalated=0, failed_checks={})
+            self.tiers.append(tier)
+        self.provider = "cascade"
+        self.model_name = ">".join(f"{t['provider']}/{t['model']}" for t in self.tiers)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_provider(cls, provider: str, manager_factory: Optional[Callable] = None) -> "ModelCascade":
+        """使用 CASCADE_MODELS 中为该提供商配置的模型顺序"""
+        models = CASCADE_MODELS.get(provider)
+        if not models:
+            raise ValueError(f"提供商 {provider} 没有配置级联模型")
+        return cls([{"provider": provider, "model": model} for model in models], manager_factory)
+
+    # ---------- 与 ModelManager 兼容的接口 ----------
+
+    def check_ready(self):
+        for tier in self.tiers:
+            tier["manager"].check_ready()
+
+    def batch_size(self) -> int:
+        return min(tier["manager"].batch_size() for tier in self.tiers)
+
+    def prompt_token_budget(self) -> int:
+        return min(tier["manager"].prompt_token_budget() for tier in self.tiers)
+
+    def max_concurrency(self) -> Optional[int]:
+        limits = [tier["manager"].max_concurrency() for tier in self.tiers]
+        return max((limit for limit in limits if limit), default=None)
+
+    def extract_info(self, context: str) -> Tuple[str, list, Optional[str]]:
+        results = self._run({"0": context})
+        if "0" not in results:
+            raise ValueError("所有级联模型均未返回有效结果")
+        return results["0"]
+
+    def extract_batch(self, contexts: Dict[str, str], max_retries: int = 1) -> dict:
+        return self._run(contexts, max_retries)
+
+    # ---------- 级联 ----------
+
+    def _run(self, contexts: Dict[str, str], max_retries: Optional[int] = None) -> dict:
+        """逐级提取：每一级只处理上一级未通过校验的文档"""
+        best: Dict[str, tuple] = {}  # 文档编号 -> (得分, 结果)
+        remaining = dict(contexts)
+        for level, tier in enumerate(self.tiers):
+            if not remaining:
+                break
+            manager = tier["manager"]
+            # 回复无法解析（ValueError）视为未通过校验，交给下一级；认证、网络等请求错误直接抛出
+            if max_retries is None:
+                try:
+                    results = {"0": manager.extract_info(remaining["0"])}
+                except ValueError:
+                    results = {}
+            else:
+                try:
+                    results = manager.extract_batch(remaining, max_retries)
+                except ValueError:
+                    results = {}
+            last = level == len(self.tiers) - 1
+            escalate = {}
+            for doc_id, context in remaining.items():
+                result = results.get(doc_id)
+                score, failed = score_result(result, context)
+                if result is not None and score >= best.get(doc_id, (-1.0,))[0]:
+                    best[doc_id] = (score, result)
+                self._count(tier, failed, last)
+                if failed and not last:
+                    escalate[doc_id] = context
+            remaining = escalate
+        return {doc_id: result for doc_id, (_, result) in best.items()}
+
+    def _count(self, tier: dict, failed: List[str], last: bool):
+        with self._lock:
+            tier["files"] += 1
+            if not failed:
+                tier["accepted"] += 1
+            elif not last:
+                tier["escalated"] += 1
+            for check in failed:
+                tier["failed_checks"][check] = tier["failed_checks"].get(check, 0) + 1
+        if failed and not last:
+            get_metrics().incr("cascade_escalations")
+
+    def report(self) -> List[dict]:
+        """每一级的文档数、通过校验数、升级数与未通过的检查项统计"""
+        with self._lock:
+            return [{"provider": tier["provider"], "model": tier["model"], "files": tier["files"],
+                     "accepted": tier["accepted"], "escalated": tier["escalated"],
+                     "failed_checks": dict(tier["failed_checks"])} for tier in self.tiers]
@@ -0,0 +1,598 @@
+"""
+无界面的命令行入口，可用于服务器、定时任务或大规模目录批量重命名
+
+用法示例:
+    python -m utlies rename DIR --recursive --provider zhipu --model glm-4.5-flash \\
+        --format title_author --report report.jsonl
+    python -m utlies watch ~/Downloads --provider zhipu --journal watch.jsonl
+    python -m utlies serve --port 8765 --root ~/papers
+    python -m utlies worker /mnt/share/queue.sqlite3 --root /mnt/share/papers --recursive
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from .config import (DEFAULT_MODEL, DEFAULT_MODEL_NAME, DEFAULT_NAMING_FORMAT,
+                     MODEL_CONFIGS, NAMING_FORMATS, CLI_CHUNK_SIZE,
+                     PARSE_WORKERS, LLM_MAX_IN_FLIGHT, DEDUP_ENABLED, TRIAGE_ENABLED,
+                     WATCH_SETTLE_SECONDS, WATCH_POLL_INTERVAL,
+                     SERVICE_HOST, SERVICE_PORT, SERVICE_QUEUE_SIZE,
+                     WORK_LEASE_SECONDS, WORK_CHUNK_SIZE, WORK_POLL_INTERVAL)
+from .journal import WorkJournal
+from .metrics import RunMetrics, set_metrics
+from .model_manager import ModelManager
+
+logger = logging.getLogger(__name__)
+
+
+def iter_pdfs(root: str, recursive: bool = False) -> Iterator[str]:
+    """
+    用 os.scandir 逐个目录遍历，产出PDF路径（不一次性构建整棵目录树的列表）
+    每个目录先读完再产出：调用方在遍历途中重命名同一目录中的文件时，新文件名不会被再次产出
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                pdfs = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+                        pdfs.append(entry.path)
+        except OSError as e:
+            logger.warning("无法读取目录 %s: %s", directory, e)
+            continue
+        yield from pdfs
+
+
+def chunked(iterable: Iterable[str], size: int) -> Iterator[List[str]]:
+    """将迭代器按固定大小分块"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def tally(counts: dict, record: dict):
+    """按状态统计文件数；分拣过的文件另按类别统计在 "triage" 中"""
+    counts[record["status"]] = counts.get(record["status"], 0) + 1
+    label = record.get("triage")
+    if label is not None:
+        triage = counts.setdefault("triage", {})
+        triage[label] = triage.get(label, 0) + 1
+
+
+def build_processor(provider: str = DEFAULT_MODEL,
+                    model_name: str = DEFAULT_MODEL_NAME,
+                    format_type: str = DEFAULT_NAMING_FORMAT,
+                    use_cache: bool = True,
+                    parse_workers: Optional[int] = PARSE_WORKERS,
+                    max_in_flight: int = LLM_MAX_IN_FLIGHT,
+                    batched_prompts: bool = False,
+                    routes: Optional[List[dict]] = None,
+                    route_mode: str = "ordered",
+                    hedge: bool = False,
+                    dedup: bool = DEDUP_ENABLED,
+                    run_triage: bool = TRIAGE_ENABLED,
+                    rename_planner=None,
+                    cascade: bool = False):
+    """创建命令行使用的 BatchProcessor（异步客户端、多提供商路由或模型级联）"""
+    # 只有真正执行重命名时才导入客户端、缓存与PDF解析相关模块，保证 --help 和 undo 启动迅速
+    from .batch_processor import BatchProcessor
+    from .naming_manager import NamingManager
+    from .result_cache import ResultCache
+    if routes and cascade:
+        raise ValueError("多提供商路由与模型级联不能同时使用")
+    if hedge and not routes:
+        raise ValueError("对冲请求需要配置多提供商路由")
+    if routes:
+        from .router import ProviderRouter
+        model_manager = ProviderRouter(routes, mode=route_mode, hedge=hedge)
+    elif cascade:
+        from .cascade import ModelCascade
+        model_manager = ModelCascade.for_provider(provider)
+    else:
+        from .async_client import AsyncModelManager
+        model_manager = AsyncModelManager(provider=provider, model_name=model_name)
+    return BatchProcessor(
+        model_manager,
+        NamingManager(format_type=format_type),
+        result_cache=ResultCache() if use_cache else None,
+        parse_workers=parse_workers,
+        max_in_flight=max_in_flight,
+        batched_prompts=batched_prompts,
+        dedup=dedup,
+        run_triage=run_triage,
+        rename_planner=rename_planner,
+    )
+
+
+def rename_directory(root: str,
+                     recursive: bool = False,
+                     provider: str = DEFAULT_MODEL,
+                     model_name: str = DEFAULT_MODEL_NAME,
+                     format_type: str = DEFAULT_NAMING_FORMAT,
+                     report=None,
+                     dry_run: bool = False,
+                     use_cache: bool = True,
+                     parse_workers: Optional[int] = PARSE_WORKERS,
+                     max_in_flight: int = LLM_MAX_IN_FLIGHT,
+                     chunk_size: int = CLI_CHUNK_SIZE,
+                     batched_prompts: bool = False,
+                     routes: Optional[List[dict]] = None,
+                     route_mode: str = "ordered",
+                     hedge: bool = False,
+                     journal: Optional[WorkJournal] = None,
+                     dedup: bool = DEDUP_ENABLED,
+                     clusters=None,
+                     run_triage: bool = TRIAGE_ENABLED,
+                     cascade: bool = False) -> dict:
+    """
+    批量处理目录中的PDF，按块流式处理以限制内存占用
+    report 为可写文件对象时，每个文件写入一行 JSON 记录
+    routes 非空时使用多提供商路由（故障切换 / 对冲请求），忽略 provider 与 model_name
+    journal 非空时记录每个文件的状态，并跳过之前运行中已完成的文件（断点续跑）
+    dedup 为 True 时重复论文只处理一份；clusters 为可写文件对象时，每组重复文件写入一行 JSON
+    run_triage 为 True 时扫描件和非论文文件不调用大模型（状态为 skipped）
+    cascade 为 True 时按 CASCADE_MODELS 先用快速模型、校验不通过再用更强的模型，忽略 model_name
+    返回: 各状态的文件数统计（分拣类别的统计在 "triage" 中，级联各级的统计在 "cascade" 中）
+    """
+    processor = build_processor(provider, model_name, format_type, use_cache, parse_workers, max_in_flight,
+                                batched_prompts, routes, route_mode, hedge, dedup, run_triage,
+                                cascade=cascade)
+    model_manager = processor.model_manager
+    counts = {}
+    paths = iter_pdfs(root, recursive)
+    callback = None
+    if journal is not None:
+        paths = journal.filter_pending(paths)
+        callback = journal.record_result
+    try:
+        for chunk in chunked(paths, chunk_size):
+            records = processor.extract(chunk, progress_callback=callback)
+            if not dry_run:
+                records = processor.commit(records, progress_callback=callback)
+            for record in records:
+                tally(counts, record)
+                if report is not None:
+                    record = {k: v for k, v in record.items() if k != "cache_key"}
+                    report.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if report is not None:
+                report.flush()
+    finally:
+        processor.close()
+    if processor.duplicate_index is not None and clusters is not None:
+        for cluster in processor.duplicate_index.clusters():
+            clusters.write(json.dumps(cluster, ensure_ascii=False) + "\n")
+    if processor.result_cache is not None:
+        counts["cache"] = processor.result_cache.stats()
+    if routes:
+        counts["routes"] = model_manager.report()
+    elif cascade:
+        counts["cascade"] = model_manager.report()
+    return counts
+
+
+def watch_directory(root: str,
+                    recursive: bool = False,
+                    provider: str = DEFAULT_MODEL,
+                    model_name: str = DEFAULT_MODEL_NAME,
+                    format_type: str = DEFAULT_NAMING_FORMAT,
+                    report=None,
+                    dry_run: bool = False,
+                    use_cache: bool = True,
+                    journal: Optional[WorkJournal] = None,
+                    settle: float = WATCH_SETTLE_SECONDS,
+                    interval: float = WATCH_POLL_INTERVAL,
+                    use_inotify: bool = True,
+                    initial_scan: bool = False,
+                    stop_event=None) -> dict:
+    """
+    常驻监视目录，新PDF写入完成后立即提取并重命名，直到 stop_event 被设置或按下 Ctrl+C
+    report 为可写文件对象时，每处理一个文件写入一行 JSON 记录
+    返回: 各状态的文件数统计
+    """
+    from .watcher import WatchDaemon
+    # 常驻运行时重复检测索引会无限增长；同一文件再次出现时由结果缓存命中
+    processor = build_processor(provider, model_name, format_type, use_cache, dedup=False)
+    counts = {}
+
+    def on_record(record: dict):
+        tally(counts, record)
+        if report is not None:
+            record = {k: v for k, v in record.items() if k != "cache_key"}
+            report.write(json.dumps(record, ensure_ascii=False) + "\n")
+            report.flush()
+
+    daemon = WatchDaemon(root, processor, recursive=recursive, journal=journal, dry_run=dry_run,
+                         settle=settle, interval=interval, use_inotify=use_inotify, on_record=on_record)
+    try:
+        daemon.run(stop_event, initial_scan=initial_scan)
+    finally:
+        processor.close()
+    return counts
+
+
+def serve(host: str = SERVICE_HOST,
+          port: int = SERVICE_PORT,
+          provider: str = DEFAULT_MODEL,
+          model_name: str = DEFAULT_MODEL_NAME,
+          format_type: str = DEFAULT_NAMING_FORMAT,
+          use_cache: bool = True,
+          roots: Optional[List[str]] = None,
+          queue_size: int = SERVICE_QUEUE_SIZE,
+          batched_prompts: bool = False):
+    """
+    以本地 HTTP 服务方式提供提取接口（见 service 模块），直到按下 Ctrl+C
+    roots 为允许按服务器端路径提交的目录；为空时只接受上传
+    """
+    from .service import ExtractionService, make_server
+    # 服务长期运行，重复检测索引会无限增长；并发的相同文件由服务按内容哈希合并，重复请求由结果缓存命中
+    processor = build_processor(provider, model_name, format_type, use_cache,
+                                batched_prompts=batched_prompts, dedup=False)
+    service = ExtractionService(processor, queue_size=queue_size).start()
+    server = make_server(service, host, port, roots)
+    print("提取服务已启动: http://%s:%s" % server.server_address[:2], file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def work_directory(queue_path: str,
+                   root: Optional[str] = None,
+                   recursive: bool = False,
+                   provider: str = DEFAULT_MODEL,
+                   model_name: str = DEFAULT_MODEL_NAME,
+                   format_type: str = DEFAULT_NAMING_FORMAT,
+                   report=None,
+                   dry_run: bool = False,
+                   use_cache: bool = True,
+                   batched_prompts: bool = False,
+                   worker_id: Optional[str] = None,
+                   lease_seconds: float = WORK_LEASE_SECONDS,
+                   chunk_size: int = WORK_CHUNK_SIZE,
+                   stop_event=None) -> dict:
+    """
+    分片处理工作进程：从共享队列（见 WorkQueue）领取文件，提取并重命名后提交结果，直到队列中没有剩余文件
+    可在多台主机上同时运行多个；root 非空时先把目录中的PDF登记到队列（任何进程都可以登记，重复登记会被忽略）
+    返回: 本进程处理的各状态文件数，"queue" 中为队列整体的状态统计
+    """
+    from .work_queue import WorkQueue, LeaseKeeper, QueueRenamePlanner
+    queue = WorkQueue(queue_path, worker_id=worker_id, lease_seconds=lease_seconds)
+    if root is not None:
+        added = queue.enqueue(iter_pdfs(root, recursive))
+        logger.info("登记了 %d 个新文件", added)
+    # 重命名计划记录在队列中（代替撤销日志），进程崩溃后由其他进程接着完成
+    processor = build_processor(provider, model_name, format_type, use_cache,
+                                batched_prompts=batched_prompts, rename_planner=QueueRenamePlanner(queue))
+    counts = {}
+    paths = []
+
+    def finish(records: List[dict]):
+        for record in records:
+            tally(counts, record)
+            if report is not None:
+                record = {k: v for k, v in record.items() if k != "cache_key"}
+                report.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if report is not None:
+            report.flush()
+
+    try:
+        if dry_run:
+            # 预演：只读取排队中的文件并提取，不领取、不提交，队列保持不变
+            for chunk in chunked(queue.pending(), chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                finish(processor.extract(chunk))
+        while not dry_run and (stop_event is None or not stop_event.is_set()):
+            paths = queue.claim(chunk_size)
+            if not paths:
+                if not queue.unfinished():
+                    break
+                # 其余文件正由其他进程处理，等待它们完成或租约过期
+                time.sleep(WORK_POLL_INTERVAL)
+                continue
+            with LeaseKeeper(queue, paths) as keeper:
+                records = processor.extract(paths)
+                # 提交前确认仍持有租约：租约已丢失的文件不再重命名
+                owned = queue.heartbeat(keeper.held)
+                for record in records:
+                    if record["path"] not in owned:
+                        record["status"] = "cancelled"
+                        record["error"] = "租约已丢失"
+                records = processor.commit(records)
+            # 租约丢失的文件立即交还：已被其他进程取得的不受影响，其余重新排队，不必等到租约过期
+            lost = [record["path"] for record in records if record["status"] == "cancelled"]
+            if lost:
+                queue.release(lost)
+            for record in records:
+                if record["status"] != "cancelled":
+                    queue.complete(record)
+            finish(records)
+            paths = []
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # 中断时未完成的文件重新排队（已提交的文件不再持有租约，不受影响）
+        if paths:
+            queue.release(paths)
+        processor.close()
+        counts["queue"] = queue.counts()
+        queue.close()
+    return counts
+
+
+def parse_route(value: str) -> dict:
+    """解析 provider:model[:weight] 形式的路由参数"""
+    parts = value.split(":")
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"路由格式应为 provider:model[:weight]，实际为 {value}")
+    provider, model = parts[0], parts[1]
+    if model not in ModelManager.list_models(provider):
+        raise argparse.ArgumentTypeError(f"提供商 {provider} 不支持模型 {model}")
+    route = {"provider": provider, "model": model}
+    if len(parts) == 3:
+        route["weight"] = float(parts[2])
+    return route
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m utlies", description="使用大模型提取论文信息并重命名PDF")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rename = subparsers.add_parser("rename", help="重命名目录中的PDF文件")
+    rename.add_argument("directory", help="PDF 所在目录")
+    rename.add_argument("-r", "--recursive", action="store_true", help="递归处理子目录")
+    rename.add_argument("--provider", default=DEFAULT_MODEL, choices=list(MODEL_CONFIGS.keys()))
+    rename.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    rename.add_argument("--format", default=DEFAULT_NAMING_FORMAT, choices=list(NAMING_FORMATS.keys()))
+    rename.add_argument("--report", help="JSON-lines 报告输出路径（'-' 表示标准输出）")
+    rename.add_argument("--dry-run", action="store_true", help="只提取信息，不重命名")
+    rename.add_argument("--no-cache", action="store_true", help="不使用结果缓存")
+    rename.add_argument("--workers", type=int, default=PARSE_WORKERS, help="PDF 解析进程数")
+    rename.add_argument("--max-in-flight", type=int, default=LLM_MAX_IN_FLIGHT, help="大模型请求线程数（不少于提供商自适应并发的上限）")
+    rename.add_argument("--batch-prompts", action="store_true", help="多篇文档打包进一次大模型请求")
+    # 路由与级联都会替换模型管理器，只能选择其一
+    selection = rename.add_mutually_exclusive_group()
+    selection.add_argument("--route", action="append", type=parse_route, metavar="PROVIDER:MODEL[:WEIGHT]",
+                           help="多提供商路由，可重复指定；出错或超时时切换到下一个")
+    rename.add_argument("--route-mode", default="ordered", choices=["ordered", "weighted"])
+    selection.add_argument("--cascade", action="store_true",
+                           help="先用快速便宜的模型，结果未通过校验时再交给更强的模型（忽略 --model）")
+    rename.add_argument("--hedge", action="store_true", help="慢请求超过延迟分位数后向下一个提供商发送对冲请求（需要 --route）")
+    rename.add_argument("--metrics", help="运行结束时写出各阶段耗时与计数（'-' 表示标准错误）")
+    rename.add_argument("--metrics-format", default="jsonl", choices=["jsonl", "prometheus"])
+    rename.add_argument("--journal", help="工作日志路径：记录每个文件的状态，重新运行时跳过已完成的文件")
+    rename.add_argument("--skip-failed", action="store_true", help="恢复运行时不重试日志中失败的文件")
+    rename.add_argument("--no-dedup", action="store_true", help="不检测重复论文，每个文件单独提取")
+    rename.add_argument("--no-triage", action="store_true", help="不分拣扫描件和非论文文件，全部交给大模型")
+    rename.add_argument("--clusters", help="重复论文分组报告（JSON-lines）输出路径")
+    rename.add_argument("--chunk-size", type=int, default=CLI_CHUNK_SIZE, help="每批处理的文件数")
+    watch = subparsers.add_parser("watch", help="常驻监视目录，新下载的PDF写入完成后自动重命名")
+    watch.add_argument("directory", help="监视的目录")
+    watch.add_argument("-r", "--recursive", action="store_true", help="同时监视子目录")
+    watch.add_argument("--provider", default=DEFAULT_MODEL, choices=list(MODEL_CONFIGS.keys()))
+    watch.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    watch.add_argument("--format", default=DEFAULT_NAMING_FORMAT, choices=list(NAMING_FORMATS.keys()))
+    watch.add_argument("--report", help="JSON-lines 报告输出路径（'-' 表示标准输出）")
+    watch.add_argument("--dry-run", action="store_true", help="只提取信息，不重命名")
+    watch.add_argument("--no-cache", action="store_true", help="不使用结果缓存")
+    watch.add_argument("--journal", help="工作日志路径：记录每个文件的状态，跳过已完成的文件")
+    watch.add_argument("--settle", type=float, default=WATCH_SETTLE_SECONDS,
+                       help="文件大小和修改时间保持不变多少秒后才处理")
+    watch.add_argument("--interval", type=float, default=WATCH_POLL_INTERVAL, help="轮询间隔（秒）")
+    watch.add_argument("--poll", action="store_true", help="不使用 inotify，始终轮询")
+    watch.add_argument("--initial-scan", action="store_true", help="启动时先处理目录中已有的PDF")
+
+    serve = subparsers.add_parser("serve", help="以本地 HTTP 服务方式提供提取接口，供其他工具调用")
+    serve.add_argument("--host", default=SERVICE_HOST, help="监听地址")
+    serve.add_argument("--port", type=int, default=SERVICE_PORT, help="监听端口")
+    serve.add_argument("--provider", default=DEFAULT_MODEL, choices=list(MODEL_CONFIGS.keys()))
+    serve.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    serve.add_argument("--format", default=DEFAULT_NAMING_FORMAT, choices=list(NAMING_FORMATS.keys()),
+                       help="返回的建议文件名格式")
+    serve.add_argument("--no-cache", action="store_true", help="不使用结果缓存")
+    serve.add_argument("--root", action="append", help="允许按服务器端路径提交的目录，可重复指定")
+    serve.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE, help="待处理队列上限，超出时返回 503")
+    serve.add_argument("--batch-prompts", action="store_true", help="同时排队的文档打包进一次大模型请求")
+
+    worker = subparsers.add_parser("worker", help="从共享队列领取文件处理，可在多台主机上同时运行")
+    worker.add_argument("queue", help="共享队列数据库路径（SQLite，所有工作进程使用同一个文件）")
+    worker.add_argument("--root", help="先把该目录中的PDF登记到队列")
+    worker.add_argument("-r", "--recursive", action="store_true", help="登记时递归处理子目录")
+    worker.add_argument("--provider", default=DEFAULT_MODEL, choices=list(MODEL_CONFIGS.keys()))
+    worker.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    worker.add_argument("--format", default=DEFAULT_NAMING_FORMAT, choices=list(NAMING_FORMATS.keys()))
+    worker.add_argument("--report", help="JSON-lines 报告输出路径（'-' 表示标准输出）")
+    worker.add_argument("--dry-run", action="store_true", help="只提取排队中的文件，不领取、不重命名，队列保持不变")
+    worker.add_argument("--no-cache", action="store_true", help="不使用结果缓存")
+    worker.add_argument("--batch-prompts", action="store_true", help="多篇文档打包进一次大模型请求")
+    worker.add_argument("--worker-id", help="工作进程标识（默认为 主机名-进程号）；固定标识便于崩溃后恢复")
+    worker.add_argument("--lease", type=float, default=WORK_LEASE_SECONDS, help="租约时长（秒）")
+    worker.add_argument("--chunk-size", type=int, default=WORK_CHUNK_SIZE, help="每次领取的文件数")
+
+    undo = subparsers.add_parser("undo", help="根据工作日志撤销重命名")
+    undo.add_argument("--journal", required=True, help="工作日志路径")
+    undo.add_argument("--dry-run", action="store_true", help="只统计，不实际撤销")
+
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="日志级别")
+    return parser
+
+
+def write_metrics(metrics: RunMetrics, destination: str, fmt: str):
+    """将运行指标写到文件或标准错误"""
+    fp = sys.stderr if destination == "-" else open(destination, "w", encoding="utf-8")
+    try:
+        if fmt == "prometheus":
+            metrics.write_prometheus(fp)
+        else:
+            metrics.write_jsonl(fp)
+    finally:
+        if fp is not sys.stderr:
+            fp.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "hedge", False) and not args.route:
+        parser.error("--hedge 只能与 --route 一起使用")
+    logging.basicConfig(level=getattr(logging, args.log_level),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "rename":
+        if args.model not in ModelManager.list_models(args.provider):
+            print(f"提供商 {args.provider} 不支持模型 {args.model}", file=sys.stderr)
+            return 2
+        metrics = RunMetrics(enabled=bool(args.metrics))
+        set_metrics(metrics)
+        journal = WorkJournal(args.journal, retry_failed=not args.skip_failed) if args.journal else None
+        report = None
+        if args.report == "-":
+            report = sys.stdout
+        elif args.report:
+            report = open(args.report, "a", encoding="utf-8")
+        clusters = open(args.clusters, "w", encoding="utf-8") if args.clusters else None
+        try:
+            counts = rename_directory(
+                args.directory,
+                recursive=args.recursive,
+                provider=args.provider,
+                model_name=args.model,
+                format_type=args.format,
+                report=report,
+                dry_run=args.dry_run,
+                use_cache=not args.no_cache,
+                parse_workers=args.workers,
+                max_in_flight=args.max_in_flight,
+                chunk_size=args.chunk_size,
+                batched_prompts=args.batch_prompts,
+                routes=args.route,
+                route_mode=args.route_mode,
+                hedge=args.hedge,
+                journal=journal,
+                dedup=not args.no_dedup,
+                clusters=clusters,
+                run_triage=not args.no_triage,
+                cascade=args.cascade,
+            )
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+        finally:
+            if report is not None and report is not sys.stdout:
+                report.close()
+            if clusters is not None:
+                clusters.close()
+            if journal is not None:
+                journal.close()
+            if args.metrics:
+                write_metrics(metrics, args.metrics, args.metrics_format)
+        print(json.dumps(counts, ensure_ascii=False), file=sys.stderr)
+        return 1 if counts.get("failed") else 0
+
+    if args.command == "watch":
+        if args.model not in ModelManager.list_models(args.provider):
+            print(f"提供商 {args.provider} 不支持模型 {args.model}", file=sys.stderr)
+            return 2
+        journal = WorkJournal(args.journal) if args.journal else None
+        report = None
+        if args.report == "-":
+            report = sys.stdout
+        elif args.report:
+            report = open(args.report, "a", encoding="utf-8")
+        try:
+            counts = watch_directory(
+                args.directory,
+                recursive=args.recursive,
+                provider=args.provider,
+                model_name=args.model,
+                format_type=args.format,
+                report=report,
+                dry_run=args.dry_run,
+                use_cache=not args.no_cache,
+                journal=journal,
+                settle=args.settle,
+                interval=args.interval,
+                use_inotify=not args.poll,
+                initial_scan=args.initial_scan,
+            )
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+        finally:
+            if report is not None and report is not sys.stdout:
+                report.close()
+            if journal is not None:
+                journal.close()
+        print(json.dumps(counts, ensure_ascii=False), file=sys.stderr)
+        return 0
+
+    if args.command == "serve":
+        if args.model not in ModelManager.list_models(args.provider):
+            print(f"提供商 {args.provider} 不支持模型 {args.model}", file=sys.stderr)
+            return 2
+        try:
+            serve(args.host, args.port, provider=args.provider, model_name=args.model, format_type=args.format,
+                  use_cache=not args.no_cache, roots=args.root, queue_size=args.queue_size,
+                  batched_prompts=args.batch_prompts)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+        return 0
+
+    if args.command == "worker":
+        if args.model not in ModelManager.list_models(args.provider):
+            print(f"提供商 {args.provider} 不支持模型 {args.model}", file=sys.stderr)
+            return 2
+        report = None
+        if args.report == "-":
+            report = sys.stdout
+        elif args.report:
+            report = open(args.report, "a", encoding="utf-8")
+        try:
+            counts = work_directory(
+                args.queue,
+                root=args.root,
+                recursive=args.recursive,
+                provider=args.provider,
+                model_name=args.model,
+                format_type=args.format,
+                report=report,
+                dry_run=args.dry_run,
+                use_cache=not args.no_cache,
+                batched_prompts=args.batch_prompts,
+                worker_id=args.worker_id,
+                lease_seconds=args.lease,
+                chunk_size=args.chunk_size,
+            )
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+        finally:
+            if report is not None and report is not sys.stdout:
+                report.close()
+        print(json.dumps(counts, ensure_ascii=False), file=sys.stderr)
+        return 1 if counts.get("failed") else 0
+
+    if args.command == "undo":
+        with WorkJournal(args.journal) as journal:
+            counts = journal.undo(dry_run=args.dry_run)
+        print(json.dumps(counts, ensure_ascii=False), file=sys.stderr)
+        return 0
+    return 0
@@ -6,43 +6,80 @@ MODEL_CONFIGS = {
         "name": "智谱AI",
         "provider": "zhipu",
         "base_url": "https://open.bigmodel.cn/api/paas/v4/",
+        "rate_limits": {"rpm": 300, "tpm": 1000000},
         "models": {
-            "glm-4.5-flash": {"max_tokens": 2048, "temperature": 0.4},
-            "glm-4": {"max_tokens": 2048, "temperature": 0.4},
-            "glm-3-turbo": {"max_tokens": 1024, "temperature": 0.4}
+            "glm-4.5-flash": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_object"},
+            "glm-4": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_object"},
+            "glm-3-turbo": {"max_tokens": 1024, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": None}
         }
     },
     "openai": {
         "name": "OpenAI",
         "provider": "openai",
         "base_url": "https://api.openai.com/v1",
+        "rate_limits": {"rpm": 500, "tpm": 200000},
         "models": {
-            "gpt-4o-mini": {"max_tokens": 2048, "temperature": 0.4},
-            "gpt-4o": {"max_tokens": 2048, "temperature": 0.4},
-            "gpt-3.5-turbo": {"max_tokens": 1024, "temperature": 0.4}
+            "gpt-4o-mini": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_schema"},
+            "gpt-4o": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_schema"},
+            "gpt-3.5-turbo": {"max_tokens": 1024, "temperature": 0.4, "context_window": 16385, "batch_size": 8, "response_format": "json_object"}
         }
     },
     "aliyun": {
         "name": "阿里云",
         "provider": "aliyun",
         "base_url": "https://dashscope.aliyuncs.com/api/v1",
+        "rate_limits": {"rpm": 600, "tpm": 1000000},
         "models": {
-            "qwen-plus": {"max_tokens": 2048, "temperature": 0.4},
-            "qwen-turbo": {"max_tokens": 2048, "temperature": 0.4}
+            "qwen-plus": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_object"},
+            "qwen-turbo": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_object"}
         }
     },
     "moonshot": {
         "name": "月之暗面",
         "provider": "moonshot",
         "base_url": "https://api.moonshot.cn/v1",
+        "rate_limits": {"rpm": 200, "tpm": 128000, "max_concurrency": 8},
         "models": {
-            "moonshot-v1-8k": {"max_tokens": 2048, "temperature": 0.4},
-            "moonshot-v1-32k": {"max_tokens": 2048, "temperature": 0.4},
-            "moonshot-v1-128k": {"max_tokens": 2048, "temperature": 0.4}
+            "moonshot-v1-8k": {"max_tokens": 2048, "temperature": 0.4, "context_window": 8192, "batch_size": 4, "response_format": "json_object"},
+            "moonshot-v1-32k": {"max_tokens": 2048, "temperature": 0.4, "context_window": 32768, "batch_size": 10, "response_format": "json_object"},
+            "moonshot-v1-128k": {"max_tokens": 2048, "temperature": 0.4, "context_window": 131072, "batch_size": 10, "response_format": "json_object"}
         }
     }
 }
 
+# 限流默认值：MODEL_CONFIGS 中各提供商的 "rate_limits" 只需写出与默认值不同的项
+# （限流按提供商统计，同一提供商的各模型共用一个客户端）
+DEFAULT_RATE_LIMITS = {
+    "rpm": 60,                  # 每分钟请求数
+    "tpm": 200000,              # 每分钟 token 数
+    "initial_concurrency": 4,   # 初始并发数
+    "max_concurrency": 16       # 并发上限（同时也是连接池大小）
+}
+
+# 大模型请求重试：最大重试次数、指数退避的基数与上限（秒）
+LLM_MAX_RETRIES = 5
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 30.0
+
+# 多提供商路由：单次请求超时（秒）、对冲请求的延迟分位数与最少样本数、
+# 连续失败多少次后熔断、熔断冷却时间（秒）、统计窗口大小
+ROUTER_TIMEOUT = 30
+ROUTER_HEDGE_PERCENTILE = 0.9
+ROUTER_HEDGE_MIN_SAMPLES = 20
+ROUTER_FAILURE_THRESHOLD = 3
+ROUTER_COOLDOWN = 60
+ROUTER_WINDOW = 200
+
+# 模型级联：每个提供商从快到慢的模型顺序（先用第一个，校验不通过才交给下一个）、
+# 标题与原文的最低词重合比例、合理年份的下限
+CASCADE_MODELS = {
+    "zhipu": ["glm-4.5-flash", "glm-4"],
+    "openai": ["gpt-4o-mini", "gpt-4o"],
+    "aliyun": ["qwen-turbo", "qwen-plus"],
+}
+CASCADE_MIN_TITLE_OVERLAP = 0.6
+CASCADE_MIN_YEAR = 1900
+
 # 命名格式配置
 NAMING_FORMATS = {
     "title_author": {
@@ -77,10 +114,117 @@ DEFAULT_MODEL = "zhipu"
 DEFAULT_MODEL_NAME = "glm-4.5-flash"
 DEFAULT_NAMING_FORMAT = "title_author"
 
-# 提取提示词
+# 打开PDF时是否使用只读内存映射（大文件只读入用到的部分，而不是整个文件）
+PDF_USE_MMAP = True
+
+# 前置信息（标题、作者）提取范围：只解析前几页，凑够字符数即停止
+FRONT_MATTER_MAX_PAGES = 2
+FRONT_MATTER_MAX_CHARS = 3000
+
+# 发送给大模型的前置文本 token 预算（可在模型配置中用 "prompt_token_budget" 单独设置）
+FRONT_MATTER_TOKEN_BUDGET = 256
+
+# 本地前置信息解析器：是否启用，以及置信度达到多少时不再调用大模型
+LOCAL_EXTRACTOR_ENABLED = True
+LOCAL_EXTRACTOR_MIN_CONFIDENCE = 0.85
+
+# 元数据快速通道：是否通过 Crossref / arXiv 查询首页中的 DOI/arXiv 编号，以及查询超时（秒）
+METADATA_REMOTE_LOOKUP = True
+METADATA_LOOKUP_TIMEOUT = 5
+
+# 提取结果缓存：数据库路径、最大条目数、最长保存天数
+CACHE_PATH = "result_cache.sqlite3"
+CACHE_MAX_ENTRIES = 50000
+CACHE_MAX_AGE_DAYS = 180
+
+# 批处理：PDF解析进程数（None 表示使用 CPU 核数）、大模型请求线程数（使用异步客户端时不少于其 max_concurrency）
+PARSE_WORKERS = None
+LLM_MAX_IN_FLIGHT = 4
+
+# PDF 解析进程池：单个文件的解析超时（秒）、工作进程内存上限（MB，仅 Linux 生效）、
+# 每个工作进程处理多少个文件后替换、进程启动方式（"spawn" 避免在多线程进程中 fork）
+PARSE_TIMEOUT = 60
+PARSE_MAX_RSS_MB = 1024
+PARSE_MAX_TASKS_PER_WORKER = 200
+PARSE_START_METHOD = "spawn"
+
+# 命令行批处理：每次从目录中取出的文件数（流式处理，限制内存占用）
+CLI_CHUNK_SIZE = 256
+
+# 本地 HTTP 服务：监听地址与端口、未完成（排队中与处理中）的文件数上限（超出时返回 503）、每批最多合并的文件数、
+# 攒批等待时间（秒）、单个请求的最长等待时间（秒）、上传文件大小上限（MB）
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_QUEUE_SIZE = 64
+SERVICE_BATCH_MAX = 16
+SERVICE_BATCH_WAIT = 0.05
+SERVICE_REQUEST_TIMEOUT = 300
+SERVICE_MAX_UPLOAD_MB = 100
+
+# 多机分片处理（worker 子命令）：租约时长（秒，处理期间每隔三分之一时长续租）、每个文件最多尝试次数、
+# 每次领取的文件数、队列中没有可领取的文件时等待多久再查看（其他进程的租约可能过期）
+WORK_LEASE_SECONDS = 300
+WORK_MAX_ATTEMPTS = 3
+WORK_CHUNK_SIZE = 32
+WORK_POLL_INTERVAL = 5.0
+
+# 提取前分拣：是否启用、首页前置文本少于多少个非空白字符或可打印字符比例低于多少时视为没有可用文本层
+# （扫描件、乱码文本层），不像论文的文件（发票、账单等）同样不调用大模型
+TRIAGE_ENABLED = True
+TRIAGE_MIN_CHARS = 200
+TRIAGE_MIN_PRINTABLE = 0.85
+
+# 重复论文检测：是否启用、MinHash 排列数、LSH 分段数（需整除排列数）、判定为重复的相似度阈值、分词窗口大小
+DEDUP_ENABLED = True
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16
+DEDUP_THRESHOLD = 0.8
+DEDUP_SHINGLE_SIZE = 3
+
+# 监视目录模式：轮询间隔（秒，inotify 不可用时）、文件大小和修改时间保持不变多久才视为写入完成、每次最多处理的文件数、
+# 记住的最近重命名产生的文件数（用于忽略这些文件的事件）
+WATCH_POLL_INTERVAL = 2.0
+WATCH_SETTLE_SECONDS = 3.0
+WATCH_BATCH_MAX = 32
+WATCH_PRODUCED_MAX = 10000
+
+# 重命名提交阶段：预写式撤销日志文件名（写在被重命名文件所在的目录中，每个批次一个 rename_undo.<批次号>.jsonl，进程崩溃后据此回滚）、同名文件的最大编号
+RENAME_UNDO_LOG = "rename_undo.jsonl"
+RENAME_MAX_SUFFIX = 999
+
+# 提取提示词（修改提示词时同步递增版本号，使缓存失效）
+PROMPT_VERSION = "2"
 EXTRACTION_PROMPT = """你是一个论文助手，会将我输入论文的前十几行文件，输出论文的标题以及作者。回复是记得使用json格式返回，格式如下：
 {
   "title": "论文标题",
   "authors": ["作者1", "作者2", ...],
   "year": "年份（如果有）"
-}"""
\ No newline at end of file
+}"""
+
+# 批量提取提示词：一次请求处理多篇论文，按文档编号返回 JSON 数组
+BATCH_EXTRACTION_PROMPT = """你是一个论文助手。下面会给出多篇论文开头的文本，每篇以 "### 文档 <id>" 开头。
+请为每篇论文提取标题、作者和年份，只返回一个 JSON 数组，不要输出其他内容，格式如下：
+[
+  {"id": "文档编号", "title": "论文标题", "authors": ["作者1", "作者2"], "year": "年份（如果有）"}
+]"""
+
+# 结构化输出模式：指令放在 system 角色，使用提供商的 JSON 模式（见模型配置中的 "response_format"：
+# "json_schema" 表示支持 JSON Schema 约束，"json_object" 表示只支持 JSON 模式，None 表示不支持），
+# 并将 max_tokens 限制为结果所需的长度
+STRUCTURED_OUTPUT_ENABLED = True
+STRUCTURED_MAX_TOKENS = 256
+STRUCTURED_EXTRACTION_PROMPT = """从论文开头文本中提取标题、作者和发表年份。只输出 JSON：{"title": "标题", "authors": ["作者"], "year": "年份或null"}"""
+STRUCTURED_BATCH_EXTRACTION_PROMPT = """从每篇论文开头文本（以 "### 文档 <id>" 分隔）中提取标题、作者和发表年份。只输出 JSON：{"results": [{"id": "文档编号", "title": "标题", "authors": ["作者"], "year": "年份或null"}]}"""
+PAPER_INFO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "authors": {"type": "array", "items": {"type": "string"}},
+        "year": {"type": ["string", "null"]}
+    },
+    "required": ["title", "authors", "year"],
+    "additionalProperties": False
+}
+
+# 批量提取时每篇文档预留的输出 token 数
+BATCH_OUTPUT_TOKENS_PER_DOC = 160
\ No newline at end of file
@@ -0,0 +1,121 @@
+import hashlib
+import random
+import re
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from .config import DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_THRESHOLD, DEDUP_SHINGLE_SIZE
+from .snippet_selector import is_boilerplate
+
+# 英文按单词、中文按单字切分
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]')
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# 固定种子生成的哈希排列参数，保证不同进程、不同运行之间签名一致
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(DEDUP_NUM_PERM)]
+
+
+def _shingles(text: str, size: int) -> set:
+    """去掉页眉、版权等易变的行后，按 size 个词一组切分"""
+    body = "\n".join(line for line in text.lower().splitlines() if line.strip() and not is_boilerplate(line))
+    tokens = _TOKEN_PATTERN.findall(body)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(text: str, shingle_size: int = DEDUP_SHINGLE_SIZE) -> Optional[array]:
+    """
+    计算前置文本的 MinHash 签名（DEDUP_NUM_PERM 个 64 位整数）
+    文本过短无法判断时返回 None
+    """
+    shingles = _shingles(text, shingle_size)
+    if len(shingles) < shingle_size:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+              for s in shingles]
+    return array("Q", (min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS))
+
+
+def estimate_similarity(sig_a: array, sig_b: array) -> float:
+    """用两个签名中相同位置相等的比例估计 Jaccard 相似度"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class DuplicateIndex:
+    """
+    重复论文索引：
+    - 字节完全相同的文件按 SHA-256 归为一组
+    - 前置文本近似相同的文件（预印本与正式版、不同文件名保存的副本）用 MinHash + LSH 分桶查找候选，
+      估计相似度达到阈值时归入同一组
+    每组只有第一个文件（代表）需要解析和调用大模型，其余文件沿用代表的结果
+    """
+
+    def __init__(self, bands: int = DEDUP_BANDS, threshold: float = DEDUP_THRESHOLD):
+        if DEDUP_NUM_PERM % bands:
+            raise ValueError("DEDUP_NUM_PERM 必须能被 bands 整除")
+        self.bands = bands
+        self.rows = DEDUP_NUM_PERM // bands
+        self.threshold = threshold
+        self.by_bytes: Dict[str, str] = {}        # 文件哈希 -> 代表路径
+        self.buckets: Dict[tuple, List[str]] = {}  # (分段序号, 分段内容) -> 代表路径
+        self.signatures: Dict[str, array] = {}     # 代表路径 -> 签名
+        self.members: Dict[str, List[tuple]] = {}  # 代表路径 -> [(成员路径, 类型, 相似度)]
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature: array) -> Iterator[tuple]:
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def match_bytes(self, path: str, digest: str) -> Optional[str]:
+        """文件字节与已登记的文件相同时返回其代表路径，否则登记为新代表"""
+        with self._lock:
+            representative = self.by_bytes.setdefault(digest, path)
+            if representative == path:
+                return None
+            self.members.setdefault(representative, []).append((path, "exact", 1.0))
+            return representative
+
+    def match_text(self, path: str, signature: Optional[array]) -> Optional[str]:
+        """前置文本与已登记的代表近似相同时返回代表路径，否则登记为新代表"""
+        if signature is None:
+            return None
+        with self._lock:
+            best, best_score = None, 0.0
+            seen = set()
+            for key in self._band_keys(signature):
+                for candidate in self.buckets.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    score = estimate_similarity(signature, self.signatures[candidate])
+                    if score > best_score:
+                        best, best_score = candidate, score
+            if best is not None and best_score >= self.threshold:
+                self.members.setdefault(best, []).append((path, "near", round(best_score, 3)))
+                return best
+            self._add(path, signature)
+            return None
+
+    def add(self, path: str, signature: Optional[array]):
+        """直接登记为代表（例如已通过本地元数据得到结果的文件），供后续文件匹配"""
+        if signature is None:
+            return
+        with self._lock:
+            self._add(path, signature)
+
+    def _add(self, path: str, signature: array):
+        self.signatures[path] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(path)
+
+    def clusters(self) -> Iterator[dict]:
+        """返回包含重复文件的分组：{"representative": 路径, "members": [{"path", "kind", "similarity"}]}"""
+        with self._lock:
+            items = [(rep, list(members)) for rep, members in self.members.items()]
+        for representative, members in items:
+            yield {"representative": representative,
+                   "members": [{"path": p, "kind": kind, "similarity": score} for p, kind, score in members]}
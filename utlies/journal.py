@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator
+
+from .rename_planner import move_no_clobber
+
+
+class WorkJournal:
+    """
+    批处理工作日志（追加写入的 JSON-lines 文件）
+    每个文件的状态变化（discovered / extracted / failed / renamed / undone）各记一行，
+    中断后重新运行时跳过已完成的文件，也可用于审计或撤销重命名
+    """
+
+    DONE_STATES = ("renamed",)
+
+    def __init__(self, path: str, retry_failed: bool = True):
+        self.path = path
+        self.retry_failed = retry_failed
+        self.states: Dict[str, dict] = {}
+        self.produced = set()  # 本工具重命名后产生的新路径
+        self._lock = threading.Lock()
+        self._load()
+        self._fp = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        """重放已有日志，得到每个文件的最新状态"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 进程崩溃时可能留下不完整的最后一行
+                self._apply(entry)
+
+    def _apply(self, entry: dict):
+        path = entry["path"]
+        self.states[path] = entry
+        if entry["state"] == "renamed" and entry.get("new_path"):
+            self.produced.add(os.path.abspath(entry["new_path"]))
+        elif entry["state"] == "undone" and entry.get("new_path"):
+            self.produced.discard(os.path.abspath(entry["new_path"]))
+
+    def record(self, path: str, state: str, **fields):
+        """追加一条状态记录，并立即刷新到磁盘"""
+        entry = {"ts": time.time(), "path": os.path.abspath(path), "state": state}
+        entry.update({k: v for k, v in fields.items() if v is not None})
+        if entry.get("new_path"):
+            entry["new_path"] = os.path.abspath(entry["new_path"])
+        with self._lock:
+            self._apply(entry)
+            self._fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._fp.flush()
+
+    def record_result(self, record: dict):
+        """记录 BatchProcessor 产生的单文件结果"""
+        self.record(record["path"], record["status"], new_path=record.get("new_path"),
+                    title=record.get("title"), tier=record.get("tier"), error=record.get("error"))
+
+    def should_skip(self, path: str) -> bool:
+        """已完成（或由本工具重命名产生）的文件在恢复运行时跳过"""
+        path = os.path.abspath(path)
+        if path in self.produced:
+            return True
+        entry = self.states.get(path)
+        if entry is None:
+            return False
+        if entry["state"] in self.DONE_STATES:
+            return True
+        return entry["state"] == "failed" and not self.retry_failed
+
+    def filter_pending(self, paths: Iterable[str]) -> Iterator[str]:
+        """过滤出仍需处理的文件，并记录 discovered 状态"""
+        for path in paths:
+            if self.should_skip(path):
+                continue
+            if os.path.abspath(path) not in self.states:
+                self.record(path, "discovered")
+            yield path
+
+    def renamed_entries(self) -> Iterator[dict]:
+        """按记录顺序的逆序返回仍处于 renamed 状态的条目"""
+        entries = [e for e in self.states.values() if e["state"] == "renamed" and e.get("new_path")]
+        entries.sort(key=lambda e: e["ts"], reverse=True)
+        return iter(entries)
+
+    def undo(self, dry_run: bool = False) -> Dict[str, int]:
+        """撤销日志中记录的全部重命名（新文件存在且原路径未被占用时）"""
+        counts = {"undone": 0, "skipped": 0}
+        for entry in list(self.renamed_entries()):
+            old_path, new_path = entry["path"], entry["new_path"]
+            if not os.path.exists(new_path) or os.path.exists(old_path):
+                counts["skipped"] += 1
+                continue
+            if not dry_run:
+                move_no_clobber(new_path, old_path)
+                self.record(old_path, "undone", new_path=new_path)
+            counts["undone"] += 1
+        return counts
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for entry in self.states.values():
+            counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
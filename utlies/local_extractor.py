@@ -0,0 +1,150 @@
+import re
+from statistics import median
+from typing import Iterable, List, Optional, Tuple
+
+from .config import LOCAL_EXTRACTOR_MIN_CONFIDENCE
+
+# 单位、邮箱等通常出现在作者行之后的内容
+_AFFILIATION_PATTERN = re.compile(
+    r'(universit|department|institute|laborator|school|college|academy|center|centre|'
+    r'corporation|inc\.|ltd|@|大学|学院|研究所|研究院|实验室|公司)', re.IGNORECASE)
+# 标题之前可能出现的期刊页眉、版权信息等
+_BANNER_PATTERN = re.compile(
+    r'(journal|proceedings|conference|vol\.|volume|issn|doi|arxiv|preprint|copyright|©|'
+    r'received|accepted|available online|contents lists|期刊|学报)', re.IGNORECASE)
+_YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d\d)\b')
+# 含有日期的行：投稿/出版日期、版权声明、“月份 年份”（正文中的数字不会被当作年份）
+_DATE_LINE_PATTERN = re.compile(
+    r'(published|received|accepted|revised|submitted|available online|copyright|©|\(c\)|'
+    r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+(\d{1,2},?\s+)?(19|20)\d\d|'
+    r'\d{4}\s*年)', re.IGNORECASE)
+_NAME_PATTERN = re.compile(r"^([A-Z][\w'’.\-]*\s+){1,3}[A-Z][\w'’\-]+$|^[一-鿿]{2,4}$")
+
+
+def find_date_year(lines: Iterable[str]) -> Optional[str]:
+    """在含日期信息的行（投稿/出版日期、版权声明等）中查找年份"""
+    for line in lines:
+        if _DATE_LINE_PATTERN.search(line):
+            year_match = _YEAR_PATTERN.search(line)
+            if year_match:
+                return year_match.group(1)
+    return None
+
+
+class LocalExtractor:
+    """
+    本地前置信息解析器（无网络请求）：
+    利用 pypdf 的文本访问器获取首页每行文字及字号，取字号最大的行作为标题，
+    紧随其后的行作为作者，并给出 0~1 的置信度；置信度不足时再交给大模型
+    """
+
+    def __init__(self, min_confidence: float = LOCAL_EXTRACTOR_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def collect_lines(page) -> Tuple[List[dict], str]:
+        """
+        提取首页文本行及其字号，按从上到下排序
+        返回: (行列表 [{"text", "size", "y"}], 页面纯文本)
+        """
+        fragments = []
+
+        def visitor(text, cm, tm, font_dict, font_size):
+            if not text or not text.strip():
+                return
+            scale = (abs(tm[3]) or abs(tm[0]) or 1.0) * (abs(cm[3]) or abs(cm[0]) or 1.0)
+            y = tm[5] * (cm[3] or 1.0) + cm[5]
+            fragments.append((round(y, 1), font_size * scale, text))
+
+        page_text = page.extract_text(visitor_text=visitor) or ""
+
+        lines: List[dict] = []
+        for y, size, text in fragments:
+            if lines and abs(lines[-1]["y"] - y) < 2:
+                line = lines[-1]
+                line["text"] += text
+                line["size"] = max(line["size"], size)
+            else:
+                lines.append({"y": y, "size": size, "text": text})
+        for line in lines:
+            line["text"] = " ".join(line["text"].split())
+        lines = [line for line in lines if line["text"]]
+        lines.sort(key=lambda line: -line["y"])
+        return lines, page_text
+
+    @staticmethod
+    def split_author_line(line: str) -> List[str]:
+        """拆分作者行，去掉上标数字、星号等标记"""
+        line = re.sub(r'[\d*†‡§¶,]+(?=\s*(,|and\b|&|$))', '', line)
+        parts = re.split(r',|;|\band\b|&|，|、', line)
+        authors = []
+        for part in parts:
+            name = re.sub(r'[\d*†‡§¶]+', '', part).strip(" .")
+            if name:
+                authors.append(name)
+        return authors
+
+    def extract_lines(self, lines: List[dict]) -> Tuple[str, list, Optional[str], float]:
+        """
+        根据文本行推断标题、作者、年份及置信度
+        年份只从标题上方的页眉行和含日期信息的行中查找
+        """
+        if not lines:
+            return "", [], None, 0.0
+
+        # 只在页面上半部分寻找标题，跳过期刊页眉
+        top = lines[:max(8, len(lines) // 2)]
+        candidates = [l for l in top if not _BANNER_PATTERN.search(l["text"]) and len(l["text"]) > 3]
+        if not candidates:
+            return "", [], None, 0.0
+        max_size = max(l["size"] for l in candidates)
+        body_size = median(l["size"] for l in lines)
+
+        # 标题：字号最大的连续行（标题可能折成多行）
+        start = next(i for i, l in enumerate(lines) if l in candidates and l["size"] >= max_size - 0.5)
+        end = start
+        while end + 1 < len(lines) and lines[end + 1]["size"] >= max_size - 0.5:
+            end += 1
+        title = " ".join(l["text"] for l in lines[start:end + 1])
+
+        # 作者：标题之后、单位信息之前的行
+        authors: List[str] = []
+        for line in lines[end + 1:end + 4]:
+            if _AFFILIATION_PATTERN.search(line["text"]) or line["text"].lower().startswith("abstract"):
+                break
+            authors.extend(self.split_author_line(line["text"]))
+
+        year = None
+        for line in lines[:start]:
+            year_match = _YEAR_PATTERN.search(line["text"])
+            if year_match:
+                year = year_match.group(1)
+                break
+        if year is None:
+            year = find_date_year(l["text"] for l in lines[start:])
+
+        # 置信度：字号差异、标题形态、作者形态、年份
+        confidence = 0.0
+        if body_size and max_size / body_size >= 1.3:
+            confidence += 0.4
+        elif body_size and max_size / body_size >= 1.1:
+            confidence += 0.2
+        words = title.split()
+        if 15 <= len(title) <= 250 and (2 <= len(words) <= 30 or re.search(r'[一-鿿]', title)):
+            confidence += 0.2
+        if authors and len(authors) <= 30:
+            names = sum(1 for a in authors if _NAME_PATTERN.match(a))
+            confidence += 0.3 * names / len(authors)
+        if year:
+            confidence += 0.1
+        return title, authors, year, round(confidence, 3)
+
+    def extract(self, reader) -> Tuple[str, list, Optional[str], float]:
+        """解析首页，返回 (title, authors, year, confidence)"""
+        if len(reader.pages) == 0:
+            return "", [], None, 0.0
+        lines, _ = self.collect_lines(reader.pages[0])
+        return self.extract_lines(lines)
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.min_confidence
@@ -0,0 +1,212 @@
+import json
+import re
+from typing import List, Optional, Tuple
+
+from .config import METADATA_REMOTE_LOOKUP, METADATA_LOOKUP_TIMEOUT
+from .local_extractor import find_date_year
+
+# 论文首页常见的 DOI / arXiv 编号
+DOI_PATTERN = re.compile(r'\b(10\.\d{4,9}/[^\s"<>]+)', re.IGNORECASE)
+ARXIV_PATTERN = re.compile(r'arXiv:\s*(\d{4}\.\d{4,5})(v\d+)?', re.IGNORECASE)
+
+# 明显不是论文标题的元数据（排版软件、文件名等留下的默认值）
+# 占位标题只匹配整个标题（"Main Results on ..."、"Title IX and ..." 这类真实标题不受影响）
+_BAD_TITLE_PATTERN = re.compile(
+    r'^(paper|main|title|untitled|document|slide)\s*\d*(\.\w+)?$|^microsoft word\b|\.(pdf|docx?|tex|dvi)$',
+    re.IGNORECASE)
+# "姓, 名" 形式的作者：姓为一个词（可带 van、de 等小写前缀），名为 1~3 个词或缩写
+_FAMILY_GIVEN_PATTERN = re.compile(r"^([a-z]+\s+)*[\w'’\-]+\s*,\s*[\w.'’\-]+(\s+[\w.'’\-]+){0,2}$")
+_BAD_AUTHORS = {"", "admin", "administrator", "user", "author", "unknown", "owner", "default"}
+
+
+class MetadataResolver:
+    """
+    分级解析器：在调用大模型之前，先尝试 PDF 自带的 /Info、XMP 元数据以及首页的 DOI/arXiv 编号
+    返回结果附带解析来源（tier），便于统计每个文件由哪一级解析
+    """
+
+    TIER_INFO = "info"
+    TIER_XMP = "xmp"
+    TIER_DOI = "doi"
+    TIER_ARXIV = "arxiv"
+    TIER_LLM = "llm"  # 由 BatchProcessor 在本地与远程解析均失败后调用大模型
+
+    def __init__(self, remote_lookup: bool = METADATA_REMOTE_LOOKUP,
+                 timeout: float = METADATA_LOOKUP_TIMEOUT):
+        self.remote_lookup = remote_lookup
+        self.timeout = timeout
+
+    def resolve_local(self, reader, text: str) -> Optional[Tuple[str, list, Optional[str], str]]:
+        """
+        只读取 /Info 与 XMP 元数据（不访问网络）
+        /Info 中没有出版日期（/CreationDate 是生成PDF的时间，扫描件、重新导出的文件与出版年份无关），
+        年份取自首页文本中含日期信息的行
+        """
+        for tier, reader_func in ((self.TIER_INFO, self._from_info), (self.TIER_XMP, self._from_xmp)):
+            try:
+                title, authors, year = reader_func(reader)
+            except Exception:
+                continue
+            if self.is_plausible(title, authors, text):
+                if year is None:
+                    year = find_date_year((text or "").splitlines())
+                return title, authors, year, tier
+        return None
+
+    def find_identifiers(self, reader, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        在首页中查找 DOI 和 arXiv 编号
+        前置文本只截取了开头部分，DOI 常出现在首页底部，必要时再扫描完整首页
+        """
+        page_text = text
+        if not self.find_doi(text) and not self.find_arxiv_id(text):
+            try:
+                page_text = reader.pages[0].extract_text() or ""
+            except Exception:
+                page_text = text
+        return self.find_doi(page_text), self.find_arxiv_id(page_text)
+
+    def resolve_identifiers(self, doi: Optional[str], arxiv_id: Optional[str]) -> Optional[Tuple[str, list, Optional[str], str]]:
+        """通过 Crossref / arXiv 查询 DOI 或 arXiv 编号对应的信息"""
+        if doi:
+            result = self._lookup_crossref(doi)
+            if result and self.is_plausible(result[0], result[1]):
+                return result + (self.TIER_DOI,)
+        if arxiv_id:
+            result = self._lookup_arxiv(arxiv_id)
+            if result and self.is_plausible(result[0], result[1]):
+                return result + (self.TIER_ARXIV,)
+        return None
+
+    # ---------- 本地元数据 ----------
+
+    def _from_info(self, reader) -> Tuple[str, list, Optional[str]]:
+        """读取 /Info 字典中的 /Title、/Author（不含年份，见 resolve_local）"""
+        info = reader.metadata
+        if info is None:
+            return "", [], None
+        title = (info.title or "").strip()
+        authors = self.split_authors(info.author or "")
+        return title, authors, None
+
+    def _from_xmp(self, reader) -> Tuple[str, list, Optional[str]]:
+        """读取 XMP 数据包中的 dc:title、dc:creator、dc:date"""
+        xmp = reader.xmp_metadata
+        if xmp is None:
+            return "", [], None
+        titles = xmp.dc_title or {}
+        title = (titles.get("x-default") or next(iter(titles.values()), "")).strip()
+        authors = [a.strip() for a in (xmp.dc_creator or []) if a and a.strip()]
+        year = None
+        dates = xmp.dc_date or []
+        if dates:
+            year = str(getattr(dates[0], "year", dates[0]))[:4]
+        return title, authors, year
+
+    @staticmethod
+    def split_authors(author_field: str) -> List[str]:
+        """
+        将元数据中的作者字段拆分为作者列表
+        作者之间通常以 ; 分隔（或 and、&），各项均为 "姓, 名" 形式（如 "Zhang, Alice; Li, Bob"）时
+        转换为 "名 姓"；否则逗号也视为作者之间的分隔符
+        """
+        if not author_field.strip():
+            return []
+        separator = ";" if ";" in author_field else r'\band\b|&'
+        parts = [p.strip() for p in re.split(separator, author_field) if p.strip()]
+        if parts and all(_FAMILY_GIVEN_PATTERN.match(p) for p in parts):
+            return [" ".join(reversed([s.strip() for s in p.split(",")])) for p in parts]
+        if separator != ";":
+            parts = [p.strip() for p in re.split(r',|\band\b|&', author_field) if p.strip()]
+        return parts
+
+    # ---------- 质量检查 ----------
+
+    @staticmethod
+    def _words(text: str) -> set:
+        return set(re.findall(r'\w+', text.lower()))
+
+    def is_plausible(self, title: str, authors: list, text: Optional[str] = None) -> bool:
+        """
+        判断元数据是否可以直接使用：
+        标题长度合理、不是文件名或软件默认值，作者非空；
+        给定首页文本时，标题中的大部分词必须出现在首页中
+        """
+        if not title or not (10 <= len(title) <= 300):
+            return False
+        if _BAD_TITLE_PATTERN.search(title.strip()):
+            return False
+        if len(title.split()) < 2 and not re.search(r'[一-鿿]', title):
+            return False
+        if not authors or all(a.strip().lower() in _BAD_AUTHORS for a in authors):
+            return False
+        if text:
+            title_words = self._words(title)
+            if title_words:
+                overlap = len(title_words & self._words(text)) / len(title_words)
+                if overlap < 0.6:
+                    return False
+        return True
+
+    # ---------- DOI / arXiv ----------
+
+    @staticmethod
+    def find_doi(text: str) -> Optional[str]:
+        """在首页文本中查找 DOI"""
+        match = DOI_PATTERN.search(text or "")
+        if not match:
+            return None
+        return match.group(1).rstrip('.,;)]}')
+
+    @staticmethod
+    def find_arxiv_id(text: str) -> Optional[str]:
+        """在首页文本中查找 arXiv 编号"""
+        match = ARXIV_PATTERN.search(text or "")
+        return match.group(1) if match else None
+
+    def _fetch(self, url: str, accept: str) -> bytes:
+        import urllib.request
+        request = urllib.request.Request(url, headers={"Accept": accept, "User-Agent": "pdf_to_title"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def _lookup_crossref(self, doi: str) -> Optional[Tuple[str, list, Optional[str]]]:
+        """通过 Crossref 查询 DOI 对应的标题、作者和年份"""
+        import urllib.parse
+        try:
+            url = "https://api.crossref.org/works/" + urllib.parse.quote(doi)
+            message = json.loads(self._fetch(url, "application/json"))["message"]
+        except Exception:
+            return None
+        title = (message.get("title") or [""])[0].strip()
+        authors = []
+        for author in message.get("author", []):
+            name = " ".join(p for p in (author.get("given"), author.get("family")) if p)
+            if name:
+                authors.append(name)
+        year = None
+        for key in ("published-print", "published-online", "issued"):
+            parts = (message.get(key) or {}).get("date-parts") or []
+            if parts and parts[0] and parts[0][0]:
+                year = str(parts[0][0])
+                break
+        return title, authors, year
+
+    def _lookup_arxiv(self, arxiv_id: str) -> Optional[Tuple[str, list, Optional[str]]]:
+        """通过 arXiv API 查询标题、作者和年份"""
+        import urllib.parse
+        import xml.etree.ElementTree as ET
+        try:
+            url = "https://export.arxiv.org/api/query?id_list=" + urllib.parse.quote(arxiv_id)
+            root = ET.fromstring(self._fetch(url, "application/atom+xml"))
+        except Exception:
+            return None
+        ns = {"atom": "http://www.w3.org/2005/Atom"}
+        entry = root.find("atom:entry", ns)
+        if entry is None:
+            return None
+        title = " ".join((entry.findtext("atom:title", "", ns) or "").split())
+        authors = [a.findtext("atom:name", "", ns).strip() for a in entry.findall("atom:author", ns)]
+        published = entry.findtext("atom:published", "", ns) or ""
+        year = published[:4] or None
+        return title, [a for a in authors if a], year
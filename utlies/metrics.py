@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+_NULL_CONTEXT = nullcontext()
+
+
+class RunMetrics:
+    """
+    运行指标：记录每个文件各阶段耗时（PDF打开、文本提取、大模型请求、响应解析、重命名），
+    以及重试次数、缓存命中和 token 用量；结束时可导出为 JSON-lines 或 Prometheus 文本格式
+    enabled 为 False 时所有记录方法直接返回，开销接近于零
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.events: List[dict] = []
+        self.counters: Dict[str, float] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, path: Optional[str] = None):
+        """计时上下文：with metrics.stage("llm_request", path): ..."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name, path)
+
+    @contextmanager
+    def _timed(self, name: str, path: Optional[str]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, path)
+
+    def record(self, name: str, seconds: float, path: Optional[str] = None):
+        """记录一次阶段耗时（用于子进程中测得后回传的耗时）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.events.append({"stage": name, "seconds": seconds, "path": path})
+
+    def incr(self, name: str, value: float = 1):
+        """累加计数器，例如 retries、cache_hits、prompt_tokens"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_usage(self, usage):
+        """记录 API 响应中的 token 用量（usage 对象或字典）"""
+        if not self.enabled or usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else (lambda key: getattr(usage, key, None))
+        self.incr("llm_requests")
+        self.incr("prompt_tokens", get("prompt_tokens") or 0)
+        self.incr("completion_tokens", get("completion_tokens") or 0)
+
+    # ---------- 汇总与导出 ----------
+
+    def summary(self) -> dict:
+        """按阶段汇总：次数、总耗时、p50/p95/p99"""
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        stages: Dict[str, List[float]] = {}
+        for event in events:
+            stages.setdefault(event["stage"], []).append(event["seconds"])
+        result = {}
+        for name, values in stages.items():
+            values.sort()
+            pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+            result[name] = {"count": len(values), "sum": sum(values),
+                            "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+        return {"elapsed": time.time() - self.started, "stages": result, "counters": counters}
+
+    def write_jsonl(self, fp):
+        """每个阶段事件一行，最后一行为汇总"""
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            fp.write(json.dumps(event, ensure_ascii=False) + "\n")
+        fp.write(json.dumps({"summary": self.summary()}, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, fp):
+        """以 Prometheus 文本格式输出汇总"""
+        summary = self.summary()
+        fp.write("# TYPE pdf_title_stage_seconds summary\n")
+        for name, row in summary["stages"].items():
+            for q in ("p50", "p95", "p99"):
+                quantile = {"p50": "0.5", "p95": "0.95", "p99": "0.99"}[q]
+                fp.write(f'pdf_title_stage_seconds{{stage="{name}",quantile="{quantile}"}} {row[q]:.6f}\n')
+            fp.write(f'pdf_title_stage_seconds_sum{{stage="{name}"}} {row["sum"]:.6f}\n')
+            fp.write(f'pdf_title_stage_seconds_count{{stage="{name}"}} {row["count"]}\n')
+        for name, value in summary["counters"].items():
+            fp.write(f"# TYPE pdf_title_{name}_total counter\n")
+            fp.write(f"pdf_title_{name}_total {value}\n")
+        fp.write(f"pdf_title_run_seconds {summary['elapsed']:.3f}\n")
+
+
+# 全局指标对象：默认关闭，由入口程序按需启用
+_current = RunMetrics(enabled=False)
+
+
+def get_metrics() -> RunMetrics:
+    return _current
+
+
+def set_metrics(metrics: RunMetrics) -> RunMetrics:
+    """替换全局指标对象，返回旧对象"""
+    global _current
+    previous, _current = _current, metrics
+    return previous
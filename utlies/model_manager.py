@@ -1,15 +1,26 @@
 import json
-from typing import Dict, Any, Tuple, Optional
-from .config import MODEL_CONFIGS, EXTRACTION_PROMPT
+from typing import Dict, Any, List, Tuple, Optional
+from .config import (MODEL_CONFIGS, EXTRACTION_PROMPT, BATCH_EXTRACTION_PROMPT,
+                     BATCH_OUTPUT_TOKENS_PER_DOC, FRONT_MATTER_TOKEN_BUDGET,
+                     STRUCTURED_OUTPUT_ENABLED, STRUCTURED_MAX_TOKENS, STRUCTURED_EXTRACTION_PROMPT,
+                     STRUCTURED_BATCH_EXTRACTION_PROMPT, PAPER_INFO_SCHEMA)
 from .api_key_manager import APIKeyManager
+from .metrics import get_metrics
+from .snippet_selector import estimate_tokens
+
+
+class ResponseParseError(ValueError):
+    """模型回复无法解析或不完整（与密钥缺失等配置错误区分，只有这类错误值得重试）"""
 
 
 class ModelManager:
     """模型管理器，支持多种大语言模型提供商"""
 
-    def __init__(self, provider: str = "zhipu", model_name: str = "glm-4.5-flash"):
+    def __init__(self, provider: str = "zhipu", model_name: str = "glm-4.5-flash",
+                 structured_output: bool = STRUCTURED_OUTPUT_ENABLED):
         self.provider = provider
         self.model_name = model_name
+        self.structured_output = structured_output
         self.config = MODEL_CONFIGS.get(provider, MODEL_CONFIGS["zhipu"])
         self.api_key_manager = APIKeyManager()
         self.client = None  # 不在初始化时创建客户端
@@ -70,6 +81,10 @@ class ModelManager:
             self.client = self._initialize_client()
         return self.client
 
+    def check_ready(self):
+        """提前初始化客户端：API密钥缺失或未安装 SDK 时立即报错（ValueError / ImportError）"""
+        self._get_client()
+
     def extract_info(self, context: str) -> Tuple[str, list, Optional[str]]:
         """
         使用大语言模型提取论文信息
@@ -77,7 +92,9 @@ class ModelManager:
         """
         # 确保客户端已初始化
         client = self._get_client()
-        
+
+        if self._response_format_type() is not None:
+            return self._extract_structured(context)
         if self.provider == "zhipu":
             return self._extract_with_zhipu(context)
         else:
@@ -85,36 +102,202 @@ class ModelManager:
 
     def _extract_with_zhipu(self, context: str) -> Tuple[str, list, Optional[str]]:
         """使用智谱AI模型提取信息"""
-        client = self._get_client()
         model_config = self.config["models"][self.model_name]
-        response = client.chat.completions.create(
-            model=self.model_name,
-            messages=[
+        content = self._create_completion(
+            [
                 {"role": "assistant", "content": EXTRACTION_PROMPT},
                 {"role": "user", "content": context}
             ],
-            max_tokens=model_config["max_tokens"],
-            temperature=model_config["temperature"],
-            thinking={
-                "type": "disabled",
-            }
+            max_tokens=model_config["max_tokens"]
         )
-        return self._parse_response(response.choices[0].message.content)
+        with get_metrics().stage("response_parse"):
+            return self._parse_response(content)
 
     def _extract_with_openai(self, context: str) -> Tuple[str, list, Optional[str]]:
         """使用OpenAI兼容接口的模型提取信息"""
-        client = self._get_client()
         model_config = self.config["models"][self.model_name]
-        response = client.chat.completions.create(
-            model=self.model_name,
-            messages=[
+        content = self._create_completion(
+            [
                 {"role": "assistant", "content": EXTRACTION_PROMPT},
                 {"role": "user", "content": context}
             ],
-            max_tokens=model_config["max_tokens"],
-            temperature=model_config["temperature"]
+            max_tokens=model_config["max_tokens"]
+        )
+        with get_metrics().stage("response_parse"):
+            return self._parse_response(content)
+
+    def _response_format_type(self) -> Optional[str]:
+        """当前模型可用的结构化输出方式；未启用结构化输出时返回 None"""
+        if not self.structured_output:
+            return None
+        return self.config["models"][self.model_name].get("response_format")
+
+    def _response_format(self, batch: bool = False) -> Optional[dict]:
+        """构造 response_format 参数：支持 JSON Schema 时约束单篇结果的结构，否则使用 JSON 模式"""
+        format_type = self._response_format_type()
+        if format_type == "json_schema" and not batch:
+            return {"type": "json_schema",
+                    "json_schema": {"name": "paper_info", "strict": True, "schema": PAPER_INFO_SCHEMA}}
+        if format_type is not None:
+            return {"type": "json_object"}
+        return None
+
+    def _extract_structured(self, context: str) -> Tuple[str, list, Optional[str]]:
+        """结构化输出模式：指令放在 system 角色，使用 JSON 模式，并限制 max_tokens"""
+        model_config = self.config["models"][self.model_name]
+        content = self._create_completion(
+            [
+                {"role": "system", "content": STRUCTURED_EXTRACTION_PROMPT},
+                {"role": "user", "content": context}
+            ],
+            max_tokens=min(model_config["max_tokens"], STRUCTURED_MAX_TOKENS),
+            response_format=self._response_format()
+        )
+        with get_metrics().stage("response_parse"):
+            return self._parse_response(content)
+
+    def _create_completion(self, messages: list, max_tokens: int,
+                           response_format: Optional[dict] = None) -> str:
+        """发送一次对话请求，返回模型回复内容"""
+        client = self._get_client()
+        model_config = self.config["models"][self.model_name]
+        kwargs = {}
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        if self.provider == "zhipu":
+            kwargs["thinking"] = {"type": "disabled"}
+        metrics = get_metrics()
+        with metrics.stage("llm_request"):
+            response = client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=model_config["temperature"],
+                **kwargs
+            )
+        metrics.record_usage(getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    # ---------- 批量提取 ----------
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """估算 token 数"""
+        return estimate_tokens(text)
+
+    def prompt_token_budget(self) -> int:
+        """当前模型的前置文本 token 预算"""
+        return self.config["models"][self.model_name].get("prompt_token_budget", FRONT_MATTER_TOKEN_BUDGET)
+
+    def batch_size(self) -> int:
+        """当前模型每次请求最多打包的文档数（同时受输出 token 上限 max_tokens 限制）"""
+        model_config = self.config["models"][self.model_name]
+        by_output = max(1, model_config["max_tokens"] // BATCH_OUTPUT_TOKENS_PER_DOC)
+        return min(model_config.get("batch_size", 1), by_output)
+
+    def max_concurrency(self) -> Optional[int]:
+        """客户端自身控制的并发请求上限；同步客户端没有并发控制，返回 None"""
+        return None
+
+    def _split_batches(self, contexts: Dict[str, str]) -> List[Dict[str, str]]:
+        """按 batch_size 与上下文窗口将文档分组"""
+        model_config = self.config["models"][self.model_name]
+        window = model_config.get("context_window", 8192)
+        limit = self.batch_size()
+        budget = window - self.estimate_tokens(BATCH_EXTRACTION_PROMPT)
+        batches, current, used = [], {}, 0
+        for doc_id, context in contexts.items():
+            cost = self.estimate_tokens(context) + BATCH_OUTPUT_TOKENS_PER_DOC + 10
+            if current and (len(current) >= limit or used + cost > budget):
+                batches.append(current)
+                current, used = {}, 0
+            current[doc_id] = context
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def extract_batch(self, contexts: Dict[str, str], max_retries: int = 1) -> Dict[str, Tuple[str, list, Optional[str]]]:
+        """
+        将多篇文档的前置文本打包进一次请求，减少请求次数
+        contexts: {文档编号: 文本}
+        返回: {文档编号: (title, authors, year)}；缺失或格式错误的条目会单独重试，
+        重试后仍失败的编号不会出现在返回结果中
+        只有回复无法解析（ResponseParseError）时才重试；密钥缺失、认证、网络、额度等错误直接抛出
+        """
+        results = {}
+        remaining = dict(contexts)
+        for attempt in range(max_retries + 1):
+            if not remaining:
+                break
+            for batch in self._split_batches(remaining):
+                if len(batch) == 1:
+                    # 单篇文档直接走普通提取接口
+                    doc_id, context = next(iter(batch.items()))
+                    try:
+                        results[doc_id] = self.extract_info(context)
+                    except ResponseParseError:
+                        pass
+                    continue
+                try:
+                    results.update(self._extract_one_batch(batch))
+                except ResponseParseError:
+                    continue
+            remaining = {k: v for k, v in remaining.items() if k not in results}
+            if remaining and attempt < max_retries:
+                get_metrics().incr("llm_retries", len(remaining))
+        return results
+
+    def _extract_one_batch(self, batch: Dict[str, str]) -> Dict[str, Tuple[str, list, Optional[str]]]:
+        """发送一次批量请求，只返回通过校验的条目"""
+        user_content = "\n\n".join(f"### 文档 {doc_id}\n{context}" for doc_id, context in batch.items())
+        response_format = self._response_format(batch=True)
+        prompt = STRUCTURED_BATCH_EXTRACTION_PROMPT if response_format else BATCH_EXTRACTION_PROMPT
+        content = self._create_completion(
+            [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": user_content}
+            ],
+            max_tokens=min(BATCH_OUTPUT_TOKENS_PER_DOC * len(batch),
+                           self.config["models"][self.model_name]["max_tokens"]),
+            response_format=response_format
         )
-        return self._parse_response(response.choices[0].message.content)
+        with get_metrics().stage("response_parse"):
+            return self._parse_batch_response(content, batch.keys())
+
+    @staticmethod
+    def _parse_batch_response(response_content: str, expected_ids) -> Dict[str, Tuple[str, list, Optional[str]]]:
+        """解析并校验批量回复：只保留编号有效且标题、作者完整的条目"""
+        text = response_content.strip()
+        try:
+            data = json.loads(text)
+            if isinstance(data, dict):
+                # JSON 模式只允许返回对象，结果数组包在 "results" 字段中
+                data = data.get("results", [])
+        except json.JSONDecodeError:
+            start, end = text.find("["), text.rfind("]")
+            try:
+                data = json.loads(text[start:end + 1]) if 0 <= start < end else None
+            except json.JSONDecodeError:
+                data = None
+        if not isinstance(data, list):
+            raise ResponseParseError("无法解析批量响应内容")
+        expected = {str(doc_id) for doc_id in expected_ids}
+        results = {}
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            doc_id = str(item.get("id", ""))
+            title = item.get("title")
+            authors = item.get("authors")
+            if doc_id not in expected or not isinstance(title, str) or not title.strip():
+                continue
+            if not isinstance(authors, list) or not authors or not all(isinstance(a, str) for a in authors):
+                continue
+            year = item.get("year")
+            results[doc_id] = (title.strip(), [a.strip() for a in authors if a.strip()],
+                               str(year) if year else None)
+        return results
 
     def _parse_response(self, response_content: str) -> Tuple[str, list, Optional[str]]:
         """解析模型响应"""
@@ -122,6 +305,8 @@ class ModelManager:
             # 尝试直接解析JSON
             import json
             data = json.loads(response_content)
+            if not isinstance(data, dict):
+                raise ResponseParseError("无法解析模型响应内容")
             title = data.get("title", "")
             authors = data.get("authors", [])
             year = data.get("year", None)
@@ -137,7 +322,7 @@ class ModelManager:
                     year = response_content.split('"year": "')[1].split('"')[0]
                 return title, authors, year
             except Exception:
-                raise ValueError("无法解析模型响应内容")
+                raise ResponseParseError("无法解析模型响应内容")
 
     @classmethod
     def list_providers(cls) -> Dict[str, str]:
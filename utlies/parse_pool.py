@@ -0,0 +1,259 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, CancelledError
+from multiprocessing.connection import wait
+from typing import Callable, Optional
+
+from .config import (PARSE_TIMEOUT, PARSE_MAX_RSS_MB, PARSE_MAX_TASKS_PER_WORKER, PARSE_START_METHOD)
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# 检查超时与内存占用的间隔（秒）
+_CHECK_INTERVAL = 0.1
+
+
+def _worker_main(conn, max_tasks: Optional[int]):
+    """工作进程：逐个接收任务并通过管道回传结果，处理 max_tasks 个任务后退出（由主进程补充新进程）"""
+    done = 0
+    while max_tasks is None or done < max_tasks:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            message = ("ok", fn(*args))
+        except BaseException as e:
+            message = ("error", e)
+        try:
+            conn.send(message)
+        except Exception as e:
+            # 结果或异常无法序列化时只回传错误描述
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+        done += 1
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """读取进程常驻内存（仅 Linux 的 /proc 可用，其他平台返回 None）"""
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    def __init__(self, context, max_tasks: Optional[int]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, max_tasks), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.future: Optional[Future] = None
+        self.started = 0.0
+        self.remaining = max_tasks
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ParsePool:
+    """
+    PDF 解析进程池：解析在独立的工作进程中运行，接口与 concurrent.futures 的进程池相同（submit 返回 Future）
+    - 单个文件超过 timeout 秒或工作进程内存超过 max_rss_mb 时结束该进程，文件记为失败
+    - 每个工作进程处理 max_tasks_per_worker 个文件后自动替换，避免内存碎片和泄漏累积
+    - 工作进程崩溃（段错误、被系统杀死等）只影响正在处理的那个文件
+    工作进程按需启动，可在多个批次之间复用，用完后调用 shutdown
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 timeout: Optional[float] = PARSE_TIMEOUT,
+                 max_rss_mb: Optional[float] = PARSE_MAX_RSS_MB,
+                 max_tasks_per_worker: Optional[int] = PARSE_MAX_TASKS_PER_WORKER,
+                 start_method: Optional[str] = PARSE_START_METHOD):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._context = multiprocessing.get_context(start_method)
+        self._queue = deque()  # (future, fn, args)
+        self._workers = []
+        self._lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = self._context.Pipe(duplex=False)
+        self._shutdown = False
+        self._kill_busy = False
+        self._thread = threading.Thread(target=self._dispatch, name="parse-pool", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("解析进程池已关闭")
+            self._queue.append((future, fn, args))
+        self._wake()
+        return future
+
+    def cancel_pending(self):
+        """取消排队中的任务，并结束正在处理文件的工作进程（用于用户取消批处理）"""
+        with self._lock:
+            queued = list(self._queue)
+            self._queue.clear()
+            self._kill_busy = True
+        for future, _, _ in queued:
+            future.cancel()
+        self._wake()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        if cancel_futures:
+            self.cancel_pending()
+        with self._lock:
+            self._shutdown = True
+        self._wake()
+        if wait:
+            self._thread.join()
+
+    def _wake(self):
+        try:
+            self._wakeup_w.send(None)
+        except OSError:
+            pass
+
+    # ---------- 调度线程 ----------
+
+    def _dispatch(self):
+        last_check = time.monotonic()
+        while True:
+            if self._kill_busy:
+                self._kill_busy = False
+                self._kill_all_busy()
+            with self._lock:
+                busy = [w for w in self._workers if w.future is not None]
+                if self._shutdown and not self._queue and not busy:
+                    break
+                self._assign()
+                workers = list(self._workers)
+            objects = [self._wakeup_r] + [w.conn for w in workers if w.future is not None]
+            objects += [w.process.sentinel for w in workers]
+            ready = wait(objects, timeout=_CHECK_INTERVAL)
+            if self._wakeup_r in ready:
+                while self._wakeup_r.poll():
+                    self._wakeup_r.recv()
+            for worker in workers:
+                if worker.future is not None and (worker.conn in ready or worker.process.sentinel in ready):
+                    self._collect(worker)
+                if worker.process.sentinel in ready:
+                    self._reap(worker)
+            now = time.monotonic()
+            if now - last_check >= _CHECK_INTERVAL:
+                last_check = now
+                self._enforce_limits(now)
+
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _assign(self):
+        """把排队的任务分给空闲进程，进程不足时按需启动（调用时持有锁）"""
+        while self._queue:
+            idle = next((w for w in self._workers if w.future is None and w.remaining != 0), None)
+            if idle is None:
+                if len(self._workers) >= self.max_workers:
+                    return
+                idle = _Worker(self._context, self.max_tasks_per_worker)
+                self._workers.append(idle)
+            future, fn, args = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                idle.conn.send((fn, args))
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            idle.future = future
+            idle.started = time.monotonic()
+            if idle.remaining is not None:
+                idle.remaining -= 1
+
+    def _collect(self, worker: _Worker):
+        """读取工作进程回传的结果；管道已断开说明进程崩溃"""
+        future = worker.future
+        try:
+            if not worker.conn.poll():
+                return
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            return  # 由 _reap 按崩溃处理
+        worker.future = None
+        if status == "ok":
+            future.set_result(payload)
+        else:
+            future.set_exception(payload)
+
+    def _reap(self, worker: _Worker):
+        """工作进程退出：正常到期直接移除；正在处理文件时按崩溃处理"""
+        worker.process.join()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        if worker.future is not None:
+            exitcode = worker.process.exitcode
+            logger.warning("PDF 解析进程异常退出（退出码 %s）", exitcode)
+            get_metrics().incr("parse_crashes")
+            worker.future.set_exception(RuntimeError(f"PDF 解析进程异常退出（退出码 {exitcode}）"))
+            worker.future = None
+        worker.conn.close()
+        self._wake()
+
+    def _kill_all_busy(self):
+        with self._lock:
+            busy = [w for w in self._workers if w.future is not None]
+            for worker in busy:
+                self._workers.remove(worker)
+        for worker in busy:
+            future, worker.future = worker.future, None
+            worker.kill()
+            future.set_exception(CancelledError())
+
+    def _enforce_limits(self, now: float):
+        """结束超时或内存超限的工作进程，对应文件记为失败"""
+        with self._lock:
+            busy = [w for w in self._workers if w.future is not None]
+        for worker in busy:
+            error = None
+            if self.timeout is not None and now - worker.started > self.timeout:
+                error = TimeoutError(f"PDF 解析超时（超过 {self.timeout:g} 秒）")
+                get_metrics().incr("parse_timeouts")
+            elif self.max_rss is not None:
+                rss = _rss_bytes(worker.process.pid)
+                if rss is not None and rss > self.max_rss:
+                    error = MemoryError(f"PDF 解析内存超限（{rss // (1024 * 1024)} MB）")
+                    get_metrics().incr("parse_memory_kills")
+            if error is None:
+                continue
+            with self._lock:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+            future, worker.future = worker.future, None
+            worker.kill()
+            future.set_exception(error)
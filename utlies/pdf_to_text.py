@@ -1,11 +1,73 @@
-from pypdf import PdfReader
+import mmap
+import os
+from typing import Optional, TYPE_CHECKING
 
-#该函数的主要作用就是：将pdf转化为text,并且输出前1000个字符。
-def pdf_to_text(pdf_path):
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
+from .config import PDF_USE_MMAP
 
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+
+
+def open_pdf(pdf_path, use_mmap: bool = PDF_USE_MMAP) -> "PdfReader":
+    """
+    打开PDF文件，返回可复用的 PdfReader（用于同时读取正文与元数据）
+    pypdf 收到文件路径时会把整个文件读入内存；use_mmap 为 True 时改用只读内存映射作为数据源，
+    只有实际访问到的部分（xref、trailer 和用到的页面对象）才会从磁盘读入，用完后调用 close_pdf 释放映射
+    """
+    # pypdf 导入较慢，只在真正打开PDF时导入
+    from pypdf import PdfReader
+    if use_mmap and isinstance(pdf_path, (str, os.PathLike)):
+        with open(pdf_path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                mapped = None  # 空文件或不支持映射的文件系统，退回普通读取
+        if mapped is not None:
+            try:
+                return PdfReader(mapped)
+            except Exception:
+                mapped.close()
+                raise
+    return PdfReader(pdf_path)
+
+
+def close_pdf(reader: "PdfReader"):
+    """释放 open_pdf 创建的内存映射（Windows 上映射未释放时文件无法重命名）"""
+    if isinstance(reader.stream, mmap.mmap):
+        reader.stream.close()
+
+
+def extract_text(reader: "PdfReader", max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                 start_page: int = 0) -> str:
+    """
+    从已打开的 PdfReader 中提取文本
+    指定 max_pages / max_chars 时只解析前几页，凑够字符预算后立即停止，避免解析用不到的正文
+    start_page 用于跳过已经解析过的页面
+    """
+    parts = []
+    length = 0
+    for i in range(start_page, len(reader.pages)):
+        if max_pages is not None and i >= max_pages:
+            break
+        page = reader.pages[i]
+        page_text = (page.extract_text() or "") + "\n"
+        parts.append(page_text)
+        length += len(page_text)
+        if max_chars is not None and length >= max_chars:
+            break
+
+    text = "".join(parts)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text
+
+
+#该函数的主要作用就是：将pdf转化为text。
+def pdf_to_text(pdf_path, max_pages: Optional[int] = None, max_chars: Optional[int] = None):
+    reader = open_pdf(pdf_path)
+    try:
+        text = extract_text(reader, max_pages=max_pages, max_chars=max_chars)
+    finally:
+        close_pdf(reader)
     # print(len(text))
-    return text
\ No newline at end of file
+    return text
@@ -0,0 +1,218 @@
+import glob
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+from .config import RENAME_UNDO_LOG, RENAME_MAX_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+# 本进程中正在执行的批次的日志路径（恢复时跳过）
+_active_batches = set()
+
+
+def move_no_clobber(src: str, dst: str):
+    """
+    重命名文件，目标已存在时抛出 FileExistsError 而不是覆盖
+    优先用硬链接 + 删除源文件（os.link 在目标存在时原子地失败）；
+    文件系统不支持硬链接时退回到 检查 + os.rename
+    """
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError:
+        if os.path.lexists(dst):
+            raise FileExistsError(f"目标文件已存在: {dst}")
+        os.rename(src, dst)
+        return
+    os.unlink(src)
+
+
+class RenamePlanner:
+    """
+    重命名计划器：先为整批文件计算完整的 旧路径 -> 新路径 映射，再一次性执行
+    - 同一批次内或与目录中已有文件重名时，按原路径排序依次添加 _2、_3 ... 后缀（结果与处理完成顺序无关）
+    - 每个目录只列出一次，避免在网络文件系统上逐个文件检查
+    - 执行前把计划写入预写式撤销日志；批次中途失败时回滚已完成的重命名，
+      进程崩溃后下次执行时根据日志回滚未提交的批次
+    - 每个批次单独一个日志文件（<撤销日志名>.<批次号>.jsonl），提交后删除；
+      同一目录中的多个进程互不影响，只回滚创建者进程已退出的批次
+    - undo_log_path 为文件名（相对路径）时日志写在被重命名文件所在的目录中（批次涉及多个目录时每个目录一个），
+      与从哪个工作目录启动无关；为绝对路径时所有日志都写在该位置
+    - undo_log_path 为 None 时不写撤销日志（由调用方自行记录进度，例如共享任务队列）
+    """
+
+    def __init__(self, undo_log_path: Optional[str] = RENAME_UNDO_LOG, max_suffix: int = RENAME_MAX_SUFFIX):
+        self.undo_log_path = undo_log_path
+        self.max_suffix = max_suffix
+
+    def plan(self, items: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        items: (原路径, 期望的新文件名)
+        返回: {原路径: 新路径}；新文件名（含编号后缀）与原文件名相同时新路径等于原路径
+        """
+        listings: Dict[str, set] = {}
+        mapping = {}
+        for old_path, name in sorted(items):
+            directory = os.path.dirname(old_path)
+            taken = listings.get(directory)
+            if taken is None:
+                taken = {os.path.normcase(n) for n in os.listdir(directory or ".")}
+                listings[directory] = taken
+            # 文件自己的当前名称不算冲突：已按计划命名过的文件再次运行时保持原名（计划是幂等的）
+            own = os.path.normcase(os.path.basename(old_path))
+            taken.discard(own)
+            name = self._disambiguate(name, taken)
+            taken.add(os.path.normcase(name))
+            mapping[old_path] = old_path if os.path.normcase(name) == own else os.path.join(directory, name)
+        return mapping
+
+    def _disambiguate(self, name: str, taken: set) -> str:
+        """为重名的文件名添加编号后缀"""
+        if os.path.normcase(name) not in taken:
+            return name
+        base, ext = os.path.splitext(name)
+        for n in range(2, self.max_suffix + 1):
+            candidate = f"{base}_{n}{ext}"
+            if os.path.normcase(candidate) not in taken:
+                return candidate
+        raise FileExistsError(f"同名文件过多: {name}")
+
+    def apply(self, mapping: Dict[str, str], atomic: bool = True) -> Dict[str, Optional[Exception]]:
+        """
+        执行重命名计划，返回每个原路径对应的错误（成功为 None）
+        atomic 为 True 时任一文件失败即回滚本批次已完成的重命名，整批视为失败
+        """
+        results: Dict[str, Optional[Exception]] = {old: None for old in mapping}
+        ops = [(old, new) for old, new in mapping.items() if old != new]
+        if not ops:
+            return results
+
+        log_paths = []
+        if self.undo_log_path is not None:
+            by_directory: Dict[str, list] = {}
+            for old, new in ops:
+                by_directory.setdefault(os.path.dirname(old), []).append((old, new))
+            for directory, directory_ops in by_directory.items():
+                self.recover(directory)
+                log_paths.append(self._write_log(directory, directory_ops))
+
+        try:
+            done = []
+            failure = None
+            for old, new in ops:
+                try:
+                    move_no_clobber(old, new)
+                    done.append((old, new))
+                except Exception as e:
+                    results[old] = e
+                    if atomic:
+                        failure = e
+                        break
+
+            if failure is not None:
+                for old, new in reversed(done):
+                    try:
+                        move_no_clobber(new, old)
+                        results[old] = RuntimeError(f"同批次中其他文件重命名失败，已回滚: {failure}")
+                    except Exception as e:
+                        logger.error("回滚失败 %s -> %s: %s", new, old, e)
+                for old, _ in ops:
+                    if results[old] is None:
+                        results[old] = RuntimeError(f"同批次中其他文件重命名失败，未执行: {failure}")
+        except BaseException:
+            # 执行途中被中断（KeyboardInterrupt 等）时保留日志，由之后的 recover 回滚
+            _active_batches.difference_update(log_paths)
+            raise
+        # 批次已提交：删除本批次的日志（每个批次的日志只由创建它的进程写入和删除）
+        for log_path in log_paths:
+            os.unlink(log_path)
+            _active_batches.discard(log_path)
+        return results
+
+    def _log_root(self, directory: str) -> Tuple[str, str]:
+        """directory 中的文件所用撤销日志的 (路径前缀, 扩展名)"""
+        path = self.undo_log_path
+        if not os.path.isabs(path):
+            path = os.path.join(directory or ".", path)
+        return os.path.splitext(path)
+
+    def _write_log(self, directory: str, ops: list) -> str:
+        """为 directory 中的重命名写入本批次的日志，返回日志路径"""
+        root, ext = self._log_root(directory)
+        log_path = f"{root}.{uuid.uuid4().hex}{ext}"
+        _active_batches.add(log_path)
+        # 先写入临时文件再改名，其他进程恢复时只会看到完整的计划
+        entries = [{"op": "owner", "host": socket.gethostname(), "pid": os.getpid()}]
+        entries += [{"op": "plan", "old": old, "new": new} for old, new in ops]
+        with open(log_path + ".tmp", "w", encoding="utf-8") as log:
+            log.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(log_path + ".tmp", log_path)
+        return log_path
+
+    def recover(self, directory: str = ".") -> int:
+        """
+        回滚 directory 中未提交的批次（执行重命名途中进程崩溃），返回回滚的文件数
+        只处理本机上创建者进程已经退出的批次；其他进程正在执行的批次和其他主机的批次保持不动
+        """
+        if self.undo_log_path is None:
+            return 0
+        root, ext = self._log_root(directory)
+        restored = 0
+        for log_path in glob.glob(glob.escape(root) + ".*" + glob.escape(ext)):
+            if log_path in _active_batches:
+                continue
+            try:
+                with open(log_path, "r", encoding="utf-8") as f:
+                    entries = [json.loads(line) for line in f]
+            except (OSError, ValueError):
+                continue
+            owner = entries[0] if entries and entries[0].get("op") == "owner" else None
+            if owner is None or owner["host"] != socket.gethostname() or _process_alive(owner["pid"]):
+                continue
+            # 计划中的新路径在执行前不存在，因此“新路径存在而原路径不存在”说明已经重命名过
+            for entry in reversed(entries[1:]):
+                old, new = entry["old"], entry["new"]
+                if os.path.lexists(new) and not os.path.lexists(old):
+                    try:
+                        move_no_clobber(new, old)
+                        restored += 1
+                    except OSError as e:
+                        logger.error("回滚失败 %s -> %s: %s", new, old, e)
+            try:
+                os.unlink(log_path)
+            except FileNotFoundError:
+                pass  # 其他进程同时完成了恢复
+        if restored:
+            logger.warning("已回滚中断的重命名批次：%d 个文件", restored)
+        return restored
+
+
+def _process_alive(pid: int) -> bool:
+    """本机上的进程是否仍在运行（本进程中未提交的批次由 _active_batches 单独判断）"""
+    if pid == os.getpid():
+        return False
+    if os.name == "nt":
+        # Windows 上 os.kill 会直接结束目标进程，改用 OpenProcess 查询
+        import ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # 拒绝访问：进程存在但属于其他用户
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
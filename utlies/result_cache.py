@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Optional, Tuple
+
+from .config import CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_MAX_AGE_DAYS, PROMPT_VERSION
+
+
+def file_sha256(pdf_path: str, chunk_size: int = 1 << 20) -> str:
+    """计算文件内容的 SHA-256，用作内容寻址缓存的键"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    提取结果的持久化缓存（SQLite）
+    键为 文件内容哈希 + 提供商/模型/提示词版本，值为 (title, authors, year)
+    按条目数和存活时间淘汰，并统计命中/未命中次数
+    """
+
+    def __init__(self, db_path: str = CACHE_PATH,
+                 max_entries: int = CACHE_MAX_ENTRIES,
+                 max_age_days: float = CACHE_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        import sqlite3
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, title TEXT, authors TEXT, year TEXT,"
+            " created REAL, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON results(accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(content_hash: str, provider: str, model_name: str,
+                 prompt_version: str = PROMPT_VERSION) -> str:
+        """组合缓存键：更换模型或提示词后旧结果自动失效"""
+        return f"{content_hash}:{provider}:{model_name}:{prompt_version}"
+
+    def get(self, key: str) -> Optional[Tuple[str, list, Optional[str]]]:
+        """读取缓存，过期条目视为未命中"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, authors, year, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[3] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        title, authors, year, _ = row
+        return title, json.loads(authors), year
+
+    def put(self, key: str, title: str, authors: list, year: Optional[str]):
+        """写入缓存，并按需淘汰"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, title, authors, year, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, title, json.dumps(authors, ensure_ascii=False), year, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """删除过期条目；超出容量时删除最久未访问的条目"""
+        self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.max_age_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN"
+                " (SELECT key FROM results ORDER BY accessed ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self) -> dict:
+        """返回命中统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,252 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Optional
+
+from .config import (ROUTER_TIMEOUT, ROUTER_HEDGE_PERCENTILE, ROUTER_HEDGE_MIN_SAMPLES,
+                     ROUTER_FAILURE_THRESHOLD, ROUTER_COOLDOWN, ROUTER_WINDOW)
+from .metrics import get_metrics
+
+
+class RouteStats:
+    """单个 提供商/模型 的延迟与错误统计（滑动窗口）"""
+
+    def __init__(self, window: int = ROUTER_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= ROUTER_FAILURE_THRESHOLD:
+                # 连续失败后暂时熔断，冷却期内不再优先路由
+                self.unhealthy_until = time.monotonic() + ROUTER_COOLDOWN
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class ProviderRouter:
+    """
+    多提供商路由：按有序或加权列表选择 提供商/模型，出错或超时时自动切换到下一个；
+    可选对冲请求：主请求耗时超过该路由的延迟分位数后，向下一个提供商再发一份，取先返回的结果
+    对外接口与 ModelManager 相同（extract_info / extract_batch），可直接交给 BatchProcessor 使用
+
+    routes: [{"provider": "zhipu", "model": "glm-4.5-flash", "weight": 1.0}, ...]
+    mode: "ordered" 按列表顺序优先；"weighted" 按 延迟/权重 与错误率排序，流量倾向最快的健康后端
+    """
+
+    def __init__(self, routes: List[dict], mode: str = "ordered", hedge: bool = False,
+                 timeout: float = ROUTER_TIMEOUT,
+                 manager_factory: Optional[Callable] = None):
+        if not routes:
+            raise ValueError("至少需要配置一个提供商")
+        if manager_factory is None:
+            from .async_client import AsyncModelManager
+            manager_factory = AsyncModelManager
+        self.mode = mode
+        self.hedge = hedge
+        self.timeout = timeout
+        self.routes = []
+        for route in routes:
+            route = dict(route)
+            route.setdefault("weight", 1.0)
+            route["manager"] = manager_factory(provider=route["provider"], model_name=route["model"])
+            route["stats"] = RouteStats()
+            self.routes.append(route)
+        self.provider = "router"
+        self.model_name = "+".join(f"{r['provider']}/{r['model']}" for r in self.routes)
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="router")
+        self._lock = threading.Lock()
+
+    # ---------- 与 ModelManager 兼容的接口 ----------
+
+    def check_ready(self):
+        """初始化所有路由的客户端，缺少密钥的路由被移除；全部不可用时报错"""
+        usable, errors = [], []
+        for route in self.routes:
+            try:
+                route["manager"].check_ready()
+                usable.append(route)
+            except (ValueError, ImportError) as e:
+                errors.append(str(e))
+        if not usable:
+            raise ValueError("没有可用的模型提供商:\n" + "\n".join(errors))
+        self.routes = usable
+
+    def batch_size(self) -> int:
+        return min(route["manager"].batch_size() for route in self.routes)
+
+    def prompt_token_budget(self) -> int:
+        return min(route["manager"].prompt_token_budget() for route in self.routes)
+
+    def max_concurrency(self) -> Optional[int]:
+        limits = [route["manager"].max_concurrency() for route in self.routes]
+        return sum(limit for limit in limits if limit) or None
+
+    def extract_info(self, context: str):
+        result, _ = self._call("extract_info", (context,))
+        return result
+
+    def extract_batch(self, contexts: dict, max_retries: int = 1) -> dict:
+        """批量提取；某个路由只返回了部分文档的结果时，其余文档交给尚未尝试过的路由"""
+        results = {}
+        remaining = dict(contexts)
+        tried = set()
+        while remaining:
+            try:
+                partial, attempted = self._call("extract_batch", (remaining, max_retries), exclude=tried)
+            except Exception:
+                if results:
+                    break  # 已有部分结果：缺失的文档由调用方标记为失败
+                raise
+            tried.update(attempted)
+            results.update(partial)
+            remaining = {k: v for k, v in remaining.items() if k not in results}
+            if remaining and len(tried) < len(self.routes):
+                get_metrics().incr("router_failovers")
+        return results
+
+    # ---------- 路由 ----------
+
+    def _ranked_routes(self) -> List[dict]:
+        """按健康状况和路由模式排序候选路由"""
+        healthy = [r for r in self.routes if r["stats"].healthy()]
+        unhealthy = [r for r in self.routes if not r["stats"].healthy()]
+        if self.mode == "weighted":
+            def score(route):
+                p50 = route["stats"].percentile(0.5)
+                # 没有样本的路由给一个较小的随机分数，让它有机会被探测
+                latency = p50 if p50 is not None else random.uniform(0, 0.1)
+                return latency / max(route["weight"], 1e-6) * (1 + 4 * route["stats"].error_rate())
+            healthy.sort(key=score)
+        return healthy + unhealthy
+
+    def _hedge_delay(self, route: dict) -> Optional[float]:
+        """主请求超过该延迟仍未返回时发送对冲请求；样本不足时不对冲"""
+        stats = route["stats"]
+        if len(stats.latencies) < ROUTER_HEDGE_MIN_SAMPLES:
+            return None
+        return stats.percentile(ROUTER_HEDGE_PERCENTILE)
+
+    def _invoke(self, route: dict, method: str, args: tuple, attempt: dict):
+        start = time.monotonic()
+        try:
+            result = getattr(route["manager"], method)(*args)
+            if method == "extract_batch" and args[0] and not result:
+                raise ValueError("批量提取未返回有效结果")
+        except Exception:
+            if self._settle(attempt):
+                route["stats"].record_failure()
+            raise
+        if self._settle(attempt):
+            route["stats"].record_success(time.monotonic() - start)
+        return result
+
+    def _settle(self, attempt: dict) -> bool:
+        """请求结束时调用：已因超时被放弃的请求返回 False（超时时已计为失败，不再重复统计）"""
+        with self._lock:
+            attempt["finished"] = True
+            return not attempt["abandoned"]
+
+    def _abandon(self, attempt: dict) -> bool:
+        """超时时调用：请求恰好已经结束时返回 False（结果照常处理）"""
+        with self._lock:
+            if attempt["finished"]:
+                return False
+            attempt["abandoned"] = True
+            return True
+
+    def _call(self, method: str, args: tuple, exclude=()):
+        """
+        依次尝试候选路由（跳过 exclude 中的路由编号），支持超时切换与对冲请求
+        返回 (第一个成功的结果, 本次尝试过的路由编号)
+        """
+        candidates = [r for r in self._ranked_routes() if id(r) not in exclude]
+        next_index = 0
+        pending = {}  # future -> (route, 开始时间, 请求状态)
+        attempted = set()
+        last_error: Optional[Exception] = None
+
+        def submit(route, now):
+            attempt = {"finished": False, "abandoned": False}
+            attempted.add(id(route))
+            pending[self._executor.submit(self._invoke, route, method, args, attempt)] = (route, now, attempt)
+
+        while next_index < len(candidates) or pending:
+            if not pending:
+                submit(candidates[next_index], time.monotonic())
+                next_index += 1
+
+            now = time.monotonic()
+            deadlines = [start + self.timeout for _, start, _ in pending.values()]
+            hedge_at = None
+            if self.hedge and len(pending) == 1 and next_index < len(candidates):
+                route, start, _ = next(iter(pending.values()))
+                delay = self._hedge_delay(route)
+                if delay is not None:
+                    hedge_at = start + delay
+            wake_at = min(deadlines + ([hedge_at] if hedge_at else []))
+            done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result(), attempted
+                except Exception as e:
+                    get_metrics().incr("router_failovers")
+                    last_error = e
+
+            now = time.monotonic()
+            for future, (route, start, attempt) in list(pending.items()):
+                if now >= start + self.timeout and self._abandon(attempt):
+                    # 超时：放弃该请求（后台线程结束后自行丢弃结果，也不再记录统计），切换到下一个提供商
+                    pending.pop(future)
+                    route["stats"].record_failure()
+                    get_metrics().incr("router_timeouts")
+                    last_error = TimeoutError(f"{route['provider']}/{route['model']} 请求超时")
+            if not done and hedge_at is not None and now >= hedge_at and next_index < len(candidates):
+                get_metrics().incr("router_hedges")
+                submit(candidates[next_index], now)
+                next_index += 1
+
+        raise last_error or RuntimeError("所有模型提供商均请求失败")
+
+    def report(self) -> List[dict]:
+        """每个路由的延迟与错误率统计"""
+        rows = []
+        for route in self.routes:
+            stats = route["stats"]
+            rows.append({
+                "provider": route["provider"],
+                "model": route["model"],
+                "requests": len(stats.outcomes),
+                "error_rate": round(stats.error_rate(), 3),
+                "p50": stats.percentile(0.5),
+                "p95": stats.percentile(0.95),
+                "healthy": stats.healthy(),
+            })
+        return rows
@@ -0,0 +1,278 @@
+"""
+本地 HTTP 服务模式：其他工具（文献管理同步、上传门户等）通过 HTTP 获取PDF的标题、作者和年份，
+无需启动图形界面或各自创建大模型客户端
+
+接口:
+    POST /extract   请求体为PDF文件（Content-Type: application/pdf）、multipart 上传（字段 file），
+                    或 JSON {"path": "服务器上的PDF路径"}（路径须位于 --root 指定的目录中）
+    GET  /health    队列长度、在途文件数与缓存统计
+
+- 大模型客户端、解析进程池和结果缓存在请求之间保持可用
+- 内容相同（SHA-256 相同）的并发请求合并为一次提取，共享同一个结果
+- 未完成（排队中与处理中）的文件数有上限，达到上限时立即返回 503（带 Retry-After），由调用方稍后重试
+"""
+import email.parser
+import email.policy
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from .config import (SERVICE_QUEUE_SIZE, SERVICE_BATCH_MAX, SERVICE_BATCH_WAIT,
+                     SERVICE_REQUEST_TIMEOUT, SERVICE_MAX_UPLOAD_MB)
+from .metrics import get_metrics
+from .result_cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """未完成的文件数已达上限"""
+
+
+class ExtractionService:
+    """
+    提取服务核心（与 HTTP 无关）：按内容哈希合并并发请求，
+    由单个调度线程把排队的文件攒成小批交给同一个 BatchProcessor 提取（不重命名）
+    """
+
+    def __init__(self, processor,
+                 queue_size: int = SERVICE_QUEUE_SIZE,
+                 batch_max: int = SERVICE_BATCH_MAX,
+                 batch_wait: float = SERVICE_BATCH_WAIT):
+        self.processor = processor
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait
+        self.queue_size = queue_size
+        self.queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.inflight = {}  # 内容哈希 -> Future（排队中与处理中的文件，数量不超过 queue_size）
+        self.upload_dir = tempfile.mkdtemp(prefix="pdf_to_title_")
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._dispatch, name="extract-service", daemon=True)
+
+    def start(self) -> "ExtractionService":
+        # 预先初始化客户端：密钥缺失时立即报错，且第一个请求不必等待建立连接
+        self.processor.model_manager.check_ready()
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join()
+        self.processor.close()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def submit(self, digest: str, path: str, temporary: bool = False) -> Tuple[Future, bool]:
+        """
+        提交一个文件，返回 (Future, 是否与在途请求合并)
+        temporary 为 True 表示 path 是上传产生的临时文件，处理完（或合并后）删除
+        未完成的文件数已达上限时抛出 QueueFull
+        """
+        with self._lock:
+            future = self.inflight.get(digest)
+            if future is None and len(self.inflight) < self.queue_size:
+                future = self.inflight[digest] = Future()
+                self.queue.put((digest, path, temporary, future))
+                return future, False
+        if temporary:
+            os.unlink(path)
+        if future is None:
+            get_metrics().incr("service_rejected")
+            raise QueueFull()
+        get_metrics().incr("service_coalesced")
+        return future, True
+
+    def submit_bytes(self, data: bytes) -> Tuple[str, Future, bool]:
+        """提交上传的PDF内容，返回 (内容哈希, Future, 是否合并)"""
+        digest = hashlib.sha256(data).hexdigest()
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=self.upload_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        future, coalesced = self.submit(digest, path, temporary=True)
+        return digest, future, coalesced
+
+    def submit_path(self, path: str) -> Tuple[str, Future, bool]:
+        """提交服务器上的PDF文件，返回 (内容哈希, Future, 是否合并)"""
+        digest = file_sha256(path)
+        future, coalesced = self.submit(digest, path)
+        return digest, future, coalesced
+
+    def stats(self) -> dict:
+        stats = {"queued": self.queue.qsize(), "pending": len(self.inflight), "capacity": self.queue_size}
+        if self.processor.result_cache is not None:
+            stats["cache"] = self.processor.result_cache.stats()
+        return stats
+
+    def _dispatch(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[tuple]):
+        try:
+            records = self.processor.extract([path for _, path, _, _ in batch])
+            by_path = {record["path"]: record for record in records}
+            outcomes = [by_path[path] for _, path, _, _ in batch]
+        except Exception as e:
+            logger.exception("提取失败")
+            outcomes = [e] * len(batch)
+        for (digest, path, temporary, future), outcome in zip(batch, outcomes):
+            with self._lock:
+                self.inflight.pop(digest, None)
+            if temporary:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+def _read_multipart(content_type: str, body: bytes) -> Tuple[Optional[str], Optional[bytes]]:
+    """从 multipart/form-data 请求体中取出 file 字段，返回 (文件名, 内容)"""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_filename(), part.get_payload(decode=True)
+    return None, None
+
+
+def _within(path: str, roots: List[str]) -> bool:
+    real = os.path.realpath(path)
+    return any(os.path.commonpath([real, root]) == root for root in roots)
+
+
+def make_server(service: ExtractionService, host: str, port: int,
+                roots: Optional[List[str]] = None,
+                timeout: float = SERVICE_REQUEST_TIMEOUT,
+                max_upload_mb: float = SERVICE_MAX_UPLOAD_MB) -> ThreadingHTTPServer:
+    """创建 HTTP 服务器（调用方负责 serve_forever / shutdown）；roots 为空时不接受服务器端路径"""
+    roots = [os.path.realpath(root) for root in roots or []]
+    naming_manager = service.processor.naming_manager
+    max_upload = int(max_upload_mb * 1024 * 1024)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            logger.debug("%s - %s", self.address_string(), fmt % args)
+
+        def _send(self, status: int, body: dict, headers: dict = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                self._send(200, dict(service.stats(), status="ok"))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/extract":
+                self._send(404, {"error": "not found"})
+                return
+            # 请求体长度无效时无法确定下一个请求的起点，回复后关闭连接
+            raw_length = self.headers.get("Content-Length")
+            if raw_length is None:
+                self.close_connection = True
+                self._send(411, {"error": "缺少 Content-Length"})
+                return
+            try:
+                length = int(raw_length)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True
+                self._send(400, {"error": f"无效的 Content-Length: {raw_length}"})
+                return
+            if length > max_upload:
+                self.close_connection = True
+                self._send(413, {"error": f"文件超过 {max_upload_mb:g} MB"})
+                return
+            body = self.rfile.read(length)
+            content_type = self.headers.get("Content-Type", "")
+            try:
+                if content_type.startswith("application/json"):
+                    path = json.loads(body or b"{}").get("path")
+                    if not path:
+                        self._send(400, {"error": "缺少 path"})
+                        return
+                    if not _within(path, roots):
+                        self._send(403, {"error": "路径不在允许的目录中"})
+                        return
+                    if not os.path.isfile(path):
+                        self._send(404, {"error": f"文件不存在: {path}"})
+                        return
+                    name = path
+                    digest, future, coalesced = service.submit_path(path)
+                else:
+                    name = self.headers.get("X-Filename") or "upload.pdf"
+                    if content_type.startswith("multipart/form-data"):
+                        name, body = _read_multipart(content_type, body)
+                        if body is None:
+                            self._send(400, {"error": "缺少 file 字段"})
+                            return
+                        name = name or "upload.pdf"
+                    if not body.startswith(b"%PDF"):
+                        self._send(400, {"error": "不是PDF文件"})
+                        return
+                    digest, future, coalesced = service.submit_bytes(body)
+            except QueueFull:
+                self._send(503, {"error": "队列已满，请稍后重试"}, {"Retry-After": "1"})
+                return
+            except (ValueError, AttributeError, OSError) as e:
+                self._send(400, {"error": str(e)})
+                return
+
+            try:
+                record = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                self._send(504, {"error": "处理超时"})
+                return
+            except Exception as e:
+                self._send(500, {"error": str(e) or e.__class__.__name__})
+                return
+            result = {k: v for k, v in record.items() if k != "cache_key"}
+            result.update(path=name, sha256=digest, coalesced=coalesced)
+            if record["status"] == "extracted":
+                result["filename"] = naming_manager.generate_filename(
+                    name, record["title"], record["authors"], record["year"])
+            self._send(200 if record["status"] == "extracted" else 422, result)
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,85 @@
+import re
+
+from .config import FRONT_MATTER_TOKEN_BUDGET
+
+# 期刊页眉、版权声明、投稿信息等与标题作者无关的行：
+# 标题中也可能出现的词（copyright、licence、www 等）只在行首或带有版权声明上下文时才算
+_BOILERPLATE_PATTERN = re.compile(
+    r'(©|\(c\)\s*(19|20)\d{2}|copyright\s*(©|\(c\))?\s*(19|20)\d{2}|all rights reserved|'
+    r'licensed under|under a creative commons|creative commons attribution|'
+    r'contents lists available|journal homepage|https?://|'
+    r'^(www\.|(e-?)?issn\b|doi\b|vol\.?\s*\d|volume\s+\d|pp?\.\s*\d|page\s+\d|'
+    r'received\b|accepted\b|revised\b|published\b|available online|article history|'
+    r'downloaded from|preprint submitted|corresponding author|e-?mail\b)|'
+    r'收稿日期|修回日期|基金项目|作者简介|中图分类号|文献标识码|文章编号|通信作者|网络出版)',
+    re.IGNORECASE)
+# 只有邮箱地址的行（作者行中夹带的邮箱不影响该行）
+_EMAIL_LINE_PATTERN = re.compile(r'^(e-?mail\s*:?\s*)?([\w.+\-{},]+@[\w\-]+(\.[\w\-]+)+[\s,;]*)+$', re.IGNORECASE)
+# 只有页码、数字或符号的行
+_NOISE_PATTERN = re.compile(r'^[\d\W_]{0,8}$')
+# 出版年份（页眉、版权、投稿日期行中的年份）
+_YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d\d)\b')
+# 到达正文后停止
+_STOP_PATTERN = re.compile(r'^(\d+\.?\s*)?(introduction|引言|前言|1\s+引言)\b', re.IGNORECASE)
+
+_tiktoken_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算 token 数：安装了 tiktoken 时使用其编码器，
+    否则按中文约每字 1 个 token、其余约每 3 个字符 1 个 token 估算
+    """
+    global _tiktoken_encoding
+    if _tiktoken_encoding is None:
+        try:
+            import tiktoken
+            _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _tiktoken_encoding = False
+    if _tiktoken_encoding:
+        return len(_tiktoken_encoding.encode(text))
+    cjk = len(re.findall(r'[\u3000-\u9fff\uff00-\uffef]', text))
+    return cjk + (len(text) - cjk) // 3 + 1
+
+
+def is_boilerplate(line: str) -> bool:
+    """判断一行是否为页眉、版权、投稿信息等无关内容"""
+    return bool(_NOISE_PATTERN.match(line) or _BOILERPLATE_PATTERN.search(line)
+                or _EMAIL_LINE_PATTERN.match(line))
+
+
+def select_front_matter(text: str, token_budget: int = FRONT_MATTER_TOKEN_BUDGET) -> str:
+    """
+    从首页文本中挑选发送给大模型的片段：
+    规范化空白、去掉重复行和页眉/版权等无关行，读到引言或超出 token 预算时停止
+    年份通常只出现在出版日期、版权声明这类行中，其中第一个含年份的行予以保留
+    """
+    selected = []
+    seen = set()
+    used = 0
+    dated = False
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if not line:
+            continue
+        if _STOP_PATTERN.match(line) and selected:
+            break
+        key = line.lower()
+        if key in seen:
+            continue
+        if is_boilerplate(line):
+            if dated or not _YEAR_PATTERN.search(line):
+                continue
+            dated = True
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            # 预算不足以放下整行时按比例截断最后一行
+            remaining = token_budget - used
+            if remaining > 8:
+                selected.append(line[:max(1, len(line) * remaining // cost)])
+            break
+        selected.append(line)
+        seen.add(key)
+        used += cost
+    return "\n".join(selected)
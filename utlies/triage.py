@@ -0,0 +1,89 @@
+import re
+from typing import Tuple
+
+from .config import TRIAGE_MIN_CHARS, TRIAGE_MIN_PRINTABLE
+
+PAPER = "paper"
+SCANNED = "scanned"
+NON_PAPER = "non_paper"
+
+# 首页内容流中的文本显示操作符与 XObject 绘制操作符
+_TEXT_OP = re.compile(rb'(?<![A-Za-z])T[jJ](?![A-Za-z])')
+_DO_OP = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s+Do(?![A-Za-z])')
+# 论文首页常见的内容
+_PAPER_CUES = re.compile(
+    r'abstract|introduction|keywords|index terms|references|arxiv|doi|university|institute|proceedings|'
+    r'journal|conference|摘要|关键词|引言|大学|学院|研究所|学报', re.IGNORECASE)
+# 发票、账单、幻灯片等非论文文档常见的内容
+_NON_PAPER_CUES = re.compile(
+    r'invoice|receipt|amount due|total due|subtotal|bill to|purchase order|tax id|slide \d|'
+    r'发票|收据|金额|合计|税号|价税', re.IGNORECASE)
+
+_REASONS = {SCANNED: "扫描版或纯图像PDF（没有可提取的文本），未调用大模型",
+            NON_PAPER: "看起来不是论文，未调用大模型"}
+
+
+class TriageSkip(Exception):
+    """分拣结果不是文本论文，跳过大模型提取"""
+
+    def __init__(self, label: str):
+        super().__init__(_REASONS.get(label, label))
+        self.label = label
+
+
+def inspect_page(page) -> dict:
+    """
+    只读取首页的内容流和资源字典（不解码图像数据）：
+    统计文本显示操作符数量、绘制的图像 XObject 数量以及是否有字体资源
+    """
+    try:
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+    except Exception:
+        data = b""
+    resources = page.get("/Resources")
+    resources = resources.get_object() if resources is not None else {}
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    images = 0
+    for name in set(_DO_OP.findall(data)):
+        xobject = xobjects.get("/" + name.decode("latin-1"))
+        try:
+            if xobject is not None and xobject.get_object().get("/Subtype") == "/Image":
+                images += 1
+        except Exception:
+            continue
+    return {"text_ops": len(_TEXT_OP.findall(data)), "images": images, "fonts": "/Font" in resources}
+
+
+def printable_ratio(text: str) -> float:
+    """可打印字符（字母、数字、中文、标点、空白）所占比例；乱码文本层的比例很低"""
+    if not text:
+        return 0.0
+    # 私用区字符（不可打印）和替换字符通常来自缺失编码映射的字体
+    printable = sum(1 for ch in text if (ch.isprintable() or ch.isspace()) and ch != '\ufffd')
+    return printable / len(text)
+
+
+def classify(features: dict, text: str) -> str:
+    """根据首页结构和提取出的文本判断类别：paper / scanned / non_paper"""
+    if features["images"] > 0 and (features["text_ops"] == 0 or not features["fonts"]):
+        # 首页只绘制图像、没有文本操作符或字体：未经 OCR 的扫描件
+        return SCANNED
+    chars = len("".join(text.split()))
+    readable = chars >= TRIAGE_MIN_CHARS and printable_ratio(text) >= TRIAGE_MIN_PRINTABLE
+    if not readable:
+        # 文本很少或是乱码：绘制了图像的页面视为扫描件（OCR 质量很差或只有水印文字），
+        # 否则（空白页、幻灯片封面等）视为非论文
+        return SCANNED if features["images"] > 0 else NON_PAPER
+    if not _PAPER_CUES.search(text) and _NON_PAPER_CUES.search(text):
+        return NON_PAPER
+    return PAPER
+
+
+def triage(reader, text: str) -> Tuple[str, dict]:
+    """对已打开的PDF分拣，返回 (类别, 首页特征)"""
+    if len(reader.pages) == 0:
+        return NON_PAPER, {"text_ops": 0, "images": 0, "fonts": False}
+    features = inspect_page(reader.pages[0])
+    return classify(features, text), features
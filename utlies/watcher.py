@@ -0,0 +1,275 @@
+"""
+监视目录模式：常驻运行，新下载的PDF写入完成后立即提取信息并重命名
+
+Linux 上通过 inotify（ctypes 调用 libc）接收文件事件；其他平台或 inotify 不可用时，
+按间隔检查目录的修改时间，只有目录内容变化时才重新列出该目录
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import WATCH_POLL_INTERVAL, WATCH_SETTLE_SECONDS, WATCH_BATCH_MAX, WATCH_PRODUCED_MAX
+
+logger = logging.getLogger(__name__)
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_pdf(name: str) -> bool:
+    return name.lower().endswith(".pdf")
+
+
+class InotifyWatcher:
+    """基于 inotify 的目录监视器，poll 返回有变化的PDF路径"""
+
+    def __init__(self, root: str, recursive: bool = False):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("当前平台不支持 inotify")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("当前平台不支持 inotify")
+        self.recursive = recursive
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.directories: Dict[int, str] = {}
+        self.rescan_needed = False
+        self._add_tree(root)
+
+    def _add_watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            logger.warning("无法监视目录 %s: %s", directory, os.strerror(ctypes.get_errno()))
+            return
+        self.directories[wd] = directory
+
+    def _add_tree(self, root: str):
+        self._add_watch(root)
+        if not self.recursive:
+            return
+        for directory, subdirs, _ in os.walk(root):
+            for name in subdirs:
+                self._add_watch(os.path.join(directory, name))
+
+    def poll(self, timeout: float) -> List[str]:
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        if not poller.poll(timeout * 1000):
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，可能漏掉了文件，由调用方重新扫描整个目录
+                self.rescan_needed = True
+                continue
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path)
+                    # 新目录中可能已经有文件
+                    paths.extend(os.path.join(d, f) for d, _, files in os.walk(path) for f in files if _is_pdf(f))
+            elif _is_pdf(name):
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    轮询监视器：每次只检查各目录的修改时间（新增、删除、重命名文件都会改变目录的修改时间），
+    目录有变化时才重新列出其中的PDF
+    """
+
+    # 修改时间精度较粗的文件系统上，刚变化过的目录多列出几次，避免同一时间单位内的第二次变化被漏掉
+    RECENT_SECONDS = 2.0
+
+    def __init__(self, root: str, recursive: bool = False):
+        self.root = root
+        self.recursive = recursive
+        self.rescan_needed = False
+        self._dirs: Dict[str, tuple] = {}  # 目录 -> (修改时间, PDF文件名集合, 子目录列表)
+        self._scan(report=False)
+
+    def _scan(self, report: bool = True) -> List[str]:
+        changed = []
+        seen = set()
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            seen.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            known = self._dirs.get(directory)
+            recent = time.time() - mtime / 1e9 < self.RECENT_SECONDS
+            if known is not None and known[0] == mtime and not recent:
+                stack.extend(known[2])
+                continue
+            names, subdirs = set(), []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                subdirs.append(entry.path)
+                        elif _is_pdf(entry.name):
+                            names.add(entry.name)
+            except OSError as e:
+                logger.warning("无法读取目录 %s: %s", directory, e)
+                continue
+            if report:
+                previous = known[1] if known is not None else set()
+                changed.extend(os.path.join(directory, name) for name in names - previous)
+            self._dirs[directory] = (mtime, names, subdirs)
+            stack.extend(subdirs)
+        for directory in list(self._dirs):
+            if directory not in seen:
+                del self._dirs[directory]
+        return changed
+
+    def poll(self, timeout: float) -> List[str]:
+        time.sleep(timeout)
+        return self._scan()
+
+    def close(self):
+        pass
+
+
+def make_watcher(root: str, recursive: bool = False, use_inotify: bool = True):
+    """优先使用 inotify，不可用时退回轮询"""
+    if use_inotify:
+        try:
+            return InotifyWatcher(root, recursive)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify 不可用（%s），改用轮询", e)
+    return PollingWatcher(root, recursive)
+
+
+class WatchDaemon:
+    """
+    监视目录并增量重命名：
+    - 新文件在 settle 秒内大小和修改时间都不变才视为写入完成（浏览器下载、网络拷贝途中不处理）
+    - 稳定的文件交给同一个 BatchProcessor 处理，大模型客户端、解析进程池和结果缓存在事件之间保持可用
+    - 本工具重命名产生的文件（以及工作日志中已完成的文件）不会再次处理；
+      常驻运行时只记住最近 produced_max 个重命名产生的文件，内存占用不随运行时间增长
+    """
+
+    def __init__(self, root: str, processor, recursive: bool = False,
+                 journal=None, dry_run: bool = False,
+                 settle: float = WATCH_SETTLE_SECONDS,
+                 interval: float = WATCH_POLL_INTERVAL,
+                 use_inotify: bool = True,
+                 on_record: Optional[Callable[[dict], None]] = None,
+                 produced_max: int = WATCH_PRODUCED_MAX):
+        self.root = root
+        self.processor = processor
+        self.recursive = recursive
+        self.journal = journal
+        self.dry_run = dry_run
+        self.settle = settle
+        self.interval = interval
+        self.use_inotify = use_inotify
+        self.on_record = on_record
+        self.pending: Dict[str, Tuple[Optional[tuple], float]] = {}  # 路径 -> (大小/修改时间, 上次变化时间)
+        self.produced: "OrderedDict[str, None]" = OrderedDict()  # 按重命名先后排列，超出上限时丢弃最早的
+        self.produced_max = produced_max
+
+    def _ignored(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        if path in self.produced:
+            return True
+        return self.journal is not None and self.journal.should_skip(path)
+
+    def notice(self, paths: Iterable[str]):
+        """记录有变化的文件，重新开始计算稳定时间"""
+        now = time.monotonic()
+        for path in paths:
+            if _is_pdf(path) and not self._ignored(path):
+                self.pending[path] = (None, now)
+
+    def take_stable(self, now: Optional[float] = None) -> List[str]:
+        """取出已经写入完成的文件"""
+        now = time.monotonic() if now is None else now
+        ready = []
+        for path, (signature, since) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]  # 已被删除或移走
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self.pending[path] = (current, now)
+            elif st.st_size > 0 and now - since >= self.settle:
+                del self.pending[path]
+                ready.append(path)
+        return ready
+
+    def process(self, paths: List[str]) -> List[dict]:
+        callback = self.journal.record_result if self.journal is not None else None
+        records = self.processor.extract(paths, progress_callback=callback)
+        if not self.dry_run:
+            records = self.processor.commit(records, progress_callback=callback)
+        for record in records:
+            if record.get("new_path"):
+                self.produced[os.path.abspath(record["new_path"])] = None
+                while len(self.produced) > self.produced_max:
+                    self.produced.popitem(last=False)
+            if self.on_record is not None:
+                self.on_record(record)
+        return records
+
+    def run(self, stop_event: Optional[threading.Event] = None, initial_scan: bool = False):
+        """运行直到 stop_event 被设置（或收到 KeyboardInterrupt）"""
+        from .cli import iter_pdfs
+        # 预先初始化客户端：密钥缺失时立即报错，且第一个文件不必等待建立连接
+        self.processor.model_manager.check_ready()
+        watcher = make_watcher(self.root, self.recursive, self.use_inotify)
+        logger.info("开始监视 %s（%s）", self.root, type(watcher).__name__)
+        if initial_scan:
+            self.notice(iter_pdfs(self.root, self.recursive))
+        try:
+            while stop_event is None or not stop_event.is_set():
+                # 有等待稳定的文件时缩短等待时间，及时处理
+                timeout = min(self.interval, self.settle / 2) if self.pending else self.interval
+                self.notice(watcher.poll(timeout))
+                if watcher.rescan_needed:
+                    watcher.rescan_needed = False
+                    self.notice(iter_pdfs(self.root, self.recursive))
+                ready = self.take_stable()
+                for start in range(0, len(ready), WATCH_BATCH_MAX):
+                    self.process(ready[start:start + WATCH_BATCH_MAX])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
@@ -0,0 +1,293 @@
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set
+
+from .config import WORK_LEASE_SECONDS, WORK_MAX_ATTEMPTS
+from .metrics import get_metrics
+from .rename_planner import RenamePlanner
+
+logger = logging.getLogger(__name__)
+
+# 一次写入事务中登记的文件数（大目录分多次提交，避免长时间占用数据库写锁）
+_ENQUEUE_BATCH = 500
+
+
+class WorkQueue:
+    """
+    多进程、多主机共享的任务队列（SQLite 数据库，可放在共享目录中），没有中心调度进程：
+    - 任何工作进程都可以扫描目录登记文件（重复登记会被忽略）
+    - 工作进程领取文件时获得一段时间的租约，处理期间定期续租；进程崩溃后租约过期，文件由其他进程重新领取
+    - 只有仍持有租约的进程才能提交结果，同一文件不会被两个进程同时提交
+    - 失败的文件重新排队，累计尝试 max_attempts 次后记为 failed
+    - 重命名前先在队列中记录计划的新路径（见 QueueRenamePlanner）：进程在重命名之后、提交之前崩溃时，
+      重新领取的进程发现原文件已不存在而新文件存在，直接记为 renamed
+    各主机需以相同路径挂载共享目录；数据库依赖文件锁，网络文件系统须支持锁（如 NFSv4）
+    """
+
+    PENDING = "pending"
+    LEASED = "leased"
+    FAILED = "failed"
+    RENAMED = "renamed"
+
+    def __init__(self, db_path: str,
+                 worker_id: Optional[str] = None,
+                 lease_seconds: float = WORK_LEASE_SECONDS,
+                 max_attempts: int = WORK_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        import sqlite3
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        # 网络文件系统不支持 WAL 模式需要的共享内存，使用默认的回滚日志
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        with self._transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " path TEXT PRIMARY KEY, state TEXT NOT NULL, worker TEXT, lease_until REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0, new_path TEXT, error TEXT, updated REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_state ON items(state, lease_until)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_new_path ON items(new_path)")
+
+    @contextmanager
+    def _transaction(self):
+        """写事务：开始时即获取数据库写锁，多个进程同时领取时不会拿到同一个文件"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, paths: Iterable[str]) -> int:
+        """登记待处理文件（已登记的文件，以及本队列重命名产生的文件会被忽略），返回新登记的文件数"""
+        added = 0
+        batch = []
+        for path in paths:
+            batch.append(os.path.abspath(path))
+            if len(batch) >= _ENQUEUE_BATCH:
+                added += self._enqueue(batch)
+                batch = []
+        if batch:
+            added += self._enqueue(batch)
+        return added
+
+    def _enqueue(self, paths: List[str]) -> int:
+        now = time.time()
+        with self._transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (path, state, updated) SELECT ?, ?, ?"
+                " WHERE NOT EXISTS (SELECT 1 FROM items WHERE new_path = ?)",
+                ((path, self.PENDING, now, path) for path in paths)
+            )
+            return self._conn.total_changes - before
+
+    def claim(self, limit: int) -> List[str]:
+        """领取最多 limit 个文件（排队中或租约已过期的），返回其路径"""
+        now = time.time()
+        with self._transaction():
+            # 记录了计划新路径的文件说明上次处理在重命名途中中断，先检查重命名是否已经完成
+            stale = self._conn.execute(
+                "SELECT path, new_path FROM items"
+                " WHERE new_path IS NOT NULL AND (state = ? OR (state = ? AND lease_until < ?))",
+                (self.PENDING, self.LEASED, now)
+            ).fetchall()
+            renamed = [path for path, new_path in stale
+                       if new_path != path and _renamed_before_crash(path, new_path)]
+            self._conn.executemany(
+                "UPDATE items SET state = ?, worker = NULL, lease_until = NULL, error = NULL, updated = ?"
+                " WHERE path = ?",
+                ((self.RENAMED, now, path) for path in renamed)
+            )
+            # 反复导致工作进程崩溃或卡住的文件不再重试
+            self._conn.execute(
+                "UPDATE items SET state = ?, error = ?, updated = ?"
+                " WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                (self.FAILED, f"处理进程中断 {self.max_attempts} 次", now, self.LEASED, now, self.max_attempts)
+            )
+            rows = self._conn.execute(
+                "SELECT path, state FROM items WHERE state = ? OR (state = ? AND lease_until < ?)"
+                " ORDER BY rowid LIMIT ?",
+                (self.PENDING, self.LEASED, now, limit)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE items SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1,"
+                " new_path = NULL, updated = ? WHERE path = ?",
+                ((self.LEASED, self.worker_id, now + self.lease_seconds, now, path) for path, _ in rows)
+            )
+        if renamed:
+            logger.warning("%d 个文件在中断前已重命名但未提交，直接记为已重命名", len(renamed))
+            get_metrics().incr("queue_recovered_renames", len(renamed))
+        reclaimed = sum(1 for _, state in rows if state == self.LEASED)
+        if reclaimed:
+            logger.warning("重新领取了 %d 个租约过期的文件", reclaimed)
+            get_metrics().incr("queue_reclaimed", reclaimed)
+        return [path for path, _ in rows]
+
+    def heartbeat(self, paths: Iterable[str]) -> Set[str]:
+        """为本进程持有的文件续租，返回仍持有租约的路径"""
+        now = time.time()
+        owned = set()
+        with self._transaction():
+            for path in paths:
+                cursor = self._conn.execute(
+                    "UPDATE items SET lease_until = ? WHERE path = ? AND worker = ? AND state = ?",
+                    (now + self.lease_seconds, path, self.worker_id, self.LEASED)
+                )
+                if cursor.rowcount:
+                    owned.add(path)
+        return owned
+
+    def record_plan(self, mapping: Dict[str, str]) -> Set[str]:
+        """重命名之前在一个事务中记录计划的新路径，返回仍持有租约（已记录）的原路径"""
+        now = time.time()
+        owned = set()
+        with self._transaction():
+            for old, new in mapping.items():
+                cursor = self._conn.execute(
+                    "UPDATE items SET new_path = ?, updated = ? WHERE path = ? AND worker = ? AND state = ?",
+                    (os.path.abspath(new), now, os.path.abspath(old), self.worker_id, self.LEASED)
+                )
+                if cursor.rowcount:
+                    owned.add(old)
+        return owned
+
+    def complete(self, record: dict) -> bool:
+        """
+        提交 BatchProcessor 产生的单文件结果；失败的文件在尝试次数用完前重新排队
+        租约已被其他进程取得时不提交，返回 False
+        """
+        state = record["status"]
+        retry = state == self.FAILED
+        new_path = os.path.abspath(record["new_path"]) if record.get("new_path") else None
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE items SET state = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END,"
+                " new_path = ?, error = ?, lease_until = NULL, updated = ?"
+                " WHERE path = ? AND worker = ? AND state = ?",
+                (retry, self.max_attempts, self.PENDING, state, new_path, record.get("error"), time.time(),
+                 record["path"], self.worker_id, self.LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, paths: Iterable[str]):
+        """放弃本进程仍持有的文件（例如用户中断），文件重新排队且不计入尝试次数"""
+        with self._transaction():
+            self._conn.executemany(
+                "UPDATE items SET state = ?, lease_until = NULL, attempts = attempts - 1, updated = ?"
+                " WHERE path = ? AND worker = ? AND state = ?",
+                ((self.PENDING, time.time(), path, self.worker_id, self.LEASED) for path in paths)
+            )
+
+    def pending(self) -> List[str]:
+        """排队中的文件路径（只读，不领取）"""
+        with self._lock:
+            return [path for path, in self._conn.execute(
+                "SELECT path FROM items WHERE state = ? ORDER BY rowid", (self.PENDING,))]
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的文件数"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall())
+
+    def unfinished(self) -> int:
+        """排队中或正在处理的文件数"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM items WHERE state IN (?, ?)", (self.PENDING, self.LEASED)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _renamed_before_crash(path: str, new_path: str) -> bool:
+    """原路径已不存在而计划的新路径存在（或两者是同一文件的硬链接），说明重命名已经完成"""
+    if not os.path.lexists(new_path):
+        return False
+    if not os.path.lexists(path):
+        return True
+    try:
+        if os.path.samefile(path, new_path):
+            # move_no_clobber 在建立硬链接之后、删除原路径之前中断
+            os.unlink(path)
+            return True
+    except OSError:
+        pass
+    return False
+
+
+class QueueRenamePlanner(RenamePlanner):
+    """
+    工作进程使用的重命名计划器：不写撤销日志，而是在重命名前把计划的新路径写入共享队列，
+    进程崩溃后由重新领取文件的进程（可能在其他主机上）据此判断重命名是否已经完成
+    """
+
+    def __init__(self, queue: WorkQueue):
+        super().__init__(undo_log_path=None)
+        self.queue = queue
+
+    def apply(self, mapping: Dict[str, str], atomic: bool = True) -> Dict[str, Optional[Exception]]:
+        owned = self.queue.record_plan({old: new for old, new in mapping.items() if old != new})
+        results = super().apply({old: new for old, new in mapping.items() if old == new or old in owned},
+                                atomic=atomic)
+        for old in mapping:
+            if old not in results:
+                results[old] = RuntimeError("租约已被其他工作进程取得")
+        return results
+
+
+class LeaseKeeper:
+    """
+    处理一批文件期间在后台线程中定期续租（间隔为租约时长的三分之一）
+    held 为仍持有租约的文件：被其他进程取得的文件、以及续租一直失败直到租约到期的文件从中移除，
+    调用方不再提交这些文件，并用 WorkQueue.release 交还（仍由本进程持有的立即重新排队，不计入尝试次数）
+    """
+
+    def __init__(self, queue: WorkQueue, paths: List[str]):
+        self.queue = queue
+        self.held: Set[str] = set(paths)
+        self._expires = time.monotonic() + queue.lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+
+    def _run(self):
+        while self.held and not self._stop.wait(self.queue.lease_seconds / 3):
+            renewed_at = time.monotonic()
+            try:
+                owned = self.queue.heartbeat(self.held)
+            except Exception as e:
+                logger.warning("续租失败: %s", e)
+                if time.monotonic() >= self._expires:
+                    logger.warning("续租失败且租约已到期，放弃 %d 个文件", len(self.held))
+                    self.held = set()
+                continue
+            self._expires = renewed_at + self.queue.lease_seconds
+            lost = self.held - owned
+            if lost:
+                logger.warning("%d 个文件的租约已被其他工作进程取得", len(lost))
+                self.held = owned
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()